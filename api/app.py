@@ -1,81 +1,471 @@
 from __future__ import annotations
 
+import json
+import re
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager, nullcontext
+from dataclasses import asdict
 from pathlib import Path
 
-import joblib
+import numpy as np
 import pandas as pd
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import TypeAdapter, ValidationError
+from starlette.concurrency import run_in_threadpool
 
-from api.schema import PredictionRequest, PredictionResponse
+from api.batching import MicroBatcher
+from api.model_registry import ModelRegistry, ModelVersion, ShadowScorer
+from api.result_cache import ResultCache, parse_precision
+from api.schema import (
+    BatchPredictionResponse,
+    ColumnarPredictionRequest,
+    PredictionRequest,
+    PredictionResponse,
+)
+from monitoring.performance_tracking import LatencyHistogram, PredictionTracker, prometheus_text
 from src.config import ProjectConfig
-from src.explainability.shap_analysis import explain_single_prediction
-from src.feature_engineering import FEATURE_COLUMNS, build_features
+from src.explainability.shap_analysis import build_explainer, explain_batch, explain_single_prediction
+from src.feature_engineering import ROLLING_FEATURES, SENSOR_FEATURES
+from src.feature_store import ASSET_COLUMN, AssetFeatureStore
+from src.modeling.survival_model import survival_risk_matrix
+from src.scoring import risk_levels
+from src.utils import SamplingProfiler, mark_span, record_spans, setup_logger, span
 
-app = FastAPI(title="Grid Predictive Maintenance API", version="0.2.0")
-MODEL_PATH = Path(ProjectConfig().model_path)
+logger = setup_logger(__name__)
 
+CONFIG = ProjectConfig()
+MODEL_PATH = Path(CONFIG.model_path)
+MODEL_VERSION_HEADER = "X-Model-Version"
+MAX_HORIZONS = 16
+MAX_HORIZON_DAYS = 3650
 
-class _ModelCache:
-    artifact = None
+_RECORDS_ADAPTER = TypeAdapter(list[PredictionRequest])
+FEATURE_STORE = AssetFeatureStore(max_assets=CONFIG.feature_store_max_assets)
+PREDICTION_TRACKER = PredictionTracker(high_risk_threshold=CONFIG.risk_threshold_high)
+REQUEST_LATENCY = LatencyHistogram()
+REQUEST_PHASES = LatencyHistogram()
+REGISTRY = ModelRegistry(
+    MODEL_PATH,
+    versions_dir=CONFIG.model_versions_dir,
+    keep=CONFIG.model_keep_versions,
+    poll_seconds=CONFIG.model_poll_seconds,
+)
+SHADOW = ShadowScorer(high_risk_threshold=CONFIG.risk_threshold_high)
+SHADOW_VERSION = CONFIG.shadow_model_version
+_REPO_ROOT = Path(__file__).resolve().parents[1]
+_PROFILE_LOCK = threading.Lock()
+_EXPLAINER_LOCK = threading.Lock()
 
 
+def _warm_up() -> None:
+    """Load and warm the current model, then its SHAP explainer, so the first requests do not pay for either."""
+    start = time.perf_counter()
+    try:
+        REGISTRY.start()
+        entry = REGISTRY.current()
+        if CONFIG.warm_explainer and entry is not None and entry.artifact is not None:
+            _load_explainer(entry)
+    except Exception as exc:  # pragma: no cover - requests still load lazily
+        logger.warning("Warm-up failed: %s", exc)
+    logger.info("Warm-up finished in %.2f s", time.perf_counter() - start)
 
-def _load_artifact():
-    if _ModelCache.artifact is not None:
-        return _ModelCache.artifact
-    if MODEL_PATH.exists():
-        _ModelCache.artifact = joblib.load(MODEL_PATH)
-    return _ModelCache.artifact
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    # serve /health at once; the model loads in the background and /ready reports when it is warm
+    threading.Thread(target=_warm_up, name="warm-up", daemon=True).start()
+    yield
+    REGISTRY.stop()
+
+
+app = FastAPI(title="Grid Predictive Maintenance API", version="0.2.0", lifespan=_lifespan)
+
+
+def _resolve_version(requested: str | None) -> ModelVersion | None:
+    """The version named in the request header, else the current one (None when no model is loaded)."""
+    if requested is None:
+        return REGISTRY.current()
+    entry = REGISTRY.get(requested)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"Model version {requested!r} is not loaded")
+    return entry
+
+
+def _load_explainer(entry: ModelVersion):
+    """SHAP explainer for a model version, built on first use and kept with that version."""
+    if not entry.explainer_built:
+        with _EXPLAINER_LOCK:
+            if not entry.explainer_built:
+                entry.explainer = build_explainer(entry.model)
+                entry.explainer_built = True
+    return entry.explainer
+
+
+def _serving_rolling(data: pd.DataFrame, entry: ModelVersion) -> tuple[np.ndarray, np.ndarray]:
+    """Record the readings in the per-asset store and return their rolling/lag torque features.
+
+    Rows without an ``asset_id`` have no history, so their rolling features fall
+    back to the current torque reading.
+    """
+    asset_ids = data[ASSET_COLUMN].tolist() if ASSET_COLUMN in data.columns else [None] * len(data)
+    with span("features"):
+        return FEATURE_STORE.update_many(asset_ids, entry.transformer.column(data, "torque"))
+
+
+def _serving_features(
+    data: pd.DataFrame, entry: ModelVersion, rolling: tuple[np.ndarray, np.ndarray] | None = None
+) -> pd.DataFrame:
+    """The model's feature matrix, built by its fitted transformer with rolling state from the per-asset store."""
+    if rolling is None:
+        rolling = _serving_rolling(data, entry)
+    with span("features"):
+        return entry.transformer.frame(data, rolling=rolling)
+
+
+def _cache_inputs(data: pd.DataFrame, rolling: tuple[np.ndarray, np.ndarray]) -> dict[str, np.ndarray]:
+    """What a row's result depends on besides the model: its raw readings and its asset's rolling state."""
+    return {**{name: data[name].to_numpy() for name in SENSOR_FEATURES}, **dict(zip(ROLLING_FEATURES, rolling))}
+
+
+def _build_result_cache(cfg: ProjectConfig) -> ResultCache | None:
+    if not cfg.result_cache_enabled:
+        return None
+    return ResultCache(
+        max_bytes=int(cfg.result_cache_max_mb * (1 << 20)),
+        ttl_seconds=cfg.result_cache_ttl_seconds,
+        decimals=cfg.result_cache_decimals,
+        precision=parse_precision(cfg.result_cache_precision),
+    )
+
+
+RESULT_CACHE = _build_result_cache(CONFIG)
+
+
+def _predict_cached(feats: pd.DataFrame, entry: ModelVersion, inputs: dict[str, np.ndarray]) -> np.ndarray:
+    """``entry.predict``, scoring only the rows whose quantized inputs are not in the result cache."""
+    if RESULT_CACHE is None:
+        return entry.predict(feats)
+    scores = RESULT_CACHE.get_or_compute(entry, "score", inputs, lambda rows: entry.predict(feats.iloc[rows]).tolist())
+    return np.asarray(scores, dtype=float)
+
+
+def _score_frame(data: pd.DataFrame, entry: ModelVersion | None) -> np.ndarray:
+    """Failure probabilities for every row of a raw sensor frame in one model call."""
+    if entry is None:
+        # deterministic fallback in absence of trained model
+        raw = data["torque"].to_numpy(dtype=float) / 100.0 + data["tool_wear"].to_numpy(dtype=float) / 500.0
+        return np.clip(raw, 0.0, 1.0)
+    rolling = _serving_rolling(data, entry)
+    feats = _serving_features(data, entry, rolling)
+    if entry.drift_monitor is not None:
+        with span("drift"):
+            entry.drift_monitor.update(feats[entry.drift_monitor.features])
+    with span("predict"):
+        scores = _predict_cached(feats, entry, _cache_inputs(data, rolling))
+    shadow = REGISTRY.get(SHADOW_VERSION) if SHADOW_VERSION else None
+    if shadow is not None and shadow is not entry:
+        SHADOW.submit(shadow, data, rolling, scores)
+    return scores
+
+
+def _parse_batch_body(raw: bytes, content_type: str) -> pd.DataFrame:
+    """Accept a JSON list of records, ``{"records": [...]}``, a columnar object or NDJSON."""
+    with span("parse"):
+        return _parse_batch_records(raw, content_type)
+
+
+def _parse_batch_records(raw: bytes, content_type: str) -> pd.DataFrame:
+    try:
+        if "ndjson" in content_type:
+            body = [json.loads(line) for line in raw.splitlines() if line.strip()]
+        else:
+            body = json.loads(raw)
+    except json.JSONDecodeError as exc:
+        raise HTTPException(status_code=400, detail=f"Malformed JSON body: {exc}") from exc
+
+    try:
+        if isinstance(body, dict) and "records" in body:
+            body = body["records"]
+        if isinstance(body, list):
+            records = _RECORDS_ADAPTER.validate_python(body)
+            fields = list(PredictionRequest.model_fields)
+            return pd.DataFrame({f: [getattr(r, f) for r in records] for f in fields}, columns=fields)
+        columns = ColumnarPredictionRequest.model_validate(body)
+        return pd.DataFrame(columns.model_dump(exclude_none=True))
+    except ValidationError as exc:
+        raise HTTPException(status_code=422, detail=exc.errors(include_url=False)) from exc
+
+
+@contextmanager
+def _profile_request():
+    """A sampling profiler around the request when slow-request profiling is on and no other request holds it."""
+    if CONFIG.profile_slow_ms <= 0 or not _PROFILE_LOCK.acquire(blocking=False):
+        yield None
+        return
+    try:
+        with SamplingProfiler(roots=[_REPO_ROOT]) as profiler:
+            yield profiler
+    finally:
+        _PROFILE_LOCK.release()
+
+
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    start = time.perf_counter()
+    with (record_spans() if CONFIG.server_timing else nullcontext()) as spans, _profile_request() as profiler:
+        response = await call_next(request)
+    elapsed = time.perf_counter() - start
+    route = request.scope.get("route")
+    # label by route template rather than raw URL to keep metric cardinality bounded
+    route_path = getattr(route, "path", "unmatched")
+    REQUEST_LATENCY.observe(route_path, elapsed)
+    if spans is not None:
+        for name, seconds in spans.totals().items():
+            REQUEST_PHASES.observe((route_path, name), seconds)
+        spans.add("total", elapsed)
+        response.headers["Server-Timing"] = spans.server_timing()
+    if profiler is not None and elapsed * 1000 >= CONFIG.profile_slow_ms:
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", route_path).strip("_") or "root"
+        out = profiler.write(Path(CONFIG.profile_dir) / f"{slug}.collapsed")
+        logger.info("Request to %s took %.1f ms; profile written to %s", route_path, elapsed * 1000, out)
+    return response
+
+
+def _readiness() -> tuple[ModelVersion | None, dict]:
+    """The current version (None while the first load is running) and what is still warming up.
+
+    Never blocks on a load in progress, so liveness probes answer during warm-up.
+    """
+    entry = REGISTRY.current(block=False)
+    loaded = REGISTRY.initialized
+    explainer = entry is None or entry.artifact is None or not CONFIG.warm_explainer or entry.explainer_built
+    checks = {"model": loaded, "explainer": loaded and explainer}
+    return entry, checks
 
 
 @app.get("/health")
 def health() -> dict:
-    artifact = _load_artifact()
-    return {
+    """Liveness: answers as soon as the process serves requests, with readiness reported alongside."""
+    entry, checks = _readiness()
+    body = {
         "status": "ok",
-        "model_loaded": artifact is not None,
+        "ready": all(checks.values()),
+        "model_loaded": entry is not None,
+        "compiled_model": entry is not None and entry.compiled is not None,
         "model_path": str(MODEL_PATH),
+        "model_version": entry.version if entry is not None else None,
+        "versions": REGISTRY.versions() if REGISTRY.initialized else [],
     }
+    if SHADOW_VERSION:
+        body["shadow"] = {"version": SHADOW_VERSION, **SHADOW.stats()}
+    return body
 
 
-@app.post("/predict", response_model=PredictionResponse)
-def predict(payload: PredictionRequest) -> PredictionResponse:
-    artifact = _load_artifact()
-    data = pd.DataFrame([payload.model_dump()])
-    feats = build_features(data)
+@app.get("/ready")
+def ready() -> JSONResponse:
+    """Readiness: 503 until the model and its explainer are loaded and warm."""
+    _, checks = _readiness()
+    is_ready = all(checks.values())
+    return JSONResponse({"ready": is_ready, "checks": checks}, status_code=200 if is_ready else 503)
 
-    if artifact is None:
-        # deterministic fallback in absence of trained model
-        score = min(1.0, max(0.0, (payload.torque / 100.0) + (payload.tool_wear / 500.0)))
-    else:
-        model = artifact["model"]
-        feature_list = artifact.get("features", FEATURE_COLUMNS)
-        score = float(model.predict_proba(feats[feature_list])[:, 1][0])
-
-    cfg = ProjectConfig()
-    if score >= cfg.risk_threshold_high:
-        risk = "HIGH"
-    elif score >= cfg.risk_threshold_medium:
-        risk = "MEDIUM"
-    else:
-        risk = "LOW"
 
-    return PredictionResponse(failure_probability=round(score, 4), risk_level=risk)
+def _score_tracked(data: pd.DataFrame, entry: ModelVersion | None = None) -> np.ndarray:
+    scores = _score_frame(data, entry if entry is not None else REGISTRY.current())
+    PREDICTION_TRACKER.update(scores)
+    return scores
+
+
+def _parse_horizons(raw: str | None) -> tuple[int, ...]:
+    """``"7,30,90"`` -> ``(7, 30, 90)``; 422 for anything that is not a short list of day counts."""
+    if not raw:
+        return ()
+    try:
+        days = tuple(int(part) for part in raw.split(",") if part.strip())
+    except ValueError:
+        raise HTTPException(status_code=422, detail="horizons must be comma-separated whole days") from None
+    if len(days) > MAX_HORIZONS or any(d < 1 or d > MAX_HORIZON_DAYS for d in days):
+        raise HTTPException(
+            status_code=422, detail=f"horizons must be at most {MAX_HORIZONS} values between 1 and {MAX_HORIZON_DAYS}"
+        )
+    return days
+
+
+def _prediction_response(score: float, horizons: tuple[int, ...] = ()) -> PredictionResponse:
+    risk = str(risk_levels(np.array([score]), CONFIG)[0])
+    response = PredictionResponse(failure_probability=round(score, 4), risk_level=risk)
+    if horizons:
+        response.horizons = list(horizons)
+        response.survival_risk = np.round(survival_risk_matrix([score], horizons)[0], 4).tolist()
+    return response
+
+
+def _predict_one(
+    payload: PredictionRequest, entry: ModelVersion | None = None, horizons: tuple[int, ...] = ()
+) -> PredictionResponse:
+    score = float(_score_tracked(pd.DataFrame([payload.model_dump()]), entry)[0])
+    return _prediction_response(score, horizons)
+
+
+def _build_batcher(cfg: ProjectConfig) -> MicroBatcher | None:
+    if not cfg.microbatch_enabled:
+        return None
+    return MicroBatcher(_score_tracked, max_batch_size=cfg.microbatch_max_size, max_wait_ms=cfg.microbatch_max_wait_ms)
+
+
+BATCHER = _build_batcher(CONFIG)
+
+
+@app.post("/predict", response_model=PredictionResponse, response_model_exclude_none=True)
+async def predict(
+    payload: PredictionRequest,
+    horizons: str | None = None,
+    x_model_version: str | None = Header(default=None),
+) -> PredictionResponse:
+    """Score one reading; with micro-batching enabled, concurrent requests share one model call.
+
+    ``horizons=7,30,90`` adds the survival curve at those days. Requests pinned
+    to a version with ``X-Model-Version`` bypass the batcher.
+    """
+    mark_span("validate")
+    days = _parse_horizons(horizons)
+    if BATCHER is None or x_model_version is not None:
+        return await run_in_threadpool(_predict_one, payload, _resolve_version(x_model_version), days)
+    with span("queue"):
+        score = await BATCHER.submit(payload.model_dump())
+    return _prediction_response(score, days)
+
+
+@app.post("/predict_batch", response_model=BatchPredictionResponse, response_model_exclude_none=True)
+async def predict_batch(request: Request, horizons: str | None = None) -> BatchPredictionResponse:
+    """Score many assets with a single feature build and a single ``predict_proba`` call.
+
+    ``horizons=7,30,90`` adds an assets x horizons survival-risk matrix.
+    """
+    days = _parse_horizons(horizons)
+    entry = _resolve_version(request.headers.get(MODEL_VERSION_HEADER))
+    data = _parse_batch_body(await request.body(), request.headers.get("content-type", ""))
+    if data.empty:
+        return BatchPredictionResponse(count=0, failure_probability=[], risk_level=[])
+
+    scores = await run_in_threadpool(_score_tracked, data, entry)
+    risks = risk_levels(scores, CONFIG)
+    response = BatchPredictionResponse(
+        count=len(scores),
+        failure_probability=np.round(scores, 4).tolist(),
+        risk_level=risks.tolist(),
+    )
+    if days:
+        response.horizons = list(days)
+        response.survival_risk = np.round(survival_risk_matrix(scores, days), 4).tolist()
+    return response
 
 
 @app.post("/predict_with_explanation")
-def predict_with_explanation(payload: PredictionRequest) -> dict:
-    artifact = _load_artifact()
-    if artifact is None:
-        pred = predict(payload)
+def predict_with_explanation(payload: PredictionRequest, x_model_version: str | None = Header(default=None)) -> dict:
+    mark_span("validate")
+    entry = _resolve_version(x_model_version)
+    if entry is None or entry.model is None:
+        pred = _predict_one(payload, entry)
         return {"prediction": pred.model_dump(), "explanation": {"note": "Train model to enable local explanations."}}
 
     data = pd.DataFrame([payload.model_dump()])
-    feats = build_features(data)[artifact.get("features", FEATURE_COLUMNS)]
-    score = float(artifact["model"].predict_proba(feats)[:, 1][0])
-    local = explain_single_prediction(artifact["model"], feats)
+    rolling = _serving_rolling(data, entry)
 
+    def compute(rows: list[int]) -> list[tuple[float, dict[str, float]]]:
+        return [_explain_one(_serving_features(data, entry, rolling), entry)]
+
+    if RESULT_CACHE is None:
+        score, top = compute([0])[0]
+    else:
+        # a hit skips the feature matrix as well as the model and SHAP calls
+        score, top = RESULT_CACHE.get_or_compute(entry, "explain", _cache_inputs(data, rolling), compute)[0]
+    return {"failure_probability": round(score, 4), "top_contributors": top}
+
+
+def _explain_one(feats: pd.DataFrame, entry: ModelVersion) -> tuple[float, dict[str, float]]:
+    with span("predict"):
+        score = float(entry.model.predict_proba(feats)[:, 1][0])
+    with span("explain"):
+        local = explain_single_prediction(entry.model, feats, explainer=_load_explainer(entry))
+    return score, dict(sorted(local.items(), key=lambda kv: abs(kv[1]), reverse=True)[:3])
+
+
+def _explain_rows(feats: pd.DataFrame, entry: ModelVersion, top_k: int) -> list[tuple[float, dict[str, float]]]:
+    with span("predict"):
+        scores = entry.model.predict_proba(feats)[:, 1].tolist()
+    with span("explain"):
+        contributors = explain_batch(entry.model, feats, top_k=top_k, explainer=_load_explainer(entry))
+    return list(zip(scores, contributors))
+
+
+def _explain_frame(data: pd.DataFrame, entry: ModelVersion, top_k: int) -> tuple[np.ndarray, list[dict[str, float]]]:
+    rolling = _serving_rolling(data, entry)
+
+    def compute(missing: list[int]) -> list[tuple[float, dict[str, float]]]:
+        subset_rolling = (rolling[0][missing], rolling[1][missing])
+        return _explain_rows(_serving_features(data.iloc[missing], entry, subset_rolling), entry, top_k)
+
+    if RESULT_CACHE is None:
+        rows = _explain_rows(_serving_features(data, entry, rolling), entry, top_k)
+    else:
+        rows = RESULT_CACHE.get_or_compute(entry, f"explain_top{top_k}", _cache_inputs(data, rolling), compute)
+    return np.array([score for score, _ in rows], dtype=float), [contributors for _, contributors in rows]
+
+
+@app.post("/predict_with_explanation_batch")
+async def predict_with_explanation_batch(request: Request, top_k: int = 3) -> dict:
+    """Explain many rows with one ``shap_values`` call; body formats match ``/predict_batch``."""
+    data = _parse_batch_body(await request.body(), request.headers.get("content-type", ""))
+    if data.empty:
+        return {"count": 0, "failure_probability": [], "top_contributors": []}
+
+    entry = _resolve_version(request.headers.get(MODEL_VERSION_HEADER))
+    if entry is None or entry.model is None:
+        scores = _score_frame(data, entry)
+        return {
+            "count": len(scores),
+            "failure_probability": np.round(scores, 4).tolist(),
+            "top_contributors": [],
+            "explanation": {"note": "Train model to enable local explanations."},
+        }
+
+    scores, contributors = await run_in_threadpool(_explain_frame, data, entry, top_k)
     return {
-        "failure_probability": round(score, 4),
-        "top_contributors": dict(sorted(local.items(), key=lambda kv: abs(kv[1]), reverse=True)[:3]),
+        "count": len(scores),
+        "failure_probability": np.round(scores, 4).tolist(),
+        "top_contributors": contributors,
     }
+
+
+@app.get("/drift")
+def drift(window: str = "sliding", include_sketch: bool = False) -> dict:
+    """Drift of recent scored traffic against the training reference sketch.
+
+    ``include_sketch`` returns the window's raw histogram so sketches from several
+    workers can be combined with ``monitoring.streaming_drift.merge_sketches``.
+    """
+    if window not in {"sliding", "tumbling"}:
+        raise HTTPException(status_code=422, detail="window must be 'sliding' or 'tumbling'")
+    entry = REGISTRY.current()
+    monitor = entry.drift_monitor if entry is not None else None
+    if monitor is None:
+        return {"enabled": False, "note": "Train model to write a drift reference sketch."}
+
+    report = monitor.report(window)
+    report["features"] = {name: asdict(score) for name, score in report["features"].items()}
+    if include_sketch:
+        report["sketch"] = monitor.window(window)[0].to_dict()
+    return {"enabled": True, **report}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> PlainTextResponse:
+    """Prediction statistics and request latency in the Prometheus text format."""
+    extra = BATCHER.prometheus_lines() if BATCHER is not None else []
+    if RESULT_CACHE is not None:
+        extra += RESULT_CACHE.prometheus_lines()
+    return PlainTextResponse(
+        prometheus_text(PREDICTION_TRACKER, REQUEST_LATENCY, phases=REQUEST_PHASES, extra=extra), media_type="text/plain; version=0.0.4"
+    )
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import time
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+from starlette.concurrency import run_in_threadpool
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+WAIT_BUCKETS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1)
+
+
+class _Stats:
+    def __init__(self) -> None:
+        self.batches = 0
+        self.rows = 0
+        self.max_batch = 0
+        self.batch_sizes = np.zeros(len(BATCH_SIZE_BUCKETS) + 1, dtype=np.int64)
+        self.waits = np.zeros(len(WAIT_BUCKETS) + 1, dtype=np.int64)
+        self.wait_seconds = 0.0
+
+    def record(self, size: int, waits: list[float]) -> None:
+        self.batches += 1
+        self.rows += size
+        self.max_batch = max(self.max_batch, size)
+        self.batch_sizes[np.searchsorted(BATCH_SIZE_BUCKETS, size)] += 1
+        np.add.at(self.waits, np.searchsorted(WAIT_BUCKETS, waits), 1)
+        self.wait_seconds += float(sum(waits))
+
+
+class MicroBatcher:
+    """Coalesce concurrent single-row requests into one vectorized scoring call.
+
+    Callers ``await submit(record)``; a background task collects records until
+    ``max_batch_size`` are waiting or ``max_wait_ms`` has passed since the first,
+    scores them with one ``score_fn(frame)`` call in the threadpool and resolves
+    each caller's future with its own row. Batches are scored one at a time, in
+    arrival order, so stateful features see readings in the order they came in.
+    """
+
+    def __init__(
+        self,
+        score_fn: Callable[[pd.DataFrame], np.ndarray],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 2.0,
+    ) -> None:
+        if max_batch_size < 1 or max_wait_ms < 0:
+            raise ValueError("max_batch_size must be >= 1 and max_wait_ms >= 0")
+        self.score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.stats = _Stats()
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            # (re)bind to the serving loop; a new loop means the old queue and task are unusable
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            # a fresh context keeps the first caller's request state (e.g. its span recorder) out of the worker
+            self._task = loop.create_task(self._run(self._queue), context=contextvars.Context())
+        return self._queue
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def submit(self, record: dict[str, Any]) -> float:
+        queue = self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await queue.put((record, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self, queue: asyncio.Queue) -> list[tuple]:
+        batch = [await queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self, queue: asyncio.Queue) -> None:
+        while True:
+            batch = await self._collect(queue)
+            started = time.perf_counter()
+            live = [(record, future) for record, future, _ in batch if not future.cancelled()]
+            self.stats.record(len(batch), [started - enqueued for _, _, enqueued in batch])
+            if not live:
+                continue
+            try:
+                scores = await run_in_threadpool(self.score_fn, pd.DataFrame([record for record, _ in live]))
+            except Exception as exc:
+                for _, future in live:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            for (_, future), score in zip(live, np.asarray(scores, dtype=float)):
+                if not future.done():
+                    future.set_result(float(score))
+
+    def prometheus_lines(self, prefix: str = "gpm") -> list[str]:
+        s = self.stats
+        name = f"{prefix}_microbatch"
+        lines = [
+            f"# HELP {name}_queue_depth Requests waiting to be batched.",
+            f"# TYPE {name}_queue_depth gauge",
+            f"{name}_queue_depth {self.queue_depth}",
+            f"# HELP {name}_max_size Largest batch scored.",
+            f"# TYPE {name}_max_size gauge",
+            f"{name}_max_size {s.max_batch}",
+            f"# HELP {name}_size Rows per scored batch.",
+            f"# TYPE {name}_size histogram",
+        ]
+        for edge, count in zip((*BATCH_SIZE_BUCKETS, "+Inf"), np.cumsum(s.batch_sizes)):
+            lines.append(f'{name}_size_bucket{{le="{edge}"}} {int(count)}')
+        lines += [f"{name}_size_sum {s.rows}", f"{name}_size_count {s.batches}"]
+        lines += [
+            f"# HELP {name}_wait_seconds Time a request spent queued before its batch was scored.",
+            f"# TYPE {name}_wait_seconds histogram",
+        ]
+        for edge, count in zip((*WAIT_BUCKETS, "+Inf"), np.cumsum(s.waits)):
+            lines.append(f'{name}_wait_seconds_bucket{{le="{edge}"}} {int(count)}')
+        lines += [f"{name}_wait_seconds_sum {s.wait_seconds!r}", f"{name}_wait_seconds_count {s.rows}"]
+        return lines
@@ -0,0 +1,362 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import cached_property
+from pathlib import Path
+from typing import Any, Mapping
+
+import numpy as np
+import pandas as pd
+
+from monitoring.streaming_drift import HistogramSketch, StreamingDriftMonitor, drift_reference_path
+from src.data_loader import file_digest
+from src.feature_engineering import FEATURE_COLUMNS, FeatureTransformer
+from src.modeling.artifact import (
+    COMPILED_NAME,
+    DRIFT_REFERENCE_NAME,
+    MANIFEST_NAME,
+    ModelArtifact,
+    artifact_dir,
+    load_artifact,
+)
+from src.modeling.compiled_model import CompiledEnsemble, compiled_model_path
+from src.utils import setup_logger
+
+logger = setup_logger(__name__)
+
+
+@dataclass
+class ModelVersion:
+    """One loaded model and everything derived from it; immutable once published."""
+
+    version: str
+    artifact: Mapping[str, Any] | None
+    compiled: CompiledEnsemble | None = None
+    drift_monitor: StreamingDriftMonitor | None = None
+    source: str = ""
+    loaded_at: float = field(default_factory=time.time)
+    explainer: Any = field(default=None, repr=False)
+    explainer_built: bool = False
+
+    @property
+    def model(self) -> Any:
+        return None if self.artifact is None else self.artifact["model"]
+
+    @property
+    def features(self) -> list[str]:
+        if self.compiled is not None:
+            return list(self.compiled.feature_names)
+        return list((self.artifact or {}).get("features", FEATURE_COLUMNS))
+
+    @cached_property
+    def transformer(self) -> FeatureTransformer:
+        """Training-time imputation and feature spec; artifacts older than it only get the feature order."""
+        spec = (self.artifact or {}).get("transformer")
+        if spec is not None:
+            return FeatureTransformer.from_dict(spec)
+        return FeatureTransformer(feature_names=self.features)
+
+    @property
+    def scorer(self) -> Any:
+        """Prefers the NumPy export, which avoids the estimator stack on the hot path."""
+        return self.compiled if self.compiled is not None else self.model
+
+    def predict(self, feats: pd.DataFrame) -> np.ndarray:
+        return np.asarray(self.scorer.predict_proba(feats[self.features])[:, 1], dtype=float)
+
+    def describe(self) -> dict:
+        return {
+            "version": self.version,
+            "source": self.source,
+            "compiled": self.compiled is not None,
+            "loaded_at": self.loaded_at,
+        }
+
+
+def warmup_frame(n: int = 64, seed: int = 0) -> pd.DataFrame:
+    """Synthetic sensor readings in the nominal operating range, for warming a fresh model."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "air_temperature": rng.normal(300.0, 2.0, n),
+            "process_temperature": rng.normal(310.0, 1.5, n),
+            "rotational_speed": rng.normal(1540.0, 180.0, n),
+            "torque": rng.normal(40.0, 10.0, n),
+            "tool_wear": rng.uniform(0.0, 250.0, n),
+        }
+    )
+
+
+def load_version(path: Path, version: str = "") -> ModelVersion:
+    """Open an artifact with its compiled export and drift reference, when present.
+
+    Directory artifacts carry both files inside and load their model lazily, so
+    with a compiled export the estimator is only deserialized for explanations.
+    Legacy pickles use the files written next to them.
+    """
+    artifact = load_artifact(path)
+    if isinstance(artifact, ModelArtifact):
+        compiled_path, reference_path = artifact.file(COMPILED_NAME), artifact.file(DRIFT_REFERENCE_NAME)
+    else:
+        compiled_path, reference_path = compiled_model_path(path), drift_reference_path(path)
+    return ModelVersion(
+        version=version,
+        artifact=artifact,
+        compiled=CompiledEnsemble.load(compiled_path) if compiled_path and compiled_path.exists() else None,
+        drift_monitor=(
+            StreamingDriftMonitor(HistogramSketch.load(reference_path))
+            if reference_path and reference_path.exists()
+            else None
+        ),
+        source=str(path),
+    )
+
+
+def _signature(path: Path) -> tuple:
+    """Size and mtime of an artifact and its companion files; a change to any triggers a reload."""
+    out = []
+    for p in (path, artifact_dir(path) / MANIFEST_NAME, compiled_model_path(path), drift_reference_path(path)):
+        stat = p.stat() if p.exists() else None
+        out.append((stat.st_size, stat.st_mtime_ns) if stat else None)
+    return tuple(out)
+
+
+@dataclass(frozen=True)
+class _RegistryState:
+    current: str | None
+    versions: OrderedDict
+
+
+class ModelRegistry:
+    """Resident model versions, reloaded in the background as artifacts change on disk.
+
+    Watches either one artifact path or a directory of ``*.pkl`` versions. A new
+    artifact is loaded and warmed up off the request path, then published by
+    replacing a single state reference, so readers never see a half-loaded model.
+    The newest ``keep`` versions stay resident for header routing and shadow scoring.
+    """
+
+    def __init__(
+        self,
+        model_path: str | Path,
+        versions_dir: str | Path | None = None,
+        keep: int = 3,
+        poll_seconds: float = 5.0,
+        warmup_rows: int = 64,
+    ) -> None:
+        self.model_path = Path(model_path)
+        self.versions_dir = Path(versions_dir) if versions_dir else None
+        self.keep = max(1, keep)
+        self.poll_seconds = poll_seconds
+        self.warmup_rows = warmup_rows
+        self._state = _RegistryState(None, OrderedDict())
+        self._seen: dict[str, tuple] = {}
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._watcher: threading.Thread | None = None
+        self._initialized = False
+
+    def _candidates(self) -> list[Path]:
+        if self.versions_dir is not None:
+            if not self.versions_dir.is_dir():
+                return []
+            # each version is a ``<name>.pkl`` legacy file and/or a ``<name>/`` artifact directory
+            names = {p.with_suffix(".pkl") for p in self.versions_dir.glob("*.pkl")}
+            names |= {p.parent.with_suffix(".pkl") for p in self.versions_dir.glob(f"*/{MANIFEST_NAME}")}
+            return sorted(names, key=lambda p: max(s[1] for s in _signature(p) if s))
+        if self.model_path.exists() or (artifact_dir(self.model_path) / MANIFEST_NAME).exists():
+            return [self.model_path]
+        return []
+
+    def _version_name(self, path: Path, artifact: Mapping[str, Any]) -> str:
+        if self.versions_dir is not None:
+            return path.stem
+        if isinstance(artifact, ModelArtifact):
+            return artifact.version
+        return file_digest(path)[:12]
+
+    def _warm(self, entry: ModelVersion) -> None:
+        if entry.scorer is None or self.warmup_rows <= 0:
+            return
+        start = time.perf_counter()
+        scores = entry.predict(entry.transformer.frame(warmup_frame(self.warmup_rows)))
+        if not np.all(np.isfinite(scores)):
+            raise ValueError("warm-up produced non-finite scores")
+        logger.info("Warmed model %s in %.1f ms", entry.version, (time.perf_counter() - start) * 1000)
+
+    def register(self, entry: ModelVersion, make_current: bool = True) -> None:
+        """Publish an already loaded version; older versions beyond ``keep`` are evicted."""
+        with self._lock:
+            state = self._state
+            versions = OrderedDict(state.versions)
+            versions.pop(entry.version, None)
+            versions[entry.version] = entry
+            current = entry.version if make_current or state.current is None else state.current
+            while len(versions) > self.keep:
+                versions.pop(next(v for v in versions if v != current))
+            self._state = _RegistryState(current, versions)
+
+    def refresh(self) -> list[str]:
+        """Load artifacts that are new or changed since the last check; returns the versions added."""
+        added = []
+        with self._lock:
+            for path in self._candidates():
+                signature = _signature(path)
+                if self._seen.get(str(path)) == signature:
+                    continue
+                try:
+                    entry = load_version(path)
+                    entry.version = self._version_name(path, entry.artifact)
+                    self._warm(entry)
+                except Exception as exc:
+                    # a broken or half-written artifact must never replace a working model
+                    logger.warning("Skipping model artifact %s: %s", path, exc)
+                    continue
+                finally:
+                    self._seen[str(path)] = signature
+                self.register(entry)
+                added.append(entry.version)
+                logger.info("Model version %s is now current", entry.version)
+            self._initialized = True
+        return added
+
+    @property
+    def initialized(self) -> bool:
+        """Whether the first scan of the model path has finished."""
+        return self._initialized
+
+    def _ensure_loaded(self) -> None:
+        if not self._initialized:
+            self.refresh()
+
+    def current(self, block: bool = True) -> ModelVersion | None:
+        """The serving version, loading it first if needed.
+
+        With ``block=False`` a load already running on another thread is not
+        waited for; None is returned until it finishes.
+        """
+        if block:
+            self._ensure_loaded()
+        elif not self._initialized and self._lock.acquire(blocking=False):
+            try:
+                self._ensure_loaded()
+            finally:
+                self._lock.release()
+        state = self._state
+        return state.versions.get(state.current) if state.current else None
+
+    def get(self, version: str) -> ModelVersion | None:
+        self._ensure_loaded()
+        return self._state.versions.get(version)
+
+    def promote(self, version: str) -> None:
+        with self._lock:
+            state = self._state
+            if version not in state.versions:
+                raise KeyError(f"Unknown model version {version!r}")
+            self._state = _RegistryState(version, state.versions)
+
+    def versions(self) -> list[str]:
+        self._ensure_loaded()
+        return list(self._state.versions)
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.refresh()
+            except Exception as exc:  # pragma: no cover - keep the watcher alive
+                logger.warning("Model refresh failed: %s", exc)
+
+    def start(self) -> None:
+        """Load what is on disk now, then poll for new artifacts on a daemon thread."""
+        self.refresh()
+        if self._watcher is None and self.poll_seconds > 0:
+            self._stop.clear()
+            self._watcher = threading.Thread(target=self._watch, name="model-registry", daemon=True)
+            self._watcher.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=self.poll_seconds + 1)
+            self._watcher = None
+
+
+class ShadowScorer:
+    """Score a second model version on traffic the primary already answered.
+
+    Work goes to one background thread; when more than ``max_pending`` batches
+    are queued, new ones are dropped rather than building a backlog. The shadow
+    version builds its features from the raw readings with its own transformer;
+    only the per-asset rolling state, which the primary already read from the
+    feature store, is shared.
+    """
+
+    def __init__(self, high_risk_threshold: float = 0.75, max_pending: int = 8) -> None:
+        self.high_risk_threshold = high_risk_threshold
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.rows = 0
+        self.dropped = 0
+        self.abs_diff_sum = 0.0
+        self.max_abs_diff = 0.0
+        self.risk_flips = 0
+        self.errors = 0
+
+    def submit(
+        self,
+        entry: ModelVersion,
+        data: pd.DataFrame,
+        rolling: tuple[np.ndarray, np.ndarray],
+        primary: np.ndarray,
+    ) -> bool:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.dropped += len(primary)
+                return False
+            self._pending += 1
+        self._executor.submit(self._score, entry, data, rolling, np.asarray(primary, dtype=float))
+        return True
+
+    def _score(
+        self, entry: ModelVersion, data: pd.DataFrame, rolling: tuple[np.ndarray, np.ndarray], primary: np.ndarray
+    ) -> None:
+        try:
+            shadow = entry.predict(entry.transformer.frame(data, rolling=rolling))
+        except Exception as exc:
+            logger.warning("Shadow scoring with %s failed: %s", entry.version, exc)
+            with self._lock:
+                self.errors += 1
+                self._pending -= 1
+            return
+        diff = np.abs(shadow - primary)
+        flips = int(((shadow >= self.high_risk_threshold) != (primary >= self.high_risk_threshold)).sum())
+        with self._lock:
+            self.rows += len(diff)
+            self.abs_diff_sum += float(diff.sum())
+            self.max_abs_diff = max(self.max_abs_diff, float(diff.max(initial=0.0)))
+            self.risk_flips += flips
+            self._pending -= 1
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Wait until queued shadow work has finished (for tests and shutdown)."""
+        deadline = time.monotonic() + timeout
+        while self._pending and time.monotonic() < deadline:
+            time.sleep(0.005)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "rows": self.rows,
+                "dropped": self.dropped,
+                "errors": self.errors,
+                "mean_abs_diff": self.abs_diff_sum / self.rows if self.rows else 0.0,
+                "max_abs_diff": self.max_abs_diff,
+                "high_risk_flips": self.risk_flips,
+            }
@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Mapping, Sequence
+
+import numpy as np
+
+from api.model_registry import ModelVersion
+
+_ENTRY_OVERHEAD = 160  # OrderedDict node, key tuple and expiry record
+
+
+def parse_precision(spec: str) -> dict[str, int]:
+    """``"torque=1,tool_wear=0"`` -> ``{"torque": 1, "tool_wear": 0}`` (decimal places per feature)."""
+    out = {}
+    for part in spec.split(","):
+        if part.strip():
+            name, _, decimals = part.partition("=")
+            out[name.strip()] = int(decimals)
+    return out
+
+
+def _approx_size(value: Any) -> int:
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_approx_size(k) + _approx_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_approx_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    """Bounded LRU cache of per-row model results, keyed by model version and the quantized input vector.
+
+    Each input is rounded to ``decimals`` places (``precision`` overrides it per
+    column), so readings that differ only below that precision share an entry.
+    Entries expire after ``ttl_seconds`` and the least recently used are evicted
+    once their approximate size passes ``max_bytes``. A version whose artifact
+    is reloaded (a new ``loaded_at``) drops its entries, so results never
+    outlive the model that produced them.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 64 << 20,
+        ttl_seconds: float = 300.0,
+        decimals: int = 2,
+        precision: Mapping[str, int] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.ttl = ttl_seconds
+        self.decimals = decimals
+        self.precision = dict(precision or {})
+        self.clock = clock
+        self.bytes = 0
+        self.hits: dict[str, int] = {}
+        self.misses: dict[str, int] = {}
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self._entries: OrderedDict[tuple, tuple[float, int, Any]] = OrderedDict()
+        self._generations: dict[str, float] = {}
+        self._scales: dict[tuple[str, ...], np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def row_keys(self, inputs: Mapping[str, Any]) -> list[bytes | None]:
+        """One key per row of ``{column: values}``: the quantized row as bytes (None where a value is not finite)."""
+        columns = tuple(inputs)
+        scale = self._scales.get(columns)
+        if scale is None:
+            scale = self._scales[columns] = 10.0 ** np.array([self.precision.get(c, self.decimals) for c in columns])
+        q = np.rint(np.column_stack([np.asarray(inputs[c], dtype=np.float64) for c in columns]) * scale)
+        finite = np.isfinite(q).all(axis=1)
+        q = np.ascontiguousarray(np.where(finite[:, None], q, 0).astype(np.int64))
+        return [row.tobytes() if ok else None for row, ok in zip(q, finite)]
+
+    def _current(self, entry: ModelVersion) -> bool:
+        """Whether ``entry`` is the newest load of its version; a newer load drops the older one's entries."""
+        seen = self._generations.get(entry.version)
+        if seen == entry.loaded_at:
+            return True
+        if seen is not None and entry.loaded_at < seen:
+            return False
+        self._generations[entry.version] = entry.loaded_at
+        if seen is not None:
+            stale = [key for key in self._entries if key[0] == entry.version]
+            for key in stale:
+                self.bytes -= self._entries.pop(key)[1]
+            self.invalidations += len(stale)
+        return True
+
+    def get_many(self, entry: ModelVersion, kind: str, keys: Sequence[bytes | None]) -> list[Any]:
+        """Cached values for ``keys`` (None where missing or expired), marking hits as recently used."""
+        now = self.clock()
+        out: list[Any] = [None] * len(keys)
+        with self._lock:
+            usable = self._current(entry)
+            for i, row in enumerate(keys):
+                if not usable or row is None:
+                    continue
+                key = (entry.version, kind, row)
+                found = self._entries.get(key)
+                if found is None:
+                    continue
+                if found[0] <= now:
+                    self.bytes -= self._entries.pop(key)[1]
+                    self.expirations += 1
+                    continue
+                self._entries.move_to_end(key)
+                out[i] = found[2]
+            hits = sum(v is not None for v in out)
+            self.hits[kind] = self.hits.get(kind, 0) + hits
+            self.misses[kind] = self.misses.get(kind, 0) + len(keys) - hits
+        return out
+
+    def put_many(self, entry: ModelVersion, kind: str, keys: Sequence[bytes | None], values: Sequence[Any]) -> None:
+        expires = self.clock() + self.ttl
+        with self._lock:
+            if not self._current(entry):
+                return
+            for row, value in zip(keys, values):
+                if row is None:
+                    continue
+                key = (entry.version, kind, row)
+                size = len(row) + _approx_size(value) + _ENTRY_OVERHEAD
+                old = self._entries.pop(key, None)
+                if old is not None:
+                    self.bytes -= old[1]
+                self._entries[key] = (expires, size, value)
+                self.bytes += size
+            while self.bytes > self.max_bytes and self._entries:
+                self.bytes -= self._entries.popitem(last=False)[1][1]
+                self.evictions += 1
+
+    def get_or_compute(
+        self, entry: ModelVersion, kind: str, inputs: Mapping[str, Any], compute: Callable[[list[int]], Sequence[Any]]
+    ) -> list[Any]:
+        """Per-row results for ``inputs``; ``compute(positions)`` is called once, for the rows not cached.
+
+        Rows that share a key within ``inputs`` are computed once.
+        """
+        keys = self.row_keys(inputs)
+        values = self.get_many(entry, kind, keys)
+        first: dict[bytes | int, int] = {}
+        for i, value in enumerate(values):
+            if value is None:
+                first.setdefault(keys[i] if keys[i] is not None else -1 - i, i)
+        if first:
+            positions = list(first.values())
+            computed = list(compute(positions))
+            for i, value in zip(positions, computed):
+                values[i] = value
+            for i, value in enumerate(values):
+                if value is None:
+                    values[i] = values[first[keys[i]]]
+            self.put_many(entry, kind, [keys[i] for i in positions], computed)
+        return values
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "hits": dict(self.hits),
+            "misses": dict(self.misses),
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+    def prometheus_lines(self, prefix: str = "gpm") -> list[str]:
+        name = f"{prefix}_result_cache"
+        lines = [
+            f"# HELP {name}_entries Cached per-row results.",
+            f"# TYPE {name}_entries gauge",
+            f"{name}_entries {len(self._entries)}",
+            f"# HELP {name}_bytes Approximate memory held by cached results.",
+            f"# TYPE {name}_bytes gauge",
+            f"{name}_bytes {self.bytes}",
+        ]
+        for metric, counts, help_text in (
+            ("hits", self.hits, "Rows answered from the cache."),
+            ("misses", self.misses, "Rows the model had to compute."),
+        ):
+            lines += [f"# HELP {name}_{metric}_total {help_text}", f"# TYPE {name}_{metric}_total counter"]
+            lines += [f'{name}_{metric}_total{{kind="{kind}"}} {count}' for kind, count in sorted(counts.items())]
+        for metric, value, help_text in (
+            ("evictions", self.evictions, "Entries evicted to stay under the memory cap."),
+            ("expirations", self.expirations, "Entries found past their TTL."),
+            ("invalidations", self.invalidations, "Entries dropped because their model version was reloaded."),
+        ):
+            lines += [f"# HELP {name}_{metric}_total {help_text}", f"# TYPE {name}_{metric}_total counter"]
+            lines.append(f"{name}_{metric}_total {value}")
+        return lines
@@ -1,4 +1,6 @@
-from pydantic import BaseModel, Field
+from typing import Annotated
+
+from pydantic import BaseModel, Field, model_validator
 
 
 class PredictionRequest(BaseModel):
@@ -7,8 +9,41 @@ class PredictionRequest(BaseModel):
     rotational_speed: float = Field(..., gt=0)
     torque: float = Field(..., gt=0)
     tool_wear: float = Field(..., ge=0)
+    asset_id: str | None = None
 
 
 class PredictionResponse(BaseModel):
     failure_probability: float
     risk_level: str
+    horizons: list[int] | None = None
+    survival_risk: list[float] | None = None
+
+
+_Positive = Annotated[float, Field(gt=0)]
+_NonNegative = Annotated[float, Field(ge=0)]
+
+
+class ColumnarPredictionRequest(BaseModel):
+    """Column-oriented batch body: one equal-length list per sensor field."""
+
+    air_temperature: list[_Positive]
+    process_temperature: list[_Positive]
+    rotational_speed: list[_Positive]
+    torque: list[_Positive]
+    tool_wear: list[_NonNegative]
+    asset_id: list[str | None] | None = None
+
+    @model_validator(mode="after")
+    def _check_lengths(self) -> "ColumnarPredictionRequest":
+        lengths = {len(v) for v in (getattr(self, name) for name in type(self).model_fields) if v is not None}
+        if len(lengths) > 1:
+            raise ValueError("all columns must have the same length")
+        return self
+
+
+class BatchPredictionResponse(BaseModel):
+    count: int
+    failure_probability: list[float]
+    risk_level: list[str]
+    horizons: list[int] | None = None
+    survival_risk: list[list[float]] | None = None
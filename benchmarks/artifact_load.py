@@ -0,0 +1,69 @@
+"""Compare loading the legacy joblib pickle with the directory artifact.
+
+Usage: python -m benchmarks.artifact_load --rows 20000 --repeats 5
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.modeling.artifact import load_artifact
+from src.modeling.train_xgboost import train_xgboost
+
+
+def _synthetic_csv(path: Path, rows: int, seed: int = 0) -> None:
+    rng = np.random.default_rng(seed)
+    torque = rng.normal(40, 10, rows)
+    wear = rng.uniform(0, 250, rows)
+    pd.DataFrame(
+        {
+            "air_temperature": rng.normal(300, 2, rows),
+            "process_temperature": rng.normal(310, 1.5, rows),
+            "rotational_speed": rng.normal(1500, 50, rows),
+            "torque": torque,
+            "tool_wear": wear,
+            "failure": ((torque > 52) & (wear > 180)).astype(int),
+        }
+    ).to_csv(path, index=False)
+
+
+def _best_of(fn, repeats: int) -> float:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def run(rows: int, repeats: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = Path(tmp) / "fleet.csv"
+        model_path = Path(tmp) / "model.pkl"
+        _synthetic_csv(data_path, rows)
+        train_xgboost(str(data_path), str(model_path))
+
+        return {
+            "pickle_full_load_s": _best_of(lambda: joblib.load(model_path), repeats),
+            "artifact_metadata_s": _best_of(lambda: load_artifact(model_path)["metrics"], repeats),
+            "artifact_full_load_s": _best_of(lambda: load_artifact(model_path)["model"], repeats),
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    for key, value in run(args.rows, args.repeats).items():
+        print(f"{key:>22}: {value * 1000:,.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
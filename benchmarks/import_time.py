@@ -0,0 +1,100 @@
+"""Cold-start import budget for the API and CLI entry points, measured with ``python -X importtime``.
+
+An entry point fails when it imports one of the heavy ML libraries that should
+only load on first use, or when its total import time exceeds its budget.
+Budgets are in milliseconds on the reference machine; ``IMPORT_BUDGET_SCALE``
+stretches them on slower hardware.
+
+Usage:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --entry api --top 15
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+# only loaded when a request or command actually needs them
+DEFERRED = ("xgboost", "shap", "sklearn", "scipy", "mlflow", "joblib", "torch", "matplotlib")
+
+
+@dataclass(frozen=True)
+class EntryPoint:
+    args: tuple[str, ...]
+    budget_ms: float
+
+
+ENTRY_POINTS: dict[str, EntryPoint] = {
+    "api": EntryPoint(("-c", "import api.app"), 1000.0),
+    "pipeline": EntryPoint(("-c", "import src.pipeline"), 600.0),
+    "train_cli": EntryPoint(("-m", "src.modeling.train_xgboost", "--help"), 600.0),
+    "scoring_cli": EntryPoint(("-m", "src.scoring", "--help"), 600.0),
+}
+
+
+def import_profile(args: tuple[str, ...] | list[str]) -> dict[str, tuple[int, int]]:
+    """``{module: (self_us, cumulative_us)}`` from one fresh interpreter running ``args``."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *args], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    )
+    profile = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        own, cumulative, name = line[len("import time:") :].split("|")
+        if own.strip().isdigit():
+            profile[name.strip()] = (int(own), int(cumulative))
+    return profile
+
+
+def total_ms(profile: dict[str, tuple[int, int]]) -> float:
+    """Import time of the whole run: the sum of every module's own time."""
+    return sum(own for own, _ in profile.values()) / 1000.0
+
+
+def deferred_imports(profile: dict[str, tuple[int, int]]) -> list[str]:
+    return sorted({name.split(".")[0] for name in profile} & set(DEFERRED))
+
+
+def check(name: str, repeats: int = 3) -> list[str]:
+    """Budget violations for one entry point; the fastest of ``repeats`` runs is compared."""
+    entry = ENTRY_POINTS[name]
+    profiles = [import_profile(entry.args) for _ in range(repeats)]
+    problems = [f"{name}: imports {module} at startup" for module in deferred_imports(profiles[0])]
+    budget = entry.budget_ms * float(os.getenv("IMPORT_BUDGET_SCALE", "1"))
+    best = min(total_ms(p) for p in profiles)
+    if best > budget:
+        problems.append(f"{name}: {best:.0f} ms of imports exceeds the {budget:.0f} ms budget")
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entry", default=",".join(ENTRY_POINTS), help="comma-separated entry points")
+    parser.add_argument("--top", type=int, default=10, help="heaviest top-level packages to list")
+    args = parser.parse_args()
+
+    failed = False
+    for name in [e for e in args.entry.split(",") if e]:
+        profile = import_profile(ENTRY_POINTS[name].args)
+        packages: dict[str, int] = {}
+        for module, (own, _) in profile.items():
+            packages[module.split(".")[0]] = packages.get(module.split(".")[0], 0) + own
+        heaviest = sorted(packages.items(), key=lambda kv: -kv[1])[: args.top]
+        print(f"{name}: {total_ms(profile):.0f} ms (budget {ENTRY_POINTS[name].budget_ms:.0f} ms)")
+        for package, own in heaviest:
+            print(f"  {package:<24} {own / 1000:8.1f} ms")
+        for problem in check(name):
+            print(f"BUDGET {problem}")
+            failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
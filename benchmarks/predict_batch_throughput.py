@@ -0,0 +1,65 @@
+"""Compare N single ``/predict`` calls against one ``/predict_batch`` call.
+
+Usage: python -m benchmarks.predict_batch_throughput --rows 2000
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from api.app import app
+
+
+def _synthetic_records(n: int, seed: int = 0) -> list[dict]:
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "air_temperature": float(rng.normal(300, 2)),
+            "process_temperature": float(rng.normal(310, 1.5)),
+            "rotational_speed": float(rng.normal(1500, 50)),
+            "torque": float(abs(rng.normal(40, 10)) + 1),
+            "tool_wear": float(rng.uniform(0, 250)),
+        }
+        for _ in range(n)
+    ]
+
+
+def run(rows: int) -> dict:
+    client = TestClient(app)
+    records = _synthetic_records(rows)
+    client.post("/predict", json=records[0])  # warm model cache
+
+    start = time.perf_counter()
+    for record in records:
+        client.post("/predict", json=record)
+    single_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    response = client.post("/predict_batch", json=records)
+    batch_s = time.perf_counter() - start
+    response.raise_for_status()
+
+    return {
+        "rows": rows,
+        "single_seconds": single_s,
+        "single_rows_per_s": rows / single_s,
+        "batch_seconds": batch_s,
+        "batch_rows_per_s": rows / batch_s,
+        "speedup": single_s / batch_s,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2000)
+    args = parser.parse_args()
+    result = run(args.rows)
+    for key, value in result.items():
+        print(f"{key:>18}: {value:,.3f}" if isinstance(value, float) else f"{key:>18}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+"""End-to-end performance suite with a regression gate against a committed baseline.
+
+Each case runs at several dataset sizes, built by scaling up ``ai4i2020.csv``,
+in its own subprocess so peak RSS belongs to that case alone. Results go to
+``reports/benchmarks/results.json``; the run fails when a case is slower or
+larger than ``reports/benchmarks/baseline.json`` by more than ``--threshold``.
+
+Usage:
+    python -m benchmarks.suite --sizes 10000,1000000
+    python -m benchmarks.suite --cases build_features,predict --update-baseline
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+SOURCE_CSV = Path("data/raw/ai4i2020.csv")
+SCALED_DIR = Path("data/processed/bench")
+REPORT_DIR = Path("reports/benchmarks")
+RESULTS_PATH = REPORT_DIR / "results.json"
+BASELINE_PATH = REPORT_DIR / "baseline.json"
+DEFAULT_SIZES = (10_000, 1_000_000, 10_000_000)
+DEFAULT_THRESHOLD = 0.25
+# timings below this are dominated by noise; a regression must also exceed it in absolute terms
+MIN_SECONDS = 0.005
+_SENSOR_JITTER = {
+    "air_temperature": 0.5,
+    "process_temperature": 0.5,
+    "rotational_speed": 10.0,
+    "torque": 1.0,
+    "tool_wear": 2.0,
+}
+_WRITE_BLOCK = 1_000_000
+
+
+def scaled_dataset(rows: int, out_dir: Path = SCALED_DIR, seed: int = 0) -> Path:
+    """A ``rows``-row copy of the sample CSV with jittered sensor readings, written once per size."""
+    out = Path(out_dir) / f"ai4i2020_{rows}.csv"
+    if out.exists():
+        return out
+    out.parent.mkdir(parents=True, exist_ok=True)
+    source = pd.read_csv(SOURCE_CSV)
+    rng = np.random.default_rng(seed)
+    tmp = out.with_suffix(".tmp")
+    # written in blocks so the 10M-row copy never sits in memory at once
+    for start in range(0, rows, _WRITE_BLOCK):
+        n = min(_WRITE_BLOCK, rows - start)
+        block = source.iloc[np.arange(start, start + n) % len(source)].reset_index(drop=True)
+        for column, scale in _SENSOR_JITTER.items():
+            if column in block:
+                block[column] = block[column] + rng.normal(0.0, scale, n)
+        block["tool_wear"] = block["tool_wear"].clip(lower=0)
+        block.to_csv(tmp, mode="a" if start else "w", header=start == 0, index=False)
+    tmp.replace(out)
+    return out
+
+
+def _percentile(times: list[float], q: float) -> float:
+    return float(np.percentile(times, q)) if times else 0.0
+
+
+@dataclass(frozen=True)
+class _Case:
+    """``setup(rows, workdir)`` builds the untimed inputs and returns the call to time."""
+
+    setup: Callable[[int, Path], Callable[[], object]]
+    max_rows: int | None = None
+    per_request: bool = False
+
+
+def _load_setup(rows: int, workdir: Path) -> Callable[[], object]:
+    from src.data_loader import load_dataset
+
+    path = str(scaled_dataset(rows))
+    return lambda: load_dataset(path)
+
+
+def _preprocess_setup(rows: int, workdir: Path) -> Callable[[], object]:
+    from src.data_loader import load_dataset
+    from src.preprocessing import preprocess
+
+    df = load_dataset(str(scaled_dataset(rows)))
+    return lambda: preprocess(df)
+
+
+def _features_setup(rows: int, workdir: Path) -> Callable[[], object]:
+    from src.data_loader import load_dataset
+    from src.feature_engineering import build_features
+    from src.preprocessing import preprocess
+
+    df = preprocess(load_dataset(str(scaled_dataset(rows))))
+    return lambda: build_features(df)
+
+
+def _transform_setup(rows: int, workdir: Path) -> Callable[[], object]:
+    from src.data_loader import load_dataset
+    from src.feature_engineering import FeatureTransformer
+
+    df = load_dataset(str(scaled_dataset(rows)))
+    return lambda: FeatureTransformer.fit(df).transform(df)
+
+
+def _train_setup(rows: int, workdir: Path) -> Callable[[], object]:
+    from src.modeling.train_xgboost import train_xgboost
+
+    path = str(scaled_dataset(rows))
+    return lambda: train_xgboost(path, str(workdir / "model.pkl"))
+
+
+def _trained(rows: int, workdir: Path) -> tuple[object, pd.DataFrame]:
+    from src.data_loader import load_dataset
+    from src.feature_engineering import FEATURE_COLUMNS, build_features
+    from src.modeling.artifact import load_artifact
+    from src.modeling.train_xgboost import train_xgboost
+    from src.preprocessing import preprocess
+
+    path = str(scaled_dataset(rows))
+    model_path = workdir / "model.pkl"
+    train_xgboost(path, str(model_path))
+    X = build_features(preprocess(load_dataset(path)))[FEATURE_COLUMNS]
+    return load_artifact(model_path)["model"], X
+
+
+def _shap_setup(rows: int, workdir: Path) -> Callable[[], object]:
+    from src.explainability.shap_analysis import compute_shap_summary
+
+    model, X = _trained(rows, workdir)
+    return lambda: compute_shap_summary(model, X)
+
+
+def _drift_setup(rows: int, workdir: Path) -> Callable[[], object]:
+    from monitoring.drift_detection import ks_drift_report
+    from src.data_loader import load_dataset
+    from src.feature_engineering import build_features
+    from src.preprocessing import preprocess
+
+    feats = build_features(preprocess(load_dataset(str(scaled_dataset(rows)))))
+    half = len(feats) // 2
+    reference, current = feats.iloc[:half], feats.iloc[half:]
+    return lambda: ks_drift_report(reference, current)
+
+
+def _endpoint_setup(route: str) -> Callable[[int, Path], Callable[[], object]]:
+    def setup(rows: int, workdir: Path) -> Callable[[], object]:
+        from fastapi.testclient import TestClient
+
+        from api import app as app_module
+        from api.model_registry import ModelRegistry
+        from src.modeling.train_xgboost import train_xgboost
+
+        model_path = workdir / "model.pkl"
+        train_xgboost(str(scaled_dataset(10_000)), str(model_path))
+        app_module.REGISTRY = ModelRegistry(model_path, poll_seconds=0)
+        client = TestClient(app_module.app)
+        record = pd.read_csv(SOURCE_CSV).drop(columns="failure").iloc[0].to_dict()
+        client.post(route, json=record).raise_for_status()  # load the model and explainer
+
+        def call() -> object:
+            response = client.post(route, json=record)
+            response.raise_for_status()
+            return response
+
+        return call
+
+    return setup
+
+
+CASES: dict[str, _Case] = {
+    "load_dataset": _Case(_load_setup),
+    "preprocess": _Case(_preprocess_setup),
+    "build_features": _Case(_features_setup),
+    "feature_transform": _Case(_transform_setup),
+    "train_xgboost": _Case(_train_setup, max_rows=1_000_000),
+    "compute_shap_summary": _Case(_shap_setup, max_rows=100_000),
+    "ks_drift_report": _Case(_drift_setup),
+    "predict": _Case(_endpoint_setup("/predict"), per_request=True),
+    "predict_with_explanation": _Case(_endpoint_setup("/predict_with_explanation"), per_request=True),
+}
+
+
+def run_case(name: str, rows: int, repeats: int, requests: int) -> dict:
+    """Time one case in this process. Peak RSS is this process's high-water mark, inputs included."""
+    case = CASES[name]
+    with tempfile.TemporaryDirectory() as tmp:
+        call = case.setup(rows, Path(tmp))
+        n_calls = requests if case.per_request else repeats
+        times = []
+        for _ in range(n_calls):
+            start = time.perf_counter()
+            call()
+            times.append(time.perf_counter() - start)
+
+    # per-request cases report request throughput; data cases report rows per median call
+    wall = float(sum(times)) if case.per_request else _percentile(times, 50)
+    processed = n_calls if case.per_request else rows
+    return {
+        "case": name,
+        "rows": processed,
+        "calls": n_calls,
+        "wall_s": wall,
+        "p50_s": _percentile(times, 50),
+        "p99_s": _percentile(times, 99),
+        "rows_per_s": processed / wall if wall > 0 else 0.0,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,
+    }
+
+
+def _run_isolated(name: str, rows: int, repeats: int, requests: int) -> dict:
+    cmd = [sys.executable, "-m", "benchmarks.suite", "--child", name, str(rows), str(repeats), str(requests)]
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode != 0:
+        return {"case": name, "rows": rows, "error": proc.stderr.strip().splitlines()[-1:] or ["failed"]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _key(result: dict) -> str:
+    return f"{result['case']}@{result['rows']}"
+
+
+def run_suite(
+    cases: list[str] | None = None, sizes: tuple[int, ...] = DEFAULT_SIZES, repeats: int = 3, requests: int = 200
+) -> list[dict]:
+    results = []
+    for name in cases or list(CASES):
+        case = CASES[name]
+        # per-request cases do not scale with the dataset and run once
+        for rows in (sizes[:1] if case.per_request else sizes):
+            if case.max_rows is not None and rows > case.max_rows:
+                continue
+            result = _run_isolated(name, rows, repeats, requests)
+            results.append(result)
+            print(json.dumps(result), flush=True)
+    return results
+
+
+def compare(results: list[dict], baseline: list[dict], threshold: float = DEFAULT_THRESHOLD) -> list[str]:
+    """Human-readable regressions of ``results`` against ``baseline``; cases missing from either side are ignored."""
+    previous = {_key(r): r for r in baseline if "error" not in r}
+    regressions = []
+    for result in results:
+        if "error" in result:
+            regressions.append(f"{result['case']}@{result['rows']}: failed ({result['error']})")
+            continue
+        base = previous.get(_key(result))
+        if base is None:
+            continue
+        for metric in ("wall_s", "p99_s", "peak_rss_mb"):
+            old, new = base[metric], result[metric]
+            slack = MIN_SECONDS if metric.endswith("_s") else 0.0
+            if new > old * (1 + threshold) and new - old > slack:
+                regressions.append(f"{_key(result)}: {metric} {old:.4g} -> {new:.4g} (+{(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+def _write(path: Path, results: list[dict]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "created_at": time.time(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    path.write_text(json.dumps(payload, indent=2))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cases", default=",".join(CASES), help="comma-separated case names")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="comma-separated row counts")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint case")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed relative slowdown")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH))
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--child", nargs=4, metavar=("CASE", "ROWS", "REPEATS", "REQUESTS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        name, rows, repeats, requests = args.child
+        print(json.dumps(run_case(name, int(rows), int(repeats), int(requests))))
+        return
+
+    cases = [c for c in args.cases.split(",") if c]
+    unknown = sorted(set(cases) - set(CASES))
+    if unknown:
+        parser.error(f"unknown cases {unknown}; choose from {sorted(CASES)}")
+    sizes = tuple(int(s) for s in args.sizes.split(",") if s)
+    results = run_suite(cases, sizes, repeats=args.repeats, requests=args.requests)
+    _write(RESULTS_PATH, results)
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        _write(baseline_path, results)
+        print(f"Baseline written to {baseline_path}")
+        return
+    if not baseline_path.exists():
+        print(f"No baseline at {baseline_path}; run with --update-baseline to create one")
+        return
+    regressions = compare(results, json.loads(baseline_path.read_text())["results"], args.threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if regressions:
+        sys.exit(1)
+    print(f"No regressions beyond {args.threshold:.0%} against {baseline_path}")
+
+
+if __name__ == "__main__":
+    main()
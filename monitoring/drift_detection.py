@@ -3,7 +3,6 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Dict
 import pandas as pd
-from scipy.stats import ks_2samp
 
 
 @dataclass
@@ -14,6 +13,8 @@ class DriftResult:
 
 
 def ks_drift_report(reference: pd.DataFrame, current: pd.DataFrame, alpha: float = 0.05) -> Dict[str, DriftResult]:
+    from scipy.stats import ks_2samp
+
     report: Dict[str, DriftResult] = {}
     numeric_features = [c for c in reference.columns if c in current.columns and reference[c].dtype.kind in {"i", "f"}]
     for feature in numeric_features:
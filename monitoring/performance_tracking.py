@@ -1,6 +1,14 @@
 from __future__ import annotations
 
+import threading
+import time
 from dataclasses import dataclass
+from typing import Callable, Generic, Iterable, TypeVar
+
+import numpy as np
+
+PROBABILITY_BINS = 20
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
 
 
 @dataclass
@@ -11,10 +19,276 @@ class PredictionStats:
 
 
 def summarize_predictions(probabilities, high_risk_threshold: float = 0.75) -> PredictionStats:
-    probs = list(probabilities)
-    if not probs:
+    probs = np.asarray(probabilities if hasattr(probabilities, "__len__") else list(probabilities), dtype=float)
+    if probs.size == 0:
         return PredictionStats(0.0, 0.0, 0.0)
-    mean = sum(probs) / len(probs)
-    var = sum((p - mean) ** 2 for p in probs) / len(probs)
-    high_rate = sum(p >= high_risk_threshold for p in probs) / len(probs)
-    return PredictionStats(mean, var ** 0.5, high_rate)
+    return PredictionStats(float(probs.mean()), float(probs.std()), float(np.mean(probs >= high_risk_threshold)))
+
+
+class PredictionAccumulator:
+    """Welford mean/variance, a high-risk count and a fixed-bin histogram of probabilities.
+
+    Batches are folded in with the parallel (Chan et al.) update, and two
+    accumulators merge the same way, so per-thread or per-worker partials combine exactly.
+    """
+
+    def __init__(self, high_risk_threshold: float = 0.75, n_bins: int = PROBABILITY_BINS) -> None:
+        self.high_risk_threshold = high_risk_threshold
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.high_risk = 0
+        self.histogram = np.zeros(n_bins, dtype=np.int64)
+
+    def _combine(self, count: int, mean: float, m2: float, high_risk: int, histogram: np.ndarray) -> None:
+        total = self.count + count
+        if count == 0:
+            return
+        delta = mean - self.mean
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.mean += delta * count / total
+        self.count = total
+        self.high_risk += high_risk
+        self.histogram += histogram
+
+    def update(self, probabilities) -> None:
+        probs = np.asarray(probabilities, dtype=np.float64).ravel()
+        if probs.size == 0:
+            return
+        n_bins = len(self.histogram)
+        bins = np.clip((probs * n_bins).astype(np.int64), 0, n_bins - 1)
+        mean = float(probs.mean())
+        self._combine(
+            probs.size,
+            mean,
+            float(np.square(probs - mean).sum()),
+            int((probs >= self.high_risk_threshold).sum()),
+            np.bincount(bins, minlength=n_bins),
+        )
+
+    def merge(self, other: PredictionAccumulator) -> PredictionAccumulator:
+        if len(other.histogram) != len(self.histogram) or other.high_risk_threshold != self.high_risk_threshold:
+            raise ValueError("Accumulators use different bins or thresholds and cannot be merged")
+        self._combine(other.count, other.mean, other.m2, other.high_risk, other.histogram)
+        return self
+
+    def stats(self) -> PredictionStats:
+        if self.count == 0:
+            return PredictionStats(0.0, 0.0, 0.0)
+        return PredictionStats(self.mean, (self.m2 / self.count) ** 0.5, self.high_risk / self.count)
+
+    def to_dict(self) -> dict:
+        return {
+            "high_risk_threshold": self.high_risk_threshold,
+            "count": self.count,
+            "mean": self.mean,
+            "m2": self.m2,
+            "high_risk": self.high_risk,
+            "histogram": self.histogram.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, payload: dict) -> PredictionAccumulator:
+        acc = cls(payload["high_risk_threshold"], len(payload["histogram"]))
+        acc._combine(
+            payload["count"], payload["mean"], payload["m2"], payload["high_risk"], np.asarray(payload["histogram"])
+        )
+        return acc
+
+
+T = TypeVar("T")
+
+
+class _ThreadShards(Generic[T]):
+    """One private ``T`` per writer thread; only first use from a thread takes the lock."""
+
+    def __init__(self, factory: Callable[[], T]) -> None:
+        self._factory = factory
+        self._local = threading.local()
+        self._shards: list[T] = []
+        self._lock = threading.Lock()
+
+    def local(self) -> T:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._factory()
+            with self._lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+        return shard
+
+    def all(self) -> list[T]:
+        with self._lock:
+            return list(self._shards)
+
+
+class _TrackerShard:
+    def __init__(self, high_risk_threshold: float, n_bins: int) -> None:
+        self.total = PredictionAccumulator(high_risk_threshold, n_bins)
+        self.buckets: dict[int, PredictionAccumulator] = {}
+
+
+class PredictionTracker:
+    """Prediction statistics over the service lifetime and over recent time buckets.
+
+    Each request thread writes to its own shard, so concurrent updates never
+    contend on a lock; readers merge the shards. A read that races a write may
+    see that one batch partially applied; shard state itself is only ever
+    written by its owning thread. Only the latest ``n_buckets`` buckets of
+    ``bucket_seconds`` are kept.
+    """
+
+    def __init__(
+        self,
+        high_risk_threshold: float = 0.75,
+        bucket_seconds: float = 60.0,
+        n_buckets: int = 15,
+        n_bins: int = PROBABILITY_BINS,
+    ) -> None:
+        self.high_risk_threshold = high_risk_threshold
+        self.bucket_seconds = bucket_seconds
+        self.n_buckets = n_buckets
+        self.n_bins = n_bins
+        self._shards: _ThreadShards[_TrackerShard] = _ThreadShards(lambda: _TrackerShard(high_risk_threshold, n_bins))
+
+    def _empty(self) -> PredictionAccumulator:
+        return PredictionAccumulator(self.high_risk_threshold, self.n_bins)
+
+    def update(self, probabilities, now: float | None = None) -> None:
+        epoch = int((time.time() if now is None else now) // self.bucket_seconds)
+        shard = self._shards.local()
+        bucket = shard.buckets.get(epoch)
+        if bucket is None:
+            bucket = shard.buckets[epoch] = self._empty()
+            for old in [e for e in shard.buckets if e <= epoch - self.n_buckets]:
+                del shard.buckets[old]
+        # summarize the batch once and fold it into both the bucket and the lifetime total
+        batch = self._empty()
+        batch.update(probabilities)
+        bucket.merge(batch)
+        shard.total.merge(batch)
+
+    def total(self) -> PredictionAccumulator:
+        merged = self._empty()
+        for shard in self._shards.all():
+            merged.merge(shard.total)
+        return merged
+
+    def window(self, seconds: float | None = None, now: float | None = None) -> PredictionAccumulator:
+        """Merged stats of the buckets that overlap the last ``seconds`` (default: all kept buckets)."""
+        span = self.n_buckets if seconds is None else max(1, int(np.ceil(seconds / self.bucket_seconds)))
+        epoch = int((time.time() if now is None else now) // self.bucket_seconds)
+        merged = self._empty()
+        for shard in self._shards.all():
+            for bucket_epoch, bucket in list(shard.buckets.items()):
+                if epoch - span < bucket_epoch <= epoch:
+                    merged.merge(bucket)
+        return merged
+
+
+class LatencyHistogram:
+    """Latency histogram per key (a route, or a ``(route, phase)`` pair), sharded per thread like ``PredictionTracker``."""
+
+    def __init__(self, buckets: Iterable[float] = LATENCY_BUCKETS) -> None:
+        self.buckets = np.asarray(sorted(buckets), dtype=np.float64)
+        self._shards: _ThreadShards[dict] = _ThreadShards(dict)
+
+    def observe(self, key: str | tuple[str, ...], seconds: float) -> None:
+        shard = self._shards.local()
+        entry = shard.get(key)
+        if entry is None:
+            entry = shard[key] = [np.zeros(len(self.buckets) + 1, dtype=np.int64), 0.0]
+        entry[0][np.searchsorted(self.buckets, seconds)] += 1
+        entry[1] += seconds
+
+    def snapshot(self) -> dict:
+        """``key -> (per-bucket counts with a trailing +Inf bucket, total seconds)``."""
+        out: dict = {}
+        for shard in self._shards.all():
+            for key, (counts, total) in list(shard.items()):
+                prev_counts, prev_total = out.get(key, (0, 0.0))
+                out[key] = (counts + prev_counts, total + prev_total)
+        return out
+
+
+def _format_le(value: float) -> str:
+    return "+Inf" if np.isinf(value) else repr(float(value))
+
+
+def _histogram_lines(name: str, labels: str, edges: np.ndarray, counts: np.ndarray, total: float) -> list[str]:
+    cumulative = np.cumsum(counts)
+    sep = "," if labels else ""
+    lines = [
+        f'{name}_bucket{{{labels}{sep}le="{_format_le(edge)}"}} {int(c)}'
+        for edge, c in zip(np.append(edges, np.inf), cumulative)
+    ]
+    suffix = f"{{{labels}}}" if labels else ""
+    lines.append(f"{name}_sum{suffix} {total!r}")
+    lines.append(f"{name}_count{suffix} {int(cumulative[-1]) if len(cumulative) else 0}")
+    return lines
+
+
+def prometheus_text(
+    tracker: PredictionTracker,
+    latency: LatencyHistogram | None = None,
+    prefix: str = "gpm",
+    phases: LatencyHistogram | None = None,
+    extra: Iterable[str] = (),
+) -> str:
+    """Render tracker and latency state in the Prometheus text exposition format.
+
+    ``phases`` holds per-request span durations keyed by ``(route, phase)``. ``extra``
+    lines (already formatted) are appended, for metrics owned by other components.
+    """
+    total = tracker.total()
+    lines = [
+        f"# HELP {prefix}_predictions_total Predictions served.",
+        f"# TYPE {prefix}_predictions_total counter",
+        f"{prefix}_predictions_total {total.count}",
+        f"# HELP {prefix}_high_risk_predictions_total Predictions at or above the high-risk threshold.",
+        f"# TYPE {prefix}_high_risk_predictions_total counter",
+        f"{prefix}_high_risk_predictions_total {total.high_risk}",
+    ]
+
+    recent = tracker.window()
+    window_label = f'window="{int(tracker.bucket_seconds * tracker.n_buckets)}s"'
+    for name, help_text, attr in (
+        ("prediction_probability_mean", "Mean failure probability.", "mean_probability"),
+        ("prediction_probability_stddev", "Standard deviation of failure probability.", "std_probability"),
+        ("high_risk_rate", "Share of predictions at or above the high-risk threshold.", "high_risk_rate"),
+    ):
+        lines += [f"# HELP {prefix}_{name} {help_text}", f"# TYPE {prefix}_{name} gauge"]
+        lines.append(f'{prefix}_{name}{{window="lifetime"}} {getattr(total.stats(), attr)!r}')
+        lines.append(f"{prefix}_{name}{{{window_label}}} {getattr(recent.stats(), attr)!r}")
+
+    edges = np.arange(1, tracker.n_bins) / tracker.n_bins
+    lines += [
+        f"# HELP {prefix}_prediction_probability Distribution of failure probabilities.",
+        f"# TYPE {prefix}_prediction_probability histogram",
+    ]
+    lines += _histogram_lines(f"{prefix}_prediction_probability", "", edges, total.histogram, total.mean * total.count)
+
+    if latency is not None:
+        lines += [
+            f"# HELP {prefix}_http_request_duration_seconds Request latency by route.",
+            f"# TYPE {prefix}_http_request_duration_seconds histogram",
+        ]
+        for route, (counts, seconds) in sorted(latency.snapshot().items()):
+            lines += _histogram_lines(
+                f"{prefix}_http_request_duration_seconds", f'route="{route}"', latency.buckets, counts, seconds
+            )
+    if phases is not None:
+        lines += [
+            f"# HELP {prefix}_request_phase_duration_seconds Time spent in each phase of a request.",
+            f"# TYPE {prefix}_request_phase_duration_seconds histogram",
+        ]
+        for (route, phase), (counts, seconds) in sorted(phases.snapshot().items()):
+            lines += _histogram_lines(
+                f"{prefix}_request_phase_duration_seconds",
+                f'route="{route}",phase="{phase}"',
+                phases.buckets,
+                counts,
+                seconds,
+            )
+    lines += extra
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_BINS = 64
+_PSI_EPS = 1e-4
+# asymptotic two-sample KS critical values c(alpha), scaled by sqrt((n + m) / (n * m))
+_KS_CRITICAL = {0.1: 1.224, 0.05: 1.358, 0.01: 1.628, 0.001: 1.949}
+
+
+@dataclass
+class SketchDriftScore:
+    feature: str
+    ks: float
+    psi: float
+    wasserstein: float
+    drift_detected: bool
+
+
+class HistogramSketch:
+    """Fixed-width histograms of several features; memory is independent of the rows seen.
+
+    Each feature has ``bins`` equal-width bins between its edges plus an underflow
+    and an overflow bin. Sketches with the same edges merge by adding counts, so
+    partial sketches from separate workers or time slots combine exactly.
+    """
+
+    def __init__(self, features: list[str], lo: np.ndarray, width: np.ndarray, counts: np.ndarray) -> None:
+        self.features = list(features)
+        self.lo = np.asarray(lo, dtype=np.float64)
+        self.width = np.asarray(width, dtype=np.float64)
+        self.counts = np.asarray(counts, dtype=np.int64)
+        if self.counts.shape[0] != len(self.features) or self.counts.shape[1] < 3:
+            raise ValueError("counts must have one row per feature and at least one interior bin")
+
+    @property
+    def bins(self) -> int:
+        return self.counts.shape[1] - 2
+
+    @classmethod
+    def fit_edges(
+        cls, reference: pd.DataFrame, bins: int = DEFAULT_BINS, features: list[str] | None = None
+    ) -> HistogramSketch:
+        """Empty sketch whose edges span the 0.1%-99.9% range of ``reference``."""
+        features = list(features or reference.columns)
+        values = reference[features].to_numpy(dtype=np.float64)
+        lo, hi = np.nanquantile(values, [0.001, 0.999], axis=0)
+        span = np.where(hi > lo, hi - lo, np.maximum(np.abs(lo), 1.0))
+        return cls(features, lo, span / bins, np.zeros((len(features), bins + 2), dtype=np.int64))
+
+    @classmethod
+    def from_reference(
+        cls, reference: pd.DataFrame, bins: int = DEFAULT_BINS, features: list[str] | None = None
+    ) -> HistogramSketch:
+        sketch = cls.fit_edges(reference, bins=bins, features=features)
+        sketch.update(reference)
+        return sketch
+
+    def empty_like(self) -> HistogramSketch:
+        return HistogramSketch(self.features, self.lo, self.width, np.zeros_like(self.counts))
+
+    def bin_counts(self, values: pd.DataFrame | np.ndarray) -> np.ndarray:
+        """Per-feature bin counts of a batch, computed with a single ``bincount``."""
+        if isinstance(values, pd.DataFrame):
+            values = values[self.features].to_numpy(dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64).reshape(-1, len(self.features))
+        n_cells = self.counts.shape[1]
+        observed = ~np.isnan(values)  # NaN readings are not counted
+        idx = np.clip(np.floor((values - self.lo) / self.width) + 1, 0, n_cells - 1)
+        flat = np.where(observed, idx, 0).astype(np.int64) + np.arange(len(self.features)) * n_cells
+        flat = flat[observed]
+        return np.bincount(flat, minlength=self.counts.size).reshape(self.counts.shape)
+
+    def update(self, values: pd.DataFrame | np.ndarray) -> None:
+        self.counts += self.bin_counts(values)
+
+    def _check_compatible(self, other: HistogramSketch) -> None:
+        if (
+            self.features != other.features
+            or self.counts.shape != other.counts.shape
+            or not np.array_equal(self.lo, other.lo)
+            or not np.array_equal(self.width, other.width)
+        ):
+            raise ValueError("Sketches have different features or bin edges and cannot be combined")
+
+    def merge(self, other: HistogramSketch) -> HistogramSketch:
+        self._check_compatible(other)
+        self.counts += other.counts
+        return self
+
+    def quantile(self, q: float) -> np.ndarray:
+        """Per-feature ``q`` quantile, interpolated within its bin; under/overflow clamp to the outer edges."""
+        cum = np.cumsum(self.counts, axis=1)
+        target = q * cum[:, -1]
+        cell = np.array([np.searchsorted(row, t) for row, t in zip(cum, target)], dtype=np.int64)
+        cell = np.minimum(cell, self.counts.shape[1] - 1)
+        rows = np.arange(len(self.features))
+        below = np.where(cell > 0, cum[rows, np.maximum(cell - 1, 0)], 0)
+        frac = (target - below) / np.maximum(self.counts[rows, cell], 1)
+        return self.lo + np.clip(cell - 1 + frac, 0, self.bins) * self.width
+
+    @property
+    def count(self) -> int:
+        return int(self.counts[0].sum()) if len(self.features) else 0
+
+    def to_dict(self) -> dict:
+        return {
+            "features": self.features,
+            "lo": self.lo.tolist(),
+            "width": self.width.tolist(),
+            "counts": self.counts.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, payload: dict) -> HistogramSketch:
+        return cls(payload["features"], payload["lo"], payload["width"], np.asarray(payload["counts"], dtype=np.int64))
+
+    def save(self, path: str | Path) -> None:
+        out = Path(path)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(self.to_dict()))
+
+    @classmethod
+    def load(cls, path: str | Path) -> HistogramSketch:
+        return cls.from_dict(json.loads(Path(path).read_text()))
+
+
+def merge_sketches(sketches: Iterable[HistogramSketch]) -> HistogramSketch:
+    """Combine sketches from several workers into a new fleet-wide sketch."""
+    sketches = list(sketches)
+    if not sketches:
+        raise ValueError("No sketches to merge")
+    merged = sketches[0].empty_like()
+    for sketch in sketches:
+        merged.merge(sketch)
+    return merged
+
+
+def drift_reference_path(model_path: str | Path) -> Path:
+    """Location of the reference sketch written next to a model artifact."""
+    return Path(model_path).with_suffix(".drift.json")
+
+
+def drift_scores(
+    reference: HistogramSketch,
+    current: HistogramSketch,
+    alpha: float = 0.05,
+    psi_threshold: float = 0.2,
+) -> dict[str, SketchDriftScore]:
+    """KS, PSI and Wasserstein-1 distance per feature, computed for all features at once.
+
+    KS is evaluated at bin edges and Wasserstein treats each bin as its centre,
+    so both are accurate to one bin width.
+    """
+    reference._check_compatible(current)
+    n_ref = reference.counts.sum(axis=1)
+    n_cur = current.counts.sum(axis=1)
+    if not n_ref.any() or not n_cur.any():
+        return {}
+
+    p = reference.counts / np.maximum(n_ref, 1)[:, None]
+    q = current.counts / np.maximum(n_cur, 1)[:, None]
+    cdf_gap = np.abs(np.cumsum(p, axis=1) - np.cumsum(q, axis=1))
+    ks = cdf_gap.max(axis=1)
+    p_safe, q_safe = np.maximum(p, _PSI_EPS), np.maximum(q, _PSI_EPS)
+    psi = ((q_safe - p_safe) * np.log(q_safe / p_safe)).sum(axis=1)
+    wasserstein = cdf_gap[:, :-1].sum(axis=1) * reference.width
+
+    c_alpha = _KS_CRITICAL.get(alpha, float(np.sqrt(-0.5 * np.log(alpha / 2))))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ks_critical = np.where(n_ref * n_cur > 0, c_alpha * np.sqrt((n_ref + n_cur) / (n_ref * n_cur)), np.inf)
+    drifted = (ks > ks_critical) | (psi >= psi_threshold)
+    return {
+        f: SketchDriftScore(f, float(ks[i]), float(psi[i]), float(wasserstein[i]), bool(drifted[i]))
+        for i, f in enumerate(reference.features)
+    }
+
+
+class StreamingDriftMonitor:
+    """Windowed drift against a reference sketch, fed one scored batch at a time.
+
+    Traffic is counted into a ring of ``2 * slots_per_window`` time slots of
+    ``slot_seconds`` each, so memory stays fixed however many rows arrive. The
+    sliding window is the latest ``slots_per_window`` slots; the tumbling window
+    is the last completed wall-clock-aligned window, which lines up across workers.
+    """
+
+    def __init__(self, reference: HistogramSketch, slot_seconds: float = 10.0, slots_per_window: int = 6) -> None:
+        if slot_seconds <= 0 or slots_per_window < 1:
+            raise ValueError("slot_seconds must be > 0 and slots_per_window >= 1")
+        self.reference = reference
+        self.slot_seconds = float(slot_seconds)
+        self.slots_per_window = slots_per_window
+        ring = 2 * slots_per_window
+        self._counts = np.zeros((ring, *reference.counts.shape), dtype=np.int64)
+        self._epochs = np.full(ring, -1, dtype=np.int64)
+        self._lock = threading.Lock()
+
+    @property
+    def features(self) -> list[str]:
+        return self.reference.features
+
+    @property
+    def window_seconds(self) -> float:
+        return self.slot_seconds * self.slots_per_window
+
+    def _epoch(self, now: float | None) -> int:
+        return int((time.time() if now is None else now) // self.slot_seconds)
+
+    def update(self, values: pd.DataFrame | np.ndarray, now: float | None = None) -> None:
+        counts = self.reference.bin_counts(values)
+        epoch = self._epoch(now)
+        slot = epoch % len(self._epochs)
+        with self._lock:
+            if self._epochs[slot] > epoch:
+                return  # arrived after its slot was recycled; it falls outside every window
+            if self._epochs[slot] != epoch:
+                self._counts[slot] = 0
+                self._epochs[slot] = epoch
+            self._counts[slot] += counts
+
+    def window(self, kind: str = "sliding", now: float | None = None) -> tuple[HistogramSketch, float, float]:
+        """``(sketch, start, end)`` of the requested window, in epoch seconds."""
+        epoch = self._epoch(now)
+        if kind == "sliding":
+            first = epoch - self.slots_per_window + 1
+            last = epoch
+        elif kind == "tumbling":
+            first = (epoch // self.slots_per_window - 1) * self.slots_per_window
+            last = first + self.slots_per_window - 1
+        else:
+            raise ValueError(f"Unknown window kind {kind!r}; expected 'sliding' or 'tumbling'")
+
+        with self._lock:
+            mask = (self._epochs >= first) & (self._epochs <= last)
+            counts = self._counts[mask].sum(axis=0)
+        sketch = HistogramSketch(self.features, self.reference.lo, self.reference.width, counts)
+        return sketch, first * self.slot_seconds, (last + 1) * self.slot_seconds
+
+    def report(
+        self, kind: str = "sliding", now: float | None = None, alpha: float = 0.05, psi_threshold: float = 0.2
+    ) -> dict:
+        sketch, start, end = self.window(kind, now)
+        scores = drift_scores(self.reference, sketch, alpha=alpha, psi_threshold=psi_threshold)
+        return {
+            "window": kind,
+            "start": start,
+            "end": end,
+            "count": sketch.count,
+            "drift_detected": any(s.drift_detected for s in scores.values()),
+            "features": scores,
+        }
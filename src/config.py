@@ -8,7 +8,31 @@ class ProjectConfig:
     model_path: str = "models/xgboost_model.pkl"
     mlflow_experiment: str = "grid_predictive_maintenance"
     mlflow_tracking_uri: str = os.getenv("MLFLOW_TRACKING_URI", "file:./mlruns")
+    tracking_enabled: bool = os.getenv("TRACKING_ENABLED", "1").lower() in {"1", "true", "yes"}
+    tracking_fallback_dir: str = os.getenv("TRACKING_FALLBACK_DIR", "reports/tracking")
+    tracking_slow_seconds: float = float(os.getenv("TRACKING_SLOW_SECONDS", "5"))
+    tracking_flush_timeout: float = float(os.getenv("TRACKING_FLUSH_TIMEOUT", "10"))
+    pipeline_tracking: bool = os.getenv("PIPELINE_TRACKING", "0").lower() in {"1", "true", "yes"}
     random_state: int = 42
     test_size: float = 0.2
-    risk_threshold_high: float = 0.75
-    risk_threshold_medium: float = 0.4
+    risk_threshold_high: float = float(os.getenv("RISK_THRESHOLD_HIGH", "0.75"))
+    risk_threshold_medium: float = float(os.getenv("RISK_THRESHOLD_MEDIUM", "0.4"))
+    fn_cost: float = float(os.getenv("FN_COST", "10"))
+    fp_cost: float = float(os.getenv("FP_COST", "1"))
+    microbatch_enabled: bool = os.getenv("MICROBATCH_ENABLED", "0").lower() in {"1", "true", "yes"}
+    microbatch_max_size: int = int(os.getenv("MICROBATCH_MAX_SIZE", "64"))
+    microbatch_max_wait_ms: float = float(os.getenv("MICROBATCH_MAX_WAIT_MS", "2"))
+    feature_store_max_assets: int = int(os.getenv("FEATURE_STORE_MAX_ASSETS", "100000"))
+    model_versions_dir: str | None = os.getenv("MODEL_VERSIONS_DIR")
+    model_keep_versions: int = int(os.getenv("MODEL_KEEP_VERSIONS", "3"))
+    model_poll_seconds: float = float(os.getenv("MODEL_POLL_SECONDS", "5"))
+    shadow_model_version: str | None = os.getenv("SHADOW_MODEL_VERSION")
+    server_timing: bool = os.getenv("SERVER_TIMING", "1").lower() in {"1", "true", "yes"}
+    profile_slow_ms: float = float(os.getenv("PROFILE_SLOW_MS", "0"))
+    profile_dir: str = os.getenv("PROFILE_DIR", "reports/profiles")
+    result_cache_enabled: bool = os.getenv("RESULT_CACHE_ENABLED", "0").lower() in {"1", "true", "yes"}
+    result_cache_max_mb: float = float(os.getenv("RESULT_CACHE_MAX_MB", "64"))
+    result_cache_ttl_seconds: float = float(os.getenv("RESULT_CACHE_TTL_SECONDS", "300"))
+    result_cache_decimals: int = int(os.getenv("RESULT_CACHE_DECIMALS", "2"))
+    result_cache_precision: str = os.getenv("RESULT_CACHE_PRECISION", "")
+    warm_explainer: bool = os.getenv("WARM_EXPLAINER", "1").lower() in {"1", "true", "yes"}
@@ -1,6 +1,13 @@
 from __future__ import annotations
 
+import hashlib
+import json
+import os
+import shutil
 from pathlib import Path
+from typing import Iterator
+
+import numpy as np
 import pandas as pd
 
 REQUIRED_COLUMNS = [
@@ -11,30 +18,260 @@ REQUIRED_COLUMNS = [
     "tool_wear",
     "failure",
 ]
+OPTIONAL_COLUMNS = ["asset_id"]
+
+DEFAULT_CACHE_DIR = "data/processed/cache"
+DEFAULT_CHUNKSIZE = 250_000
+_CACHE_FORMAT_VERSION = 2
+_COLUMN_MAPPING = {
+    "Air temperature [K]": "air_temperature",
+    "Process temperature [K]": "process_temperature",
+    "Rotational speed [rpm]": "rotational_speed",
+    "Torque [Nm]": "torque",
+    "Tool wear [min]": "tool_wear",
+    "Machine failure": "failure",
+}
 
 
 def _normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
-    mapping = {
-        "Air temperature [K]": "air_temperature",
-        "Process temperature [K]": "process_temperature",
-        "Rotational speed [rpm]": "rotational_speed",
-        "Torque [Nm]": "torque",
-        "Tool wear [min]": "tool_wear",
-        "Machine failure": "failure",
-    }
-    return df.rename(columns={k: v for k, v in mapping.items() if k in df.columns})
+    return df.rename(columns={k: v for k, v in _COLUMN_MAPPING.items() if k in df.columns})
+
+
+def _check_required(columns) -> None:
+    missing = [c for c in REQUIRED_COLUMNS if c not in columns]
+    if missing:
+        raise ValueError(f"Dataset missing required columns: {missing}")
 
 
-def load_dataset(path: str) -> pd.DataFrame:
+def _check_exists(path: str) -> Path:
     csv_path = Path(path)
     if not csv_path.exists():
         raise FileNotFoundError(f"Dataset not found at {path}")
+    return csv_path
+
+
+def load_dataset(path: str, use_cache: bool = False, cache_dir: str = DEFAULT_CACHE_DIR) -> pd.DataFrame:
+    """Load the raw telemetry table from CSV, or Parquet by file suffix.
 
-    df = pd.read_csv(csv_path)
+    With ``use_cache`` the file is converted once into a columnar cache (float32
+    features) and the returned frame wraps the memory-mapped columns without
+    copying them. That frame is read-only: ``.copy()`` it before writing into it.
+    """
+    csv_path = _check_exists(path)
+    if use_cache:
+        return pd.DataFrame(open_columns(path, cache_dir=cache_dir), copy=False)
+
+    df = _read_table(csv_path)
     df = _normalize_columns(df)
+    _check_required(df.columns)
 
-    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
-    if missing:
-        raise ValueError(f"Dataset missing required columns: {missing}")
+    keep = REQUIRED_COLUMNS + [c for c in OPTIONAL_COLUMNS if c in df.columns]
+    return df[keep].copy()
+
+
+def file_digest(path: str | Path, chunk_bytes: int = 1 << 24) -> str:
+    """Content hash of a file, streamed so memory use does not depend on file size."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(chunk_bytes), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def source_digest(path: str, cache_dir: str = DEFAULT_CACHE_DIR) -> str:
+    """Content digest of a dataset file, memoized on its size and mtime."""
+    return _cached_digest(_check_exists(path), Path(cache_dir))
+
+
+def _cached_digest(csv_path: Path, cache_root: Path) -> str:
+    """Reuse the recorded digest while size and mtime are unchanged; rehash otherwise."""
+    stat = csv_path.stat()
+    index_path = cache_root / "index.json"
+    index = json.loads(index_path.read_text()) if index_path.exists() else {}
+    key = str(csv_path.resolve())
+    entry = index.get(key)
+    if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+        return entry["digest"]
+
+    digest = file_digest(csv_path)
+    index[key] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "digest": digest}
+    cache_root.mkdir(parents=True, exist_ok=True)
+    # per-process temp name: concurrent hashers must not write or replace each other's file
+    tmp = index_path.with_name(f"{index_path.name}.tmp-{os.getpid()}")
+    tmp.write_text(json.dumps(index, indent=2))
+    os.replace(tmp, index_path)
+    return digest
+
+
+def _column_dtype(name: str) -> np.dtype:
+    return np.dtype(np.int8) if name == "failure" else np.dtype(np.float32)
+
+
+def _read_table(file_path: Path) -> pd.DataFrame:
+    if file_path.suffix == ".parquet":
+        return pd.read_parquet(file_path)
+    return pd.read_csv(file_path)
+
+
+def _read_chunks(file_path: Path, chunksize: int, usecols=None) -> Iterator[pd.DataFrame]:
+    """Raw (not yet normalized) row chunks of a CSV or Parquet file; ``usecols`` filters raw column names."""
+    if file_path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        source = pq.ParquetFile(file_path)
+        names = [c for c in source.schema_arrow.names if usecols is None or usecols(c)]
+        return (batch.to_pandas() for batch in source.iter_batches(batch_size=chunksize, columns=names))
+    return pd.read_csv(file_path, chunksize=chunksize, usecols=usecols)
+
+
+def _build_column_cache(csv_path: Path, entry_dir: Path, digest: str, chunksize: int) -> None:
+    tmp_dir = entry_dir.with_name(entry_dir.name + f".tmp-{os.getpid()}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    header = dataset_columns(str(csv_path))
+    _check_required(header)
+    names = REQUIRED_COLUMNS + [c for c in OPTIONAL_COLUMNS if c in header]
+    handles = {name: open(tmp_dir / f"{name}.bin", "wb") for name in names}
+    dtypes = {name: "int32" if name == "asset_id" else _column_dtype(name).str for name in names}
+    asset_codes: dict = {}
+    rows = 0
+    try:
+        for chunk in _read_chunks(csv_path, chunksize):
+            chunk = _normalize_columns(chunk)
+            for name, fh in handles.items():
+                values = chunk[name]
+                if name == "asset_id":
+                    # store asset labels as dense int32 codes so the column stays memory-mappable;
+                    # every missing id shares code -1
+                    labels = zip(values.tolist(), values.isna().tolist())
+                    codes = np.fromiter(
+                        (-1 if missing else asset_codes.setdefault(v, len(asset_codes)) for v, missing in labels),
+                        dtype=np.int32,
+                        count=len(values),
+                    )
+                    codes.tofile(fh)
+                    continue
+                dtype = _column_dtype(name)
+                if dtype.kind == "i" and values.isna().any():
+                    raise ValueError(f"Column {name!r} contains missing values and cannot be cached as {dtype}")
+                values.to_numpy(dtype=dtype).tofile(fh)
+            rows += len(chunk)
+    finally:
+        for fh in handles.values():
+            fh.close()
+
+    meta = {
+        "format_version": _CACHE_FORMAT_VERSION,
+        "source": str(csv_path.resolve()),
+        "digest": digest,
+        "rows": rows,
+        "columns": dtypes,
+    }
+    if "asset_id" in handles:
+        meta["asset_labels"] = [label if isinstance(label, (str, int, float)) else str(label) for label in asset_codes]
+    (tmp_dir / "meta.json").write_text(json.dumps(meta, indent=2))
+    shutil.rmtree(entry_dir, ignore_errors=True)
+    os.replace(tmp_dir, entry_dir)
+
+
+def _ensure_cache(path: str, cache_dir: str, chunksize: int) -> tuple[Path, dict]:
+    csv_path = _check_exists(path)
+    cache_root = Path(cache_dir)
+    digest = _cached_digest(csv_path, cache_root)
+    entry_dir = cache_root / digest
+    meta_path = entry_dir / "meta.json"
+    if not meta_path.exists():
+        _build_column_cache(csv_path, entry_dir, digest, chunksize)
+    meta = json.loads(meta_path.read_text())
+    if meta.get("format_version") != _CACHE_FORMAT_VERSION:
+        _build_column_cache(csv_path, entry_dir, digest, chunksize)
+        meta = json.loads(meta_path.read_text())
+    return entry_dir, meta
+
+
+def _map_columns(path: str, columns: list[str] | None, cache_dir: str, chunksize: int) -> tuple[dict[str, np.ndarray], dict]:
+    entry_dir, meta = _ensure_cache(path, cache_dir, chunksize)
+    names = list(meta["columns"]) if columns is None else columns
+    unknown = [c for c in names if c not in meta["columns"]]
+    if unknown:
+        raise KeyError(f"Columns not in dataset cache: {unknown}")
+
+    out: dict[str, np.ndarray] = {}
+    for name in names:
+        dtype = np.dtype(meta["columns"][name])
+        if meta["rows"] == 0:
+            out[name] = np.empty(0, dtype=dtype)
+        else:
+            out[name] = np.memmap(entry_dir / f"{name}.bin", dtype=dtype, mode="r", shape=(meta["rows"],))
+    return out, meta
+
+
+def _decode_assets(codes: np.ndarray, meta: dict) -> np.ndarray:
+    """Original labels for asset codes; the missing-id code -1 decodes to None."""
+    return np.asarray([*meta["asset_labels"], None], dtype=object)[codes]
+
+
+def open_columns(
+    path: str,
+    columns: list[str] | None = None,
+    cache_dir: str = DEFAULT_CACHE_DIR,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    decode_assets: bool = True,
+) -> dict[str, np.ndarray]:
+    """Read-only memory-mapped columns of the cached dataset, building the cache if needed.
+
+    ``asset_id`` is returned decoded to its original labels (this one column is
+    materialized) unless ``decode_assets`` is False, in which case it stays a
+    memory-mapped column of int32 codes (-1 for a missing id); every other column is a zero-copy ``np.memmap``.
+    """
+    out, meta = _map_columns(path, columns, cache_dir, chunksize)
+    if "asset_id" in out and decode_assets:
+        out["asset_id"] = _decode_assets(out["asset_id"], meta)
+    return out
+
+
+def iter_dataset_chunks(
+    path: str,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    columns: list[str] | None = None,
+    use_cache: bool = False,
+    cache_dir: str = DEFAULT_CACHE_DIR,
+) -> Iterator[pd.DataFrame]:
+    """Yield the dataset (CSV, or Parquet by file suffix) in row chunks, reading only ``columns`` when given.
+
+    Peak memory is bounded by ``chunksize`` rather than by the size of the file.
+    """
+    if use_cache:
+        mapped, meta = _map_columns(path, columns, cache_dir, chunksize)
+        for start in range(0, meta["rows"], chunksize):
+            chunk = {name: np.array(arr[start : start + chunksize]) for name, arr in mapped.items()}
+            if "asset_id" in chunk:
+                chunk["asset_id"] = _decode_assets(chunk["asset_id"], meta)
+            yield pd.DataFrame(chunk)
+        return
+
+    csv_path = _check_exists(path)
+    wanted = None if columns is None else set(columns)
+    usecols = None if wanted is None else (lambda c: _COLUMN_MAPPING.get(c, c) in wanted)
+    checked = False
+    for chunk in _read_chunks(csv_path, chunksize, usecols):
+        chunk = _normalize_columns(chunk)
+        if not checked:
+            missing = [c for c in (columns or REQUIRED_COLUMNS) if c not in chunk.columns]
+            if missing:
+                raise ValueError(f"Dataset missing required columns: {missing}")
+            checked = True
+        yield chunk[columns or (REQUIRED_COLUMNS + [c for c in OPTIONAL_COLUMNS if c in chunk.columns])]
+
+
+def dataset_columns(path: str) -> list[str]:
+    """Normalized column names of a CSV or Parquet file, read from its header only."""
+    file_path = _check_exists(path)
+    if file_path.suffix == ".parquet":
+        import pyarrow.parquet as pq
 
-    return df[REQUIRED_COLUMNS].copy()
+        names = pq.read_schema(file_path).names
+    else:
+        names = list(pd.read_csv(file_path, nrows=0).columns)
+    return [_COLUMN_MAPPING.get(c, c) for c in names]
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+MAX_BLOCK_ROWS = 200_000  # rows per stacked predict_proba call
+
+
+@dataclass
+class PermutationImportance:
+    importances: pd.DataFrame
+    importances_mean: pd.Series
+    importances_std: pd.Series
+
+
+def _predict(model: Any, values: np.ndarray, columns: pd.Index) -> np.ndarray:
+    return model.predict_proba(pd.DataFrame(values, columns=columns, copy=False))[:, 1]
+
+
+def _score_columns(
+    model: Any,
+    base: np.ndarray,
+    baseline: np.ndarray,
+    columns: pd.Index,
+    col_idx: list[int],
+    seeds: list[np.random.SeedSequence],
+    n_repeats: int,
+    block_rows: int,
+) -> dict[int, np.ndarray]:
+    """Score a group of columns with one private buffer of stacked copies of ``base``.
+
+    The buffer holds as many repeats as fit in ``block_rows`` rows, so each
+    column takes one ``predict_proba`` call per block of repeats (one call when
+    ``rows * n_repeats <= block_rows``). Only the column under test is shuffled
+    in place, and it is restored afterwards.
+    """
+    n = len(base)
+    per_block = max(1, min(n_repeats, block_rows // max(n, 1)))
+    buffer = np.tile(base, (per_block, 1))
+    out: dict[int, np.ndarray] = {}
+    for j in col_idx:
+        rng = np.random.default_rng(seeds[j])
+        column = buffer[:, j].reshape(per_block, n)
+        scores = np.empty(n_repeats)
+        for start in range(0, n_repeats, per_block):
+            size = min(per_block, n_repeats - start)
+            for r in range(size):
+                column[r] = base[rng.permutation(n), j]
+            predicted = _predict(model, buffer[: size * n], columns).reshape(size, n)
+            scores[start : start + size] = np.abs(predicted - baseline).mean(axis=1)
+        column[...] = base[:, j]
+        out[j] = scores
+    return out
+
+
+def permutation_importance(
+    model: Any,
+    X: pd.DataFrame,
+    n_repeats: int = 5,
+    max_samples: int | float | None = None,
+    random_state: int = 42,
+    n_jobs: int = 1,
+) -> PermutationImportance:
+    """Mean absolute change in predicted probability when one feature is shuffled.
+
+    Rows can be subsampled with ``max_samples`` (a count or a fraction). Each
+    column's repeats are stacked into blocks of at most ``MAX_BLOCK_ROWS`` rows
+    and scored with one ``predict_proba`` call per block, and column groups run
+    on ``n_jobs`` threads. Permutations come from per-column seeded generators,
+    so results do not depend on ``n_jobs`` or the block size.
+    """
+    if n_repeats < 1:
+        raise ValueError("n_repeats must be >= 1")
+    columns = X.columns
+    base = X.to_numpy(dtype=float)
+    seeds = np.random.SeedSequence(random_state).spawn(len(columns) + 1)
+
+    if max_samples is not None:
+        size = int(max_samples * len(base)) if isinstance(max_samples, float) else int(max_samples)
+        if size < len(base):
+            rows = np.random.default_rng(seeds[-1]).choice(len(base), size=max(size, 1), replace=False)
+            base = base[np.sort(rows)]
+
+    baseline = _predict(model, base, columns)
+
+    workers = max(1, min(n_jobs if n_jobs > 0 else os.cpu_count() or 1, len(columns)))
+    groups = [list(range(len(columns)))[w::workers] for w in range(workers)]
+    results: dict[int, np.ndarray] = {}
+    if workers == 1:
+        results = _score_columns(model, base, baseline, columns, groups[0], seeds, n_repeats, MAX_BLOCK_ROWS)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_score_columns, model, base, baseline, columns, group, seeds, n_repeats, MAX_BLOCK_ROWS)
+                for group in groups
+            ]
+            for future in futures:
+                results.update(future.result())
+
+    matrix = np.stack([results[j] for j in range(len(columns))])
+    importances = pd.DataFrame(matrix, index=columns)
+    return PermutationImportance(
+        importances=importances,
+        importances_mean=importances.mean(axis=1),
+        importances_std=importances.std(axis=1, ddof=0),
+    )
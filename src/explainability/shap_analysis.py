@@ -5,54 +5,112 @@ from typing import Any
 import numpy as np
 import pandas as pd
 
+from src.explainability.permutation import permutation_importance
+
+PERMUTATION_MAX_SAMPLES = 2000  # rows scored by the permutation fallback
 
-def compute_shap_summary(model: Any, X: pd.DataFrame) -> pd.Series:
-    """Compute mean absolute SHAP contribution per feature.
 
-    Falls back to permutation-style importance proxy when SHAP is unavailable.
+def build_explainer(model: Any) -> Any | None:
+    """Build a ``shap.TreeExplainer`` once so callers can reuse it across requests.
+
+    Returns None when SHAP is unavailable or does not support the model.
     """
     try:
         import shap
 
-        explainer = shap.TreeExplainer(model)
-        shap_values = explainer.shap_values(X)
-        if isinstance(shap_values, list):
-            shap_values = shap_values[1]
+        return shap.TreeExplainer(model)
+    except Exception:
+        return None
+
+
+def _shap_matrix(explainer: Any, X: pd.DataFrame) -> np.ndarray:
+    shap_values = explainer.shap_values(X)
+    if isinstance(shap_values, list):
+        shap_values = shap_values[1]
+    shap_values = np.asarray(shap_values)
+    if shap_values.ndim == 3:
+        shap_values = shap_values[:, :, 1]
+    return shap_values
+
+
+def _perturbation_contributions(model: Any, X: pd.DataFrame) -> np.ndarray:
+    """Directional sensitivity from a small perturbation of each feature, for every row.
+
+    All probe rows are stacked into one matrix so the model is called once.
+    """
+    base = X.to_numpy(dtype=float)
+    n, f = base.shape
+    delta = np.maximum(np.abs(base) * 0.01, 0.01)
+    probes = np.repeat(base[:, None, :], f + 1, axis=1)
+    probes[:, 1:, :] += np.eye(f)[None, :, :] * delta[:, None, :]
+    scores = model.predict_proba(pd.DataFrame(probes.reshape(-1, f), columns=X.columns))[:, 1]
+    scores = scores.reshape(n, f + 1)
+    return scores[:, 1:] - scores[:, :1]
+
+
+def compute_shap_summary(model: Any, X: pd.DataFrame, explainer: Any | None = None) -> pd.Series:
+    """Compute mean absolute SHAP contribution per feature.
+
+    Falls back to permutation importance on at most ``PERMUTATION_MAX_SAMPLES``
+    rows when SHAP is unavailable.
+    """
+    try:
+        if explainer is None:
+            import shap
+
+            explainer = shap.TreeExplainer(model)
+        shap_values = _shap_matrix(explainer, X)
         mean_abs = np.abs(shap_values).mean(axis=0)
         return pd.Series(mean_abs, index=X.columns).sort_values(ascending=False)
     except Exception:
-        baseline = model.predict_proba(X)[:, 1]
-        scores: dict[str, float] = {}
-        for col in X.columns:
-            shuffled = X.copy()
-            shuffled[col] = np.random.permutation(shuffled[col].to_numpy())
-            perturbed = model.predict_proba(shuffled)[:, 1]
-            scores[col] = float(np.mean(np.abs(baseline - perturbed)))
-        return pd.Series(scores).sort_values(ascending=False)
+        importance = permutation_importance(model, X, n_repeats=3, max_samples=PERMUTATION_MAX_SAMPLES)
+        return importance.importances_mean.sort_values(ascending=False)
 
 
-def explain_single_prediction(model: Any, row: pd.DataFrame) -> dict[str, float]:
+def explain_single_prediction(model: Any, row: pd.DataFrame, explainer: Any | None = None) -> dict[str, float]:
     """Return per-feature local contribution for one row."""
     if len(row) != 1:
         raise ValueError("row must contain exactly one sample")
 
     try:
-        import shap
+        if explainer is None:
+            import shap
 
-        explainer = shap.TreeExplainer(model)
-        shap_values = explainer.shap_values(row)
-        if isinstance(shap_values, list):
-            shap_values = shap_values[1]
-        values = shap_values[0]
+            explainer = shap.TreeExplainer(model)
+        values = _shap_matrix(explainer, row)[0]
         return {col: float(val) for col, val in zip(row.columns, values)}
     except Exception:
         # proxy local explanation: directional sensitivity from small perturbation
-        base = float(model.predict_proba(row)[:, 1][0])
-        out: dict[str, float] = {}
-        for col in row.columns:
-            delta = max(abs(float(row[col].iloc[0])) * 0.01, 0.01)
-            probe = row.copy()
-            probe[col] = probe[col] + delta
-            pert = float(model.predict_proba(probe)[:, 1][0])
-            out[col] = pert - base
-        return out
+        values = _perturbation_contributions(model, row)[0]
+        return {col: float(val) for col, val in zip(row.columns, values)}
+
+
+def explain_batch(model: Any, X: pd.DataFrame, top_k: int = 3, explainer: Any | None = None) -> list[dict[str, float]]:
+    """Return the ``top_k`` largest-magnitude contributors for every row of ``X``.
+
+    Uses one ``shap_values`` call for the whole batch (or one stacked perturbation
+    call when SHAP is unavailable).
+    """
+    if X.empty:
+        return []
+    try:
+        if explainer is None:
+            import shap
+
+            explainer = shap.TreeExplainer(model)
+        contributions = _shap_matrix(explainer, X)
+    except Exception:
+        contributions = _perturbation_contributions(model, X)
+
+    k = max(1, min(top_k, contributions.shape[1]))
+    magnitude = np.abs(contributions)
+    top = np.argpartition(-magnitude, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(magnitude, top, axis=1), axis=1)
+    top = np.take_along_axis(top, order, axis=1)
+    values = np.take_along_axis(contributions, top, axis=1)
+
+    columns = np.asarray(X.columns)
+    return [
+        {str(name): float(val) for name, val in zip(columns[idx], vals)}
+        for idx, vals in zip(top, values)
+    ]
@@ -1,7 +1,12 @@
 from __future__ import annotations
 
+from typing import Any, Callable, Mapping, Sequence
+
+import numpy as np
 import pandas as pd
 
+from src.feature_store import ASSET_COLUMN, rolling_torque_features
+
 
 FEATURE_COLUMNS = [
     "air_temperature",
@@ -15,13 +20,118 @@ FEATURE_COLUMNS = [
     "torque_roll_mean_5",
     "torque_lag_1",
 ]
+SENSOR_FEATURES = FEATURE_COLUMNS[:5]
+ROLLING_FEATURES = ("torque_roll_mean_5", "torque_lag_1")
+_TRANSFORM_BLOCK_ROWS = 1 << 14
+
+# each feature as a function of one block of imputed float64 sensor columns (and rolling features)
+_FEATURE_KERNELS: dict[str, Callable[[dict[str, np.ndarray]], np.ndarray]] = {
+    **{name: (lambda v, name=name: v[name]) for name in SENSOR_FEATURES + list(ROLLING_FEATURES)},
+    "temp_diff": lambda v: v["process_temperature"] - v["air_temperature"],
+    "wear_rate": lambda v: v["tool_wear"] / (np.abs(v["rotational_speed"]) + 1.0),
+    "torque_temp_interaction": lambda v: v["torque"] * v["process_temperature"],
+}
 
 
-def build_features(df: pd.DataFrame) -> pd.DataFrame:
+def build_features(df: pd.DataFrame, rolling: tuple[np.ndarray, np.ndarray] | None = None) -> pd.DataFrame:
+    """Add derived features.
+
+    Rolling/lag torque features are computed per ``asset_id`` when that column is
+    present. Pass ``rolling=(roll_mean, lag)`` to use values already produced by an
+    online ``AssetFeatureStore`` instead.
+    """
     x = df.copy()
     x["temp_diff"] = x["process_temperature"] - x["air_temperature"]
     x["wear_rate"] = x["tool_wear"] / (x["rotational_speed"].abs() + 1.0)
     x["torque_temp_interaction"] = x["torque"] * x["process_temperature"]
-    x["torque_roll_mean_5"] = x["torque"].rolling(window=5, min_periods=1).mean()
-    x["torque_lag_1"] = x["torque"].shift(1).bfill()
+    if rolling is None:
+        asset_ids = x[ASSET_COLUMN].to_numpy() if ASSET_COLUMN in x.columns else None
+        rolling = rolling_torque_features(x["torque"].to_numpy(dtype=float), asset_ids)
+    x["torque_roll_mean_5"], x["torque_lag_1"] = rolling
     return x
+
+
+class FeatureTransformer:
+    """Training-time imputation plus the feature spec, applied in one pass.
+
+    ``medians`` are fitted once on the training data and saved in the model
+    artifact, so batch scoring and the API impute exactly as training did.
+    ``transform`` computes the same values as ``preprocess`` followed by
+    ``build_features``, but writes them straight into one preallocated float32
+    matrix in ``feature_names`` order, a block of rows at a time, with no
+    intermediate frames.
+    """
+
+    def __init__(self, medians: Mapping[str, float] | None = None, feature_names: Sequence[str] = FEATURE_COLUMNS) -> None:
+        unknown = sorted(set(feature_names) - set(_FEATURE_KERNELS))
+        if unknown:
+            raise ValueError(f"Unknown features {unknown}")
+        self.medians = {name: float(value) for name, value in (medians or {}).items()}
+        self.feature_names = list(feature_names)
+
+    @classmethod
+    def fit(cls, df: pd.DataFrame, feature_names: Sequence[str] = FEATURE_COLUMNS) -> FeatureTransformer:
+        medians = {}
+        for name in SENSOR_FEATURES:
+            if name in df.columns:
+                values = df[name].to_numpy(dtype=np.float64)
+                if not np.isnan(values).all():
+                    medians[name] = float(np.nanmedian(values))
+        return cls(medians, feature_names)
+
+    def to_dict(self) -> dict:
+        return {"medians": self.medians, "feature_names": self.feature_names}
+
+    @classmethod
+    def from_dict(cls, spec: Mapping[str, Any]) -> FeatureTransformer:
+        return cls(spec.get("medians"), spec.get("feature_names", FEATURE_COLUMNS))
+
+    def _impute(self, name: str, values: np.ndarray) -> np.ndarray:
+        out = np.array(values, dtype=np.float64)
+        if name in self.medians:
+            np.copyto(out, self.medians[name], where=np.isnan(out))
+        return out
+
+    def column(self, data: pd.DataFrame | Mapping[str, Any], name: str) -> np.ndarray:
+        """One imputed sensor column as float64, e.g. torque for an external rolling-feature store."""
+        return self._impute(name, np.asarray(data[name]))
+
+    def transform(
+        self,
+        data: pd.DataFrame | Mapping[str, Any],
+        rolling: tuple[np.ndarray, np.ndarray] | None = None,
+        out: np.ndarray | None = None,
+    ) -> np.ndarray:
+        """``(rows, features)`` C-contiguous float32 matrix of imputed sensors and derived features.
+
+        Rolling/lag torque features come from ``rolling=(roll_mean, lag)`` when given
+        (for example from an ``AssetFeatureStore``); otherwise they are computed per
+        ``asset_id`` over the imputed torque, as in ``build_features``.
+        """
+        n = len(data[SENSOR_FEATURES[0]])
+        if out is None:
+            out = np.empty((n, len(self.feature_names)), dtype=np.float32)
+        elif out.shape != (n, len(self.feature_names)):
+            raise ValueError(f"out must have shape {(n, len(self.feature_names))}")
+        sensors = {name: np.asarray(data[name]) for name in SENSOR_FEATURES}
+        extra: dict[str, np.ndarray] = {}
+        if any(name in ROLLING_FEATURES for name in self.feature_names):
+            if rolling is None:
+                asset_ids = np.asarray(data[ASSET_COLUMN]) if ASSET_COLUMN in data else None
+                rolling = rolling_torque_features(self.column(data, "torque"), asset_ids)
+            extra = dict(zip(ROLLING_FEATURES, rolling))
+
+        for start in range(0, n, _TRANSFORM_BLOCK_ROWS):
+            rows = slice(start, min(start + _TRANSFORM_BLOCK_ROWS, n))
+            block = {name: self._impute(name, values[rows]) for name, values in sensors.items()}
+            block.update({name: values[rows] for name, values in extra.items()})
+            for j, name in enumerate(self.feature_names):
+                out[rows, j] = _FEATURE_KERNELS[name](block)
+        return out
+
+    def frame(
+        self, data: pd.DataFrame | Mapping[str, Any], rolling: tuple[np.ndarray, np.ndarray] | None = None
+    ) -> pd.DataFrame:
+        """``transform`` wrapped in a DataFrame with feature column names; the matrix is not copied."""
+        index = data.index if isinstance(data, pd.DataFrame) else None
+        return pd.DataFrame(self.transform(data, rolling=rolling), columns=self.feature_names, index=index, copy=False)
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Hashable, Sequence
+
+import numpy as np
+import pandas as pd
+
+ASSET_COLUMN = "asset_id"
+ROLLING_WINDOW = 5
+DEFAULT_MAX_ASSETS = 100_000
+
+
+def _is_missing(asset_id: Hashable | None) -> bool:
+    return asset_id is None or (isinstance(asset_id, float) and np.isnan(asset_id))
+
+
+class AssetFeatureStore:
+    """Per-asset ring buffers of recent torque readings for online rolling/lag features.
+
+    State lives in a few preallocated arrays indexed by an asset slot, so each
+    reading costs O(1) regardless of how long the asset has been reporting. At
+    most ``max_assets`` assets are kept; a new asset beyond that takes over the
+    slot of the least recently updated one, whose history is dropped.
+    """
+
+    def __init__(
+        self, window: int = ROLLING_WINDOW, initial_capacity: int = 1024, max_assets: int = DEFAULT_MAX_ASSETS
+    ) -> None:
+        if window < 1:
+            raise ValueError("window must be >= 1")
+        if max_assets < 1:
+            raise ValueError("max_assets must be >= 1")
+        self.window = window
+        self.max_assets = max_assets
+        self.evictions = 0
+        self._slots: OrderedDict[Hashable, int] = OrderedDict()
+        self._lock = threading.Lock()
+        self._allocate(max(1, min(initial_capacity, max_assets)))
+
+    def _allocate(self, capacity: int) -> None:
+        self._buffer = np.zeros((capacity, self.window), dtype=np.float64)
+        self._head = np.zeros(capacity, dtype=np.int32)
+        self._count = np.zeros(capacity, dtype=np.int32)
+        self._sum = np.zeros(capacity, dtype=np.float64)
+
+    def _grow(self) -> None:
+        old = (self._buffer, self._head, self._count, self._sum)
+        n = len(old[0])
+        self._allocate(min(2 * n, self.max_assets))
+        for new_arr, old_arr in zip((self._buffer, self._head, self._count, self._sum), old):
+            new_arr[:n] = old_arr
+
+    def _slot(self, asset_id: Hashable) -> int:
+        slot = self._slots.get(asset_id)
+        if slot is not None:
+            self._slots.move_to_end(asset_id)
+            return slot
+        if len(self._slots) >= self.max_assets:
+            _, slot = self._slots.popitem(last=False)
+            self._head[slot] = self._count[slot] = 0
+            self._sum[slot] = 0.0
+            self.evictions += 1
+        else:
+            slot = len(self._slots)
+            if slot == len(self._head):
+                self._grow()
+        self._slots[asset_id] = slot
+        return slot
+
+    def _push(self, asset_id: Hashable, torque: float) -> tuple[float, float]:
+        slot = self._slot(asset_id)
+        count = int(self._count[slot])
+        head = int(self._head[slot])
+        buf = self._buffer[slot]
+
+        lag = float(buf[(head - 1) % self.window]) if count else torque
+        if count == self.window:
+            self._sum[slot] -= buf[head]
+        else:
+            count += 1
+            self._count[slot] = count
+        buf[head] = torque
+        self._sum[slot] += torque
+
+        head = (head + 1) % self.window
+        self._head[slot] = head
+        if head == 0:
+            # re-anchor the running sum once per lap to stop float drift accumulating
+            self._sum[slot] = buf[:count].sum()
+        return float(self._sum[slot] / count), lag
+
+    def update(self, asset_id: Hashable, torque: float) -> tuple[float, float]:
+        """Record one reading and return ``(torque_roll_mean, torque_lag_1)`` for it."""
+        with self._lock:
+            return self._push(asset_id, float(torque))
+
+    def update_many(self, asset_ids: Sequence[Hashable | None], torque: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Record readings in arrival order; rows without an asset id are scored statelessly."""
+        torque = np.asarray(torque, dtype=np.float64)
+        roll = torque.copy()
+        lag = torque.copy()
+        with self._lock:
+            for i, asset_id in enumerate(asset_ids):
+                if _is_missing(asset_id):
+                    continue
+                roll[i], lag[i] = self._push(asset_id, float(torque[i]))
+        return roll, lag
+
+    def reset(self) -> None:
+        with self._lock:
+            self._slots.clear()
+            self._allocate(len(self._head))
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, asset_id: Hashable) -> bool:
+        return asset_id in self._slots
+
+
+def rolling_torque_features(
+    torque: np.ndarray,
+    asset_ids: Sequence[Hashable] | np.ndarray | None = None,
+    window: int = ROLLING_WINDOW,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Vectorized offline equivalent of replaying ``AssetFeatureStore.update`` row by row.
+
+    Rows are grouped by asset (all rows form one asset when ``asset_ids`` is None)
+    and keep their relative order within each asset. Rows with a missing id have
+    no history, as in ``AssetFeatureStore.update_many``.
+    """
+    torque = np.asarray(torque, dtype=np.float64)
+    n = len(torque)
+    if n == 0:
+        return torque.copy(), torque.copy()
+
+    if asset_ids is None:
+        order = np.arange(n)
+        codes = np.zeros(n, dtype=np.int64)
+    else:
+        codes, uniques = pd.factorize(pd.Series(asset_ids, copy=False))
+        missing = codes < 0
+        if missing.any():
+            # one group per row, so a reading without an id never sees another's history
+            codes = codes.astype(np.int64)
+            codes[missing] = len(uniques) + np.arange(int(missing.sum()))
+        order = np.argsort(codes, kind="stable")
+        codes = codes[order]
+
+    t = torque[order]
+    position = np.arange(n)
+    is_start = np.empty(n, dtype=bool)
+    is_start[0] = True
+    is_start[1:] = codes[1:] != codes[:-1]
+    group_start = np.maximum.accumulate(np.where(is_start, position, 0))
+
+    csum = np.concatenate(([0.0], np.cumsum(t)))
+    lo = np.maximum(position - window + 1, group_start)
+    roll_sorted = (csum[position + 1] - csum[lo]) / (position - lo + 1)
+
+    lag_sorted = np.empty(n, dtype=np.float64)
+    lag_sorted[0] = t[0]
+    lag_sorted[1:] = t[:-1]
+    lag_sorted[is_start] = t[is_start]
+
+    roll = np.empty(n, dtype=np.float64)
+    lag = np.empty(n, dtype=np.float64)
+    roll[order] = roll_sorted
+    lag[order] = lag_sorted
+    return roll, lag
+
+
+class ChunkedRollingFeatures:
+    """Rolling/lag features over consecutive chunks of one long table.
+
+    Keeps the last readings of every asset between calls, so processing a file
+    chunk by chunk gives the same values as one ``rolling_torque_features`` pass.
+    """
+
+    def __init__(self, window: int = ROLLING_WINDOW) -> None:
+        self.window = window
+        self._keep = max(window - 1, 1)
+        self._tail_torque = np.empty(0, dtype=np.float64)
+        self._tail_assets: np.ndarray | None = None
+
+    def transform(self, torque: np.ndarray, asset_ids: Sequence[Hashable] | np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray]:
+        torque = np.asarray(torque, dtype=np.float64)
+        n_tail = len(self._tail_torque)
+        full_torque = np.concatenate([self._tail_torque, torque])
+        full_assets = None
+        if asset_ids is not None:
+            tail_assets = self._tail_assets if self._tail_assets is not None else np.empty(0, dtype=object)
+            full_assets = np.concatenate([tail_assets, np.asarray(asset_ids, dtype=object)])
+
+        roll, lag = rolling_torque_features(full_torque, full_assets, self.window)
+
+        if full_assets is None:
+            self._tail_torque = full_torque[-self._keep :]
+        else:
+            recent = pd.Series(full_assets).groupby(full_assets, dropna=False, sort=False).cumcount(ascending=False)
+            keep = (recent.to_numpy() < self._keep) & ~pd.isna(full_assets)
+            self._tail_torque = full_torque[keep]
+            self._tail_assets = full_assets[keep]
+        return roll[n_tail:], lag[n_tail:]
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+import numpy as np
+
+ARTIFACT_FORMAT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+COMPILED_NAME = "compiled.npz"
+DRIFT_REFERENCE_NAME = "drift.json"
+_INTERNAL_KEYS = {"format_version", "model_file", "model_format", "model_digest"}
+
+
+def artifact_dir(model_path: str | Path) -> Path:
+    """Directory artifact for a model path: ``models/xgboost_model.pkl`` -> ``models/xgboost_model/``."""
+    path = Path(model_path)
+    return path if path.suffix == "" else path.with_suffix("")
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, Path):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _library_versions() -> dict[str, str]:
+    versions = {}
+    for name in ("xgboost", "sklearn", "numpy"):
+        try:
+            versions[name] = __import__(name).__version__
+        except ImportError:
+            continue
+    return versions
+
+
+def _write_model(model: Any, directory: Path) -> tuple[str, str]:
+    """Native booster format when the model supports it, joblib otherwise."""
+    if hasattr(model, "get_booster") and hasattr(model, "save_model"):
+        model.save_model(directory / "model.ubj")
+        return "model.ubj", "xgboost-ubj"
+    import joblib
+
+    joblib.dump(model, directory / "model.joblib")
+    return "model.joblib", "joblib"
+
+
+def _read_model(path: Path, model_format: str) -> Any:
+    if model_format in {"xgboost-ubj", "xgboost-json"}:
+        from xgboost import XGBClassifier
+
+        model = XGBClassifier()
+        model.load_model(path)
+        return model
+    if model_format == "joblib":
+        import joblib
+
+        return joblib.load(path)
+    raise ValueError(f"Unknown model format {model_format!r} in artifact {path.parent}")
+
+
+def write_artifact(
+    model: Any,
+    metadata: dict,
+    model_path: str | Path,
+    companions: Callable[[Path], None] | None = None,
+) -> Path:
+    """Write the model and a JSON manifest of ``metadata`` as an artifact directory.
+
+    ``companions(directory)`` may add derived files (compiled export, drift
+    reference). The directory is assembled under a temporary name and renamed
+    into place, so readers never see a manifest paired with files from another model.
+    """
+    final = artifact_dir(model_path)
+    tmp = final.with_name(f"{final.name}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    model_file, model_format = _write_model(model, tmp)
+    if companions is not None:
+        companions(tmp)
+    manifest = {
+        "format_version": ARTIFACT_FORMAT_VERSION,
+        "model_file": model_file,
+        "model_format": model_format,
+        "model_digest": hashlib.sha256((tmp / model_file).read_bytes()).hexdigest(),
+        "created_at": time.time(),
+        "library_versions": _library_versions(),
+        **metadata,
+    }
+    (tmp / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2, default=_json_default))
+
+    old = final.with_name(f"{final.name}.old-{os.getpid()}")
+    if final.exists():
+        os.replace(final, old)
+    os.replace(tmp, final)
+    shutil.rmtree(old, ignore_errors=True)
+    return final
+
+
+class ModelArtifact(Mapping):
+    """Read-only view of an artifact directory that loads the model on first access.
+
+    Every manifest entry (features, metrics, backend, params, ...) is available
+    without touching the model file; ``artifact["model"]`` deserializes it once.
+    """
+
+    def __init__(self, directory: str | Path, manifest: dict) -> None:
+        self.directory = Path(directory)
+        self.manifest = manifest
+        self._metadata = {k: v for k, v in manifest.items() if k not in _INTERNAL_KEYS}
+        self._model: Any = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, directory: str | Path) -> ModelArtifact:
+        directory = Path(directory)
+        manifest = json.loads((directory / MANIFEST_NAME).read_text())
+        if manifest.get("format_version") != ARTIFACT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported artifact format {manifest.get('format_version')!r} in {directory}")
+        return cls(directory, manifest)
+
+    @property
+    def version(self) -> str:
+        return self.manifest["model_digest"][:12]
+
+    def file(self, name: str) -> Path | None:
+        """Path of a companion file inside the artifact, or None when it was not written."""
+        path = self.directory / name
+        return path if path.exists() else None
+
+    @property
+    def model_loaded(self) -> bool:
+        return self._model is not None
+
+    @property
+    def model(self) -> Any:
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    path = self.directory / self.manifest["model_file"]
+                    self._model = _read_model(path, self.manifest["model_format"])
+        return self._model
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "model":
+            return self.model
+        return self._metadata[key]
+
+    def __iter__(self) -> Iterator[str]:
+        yield "model"
+        yield from self._metadata
+
+    def __len__(self) -> int:
+        return len(self._metadata) + 1
+
+
+def has_artifact_dir(model_path: str | Path) -> bool:
+    return (artifact_dir(model_path) / MANIFEST_NAME).exists()
+
+
+def load_artifact(model_path: str | Path) -> Mapping[str, Any]:
+    """Open the artifact for ``model_path``: the directory format when present, else a legacy pickle."""
+    if has_artifact_dir(model_path):
+        return ModelArtifact.open(artifact_dir(model_path))
+    path = Path(model_path)
+    if path.is_file():
+        import joblib
+
+        return joblib.load(path)
+    raise FileNotFoundError(f"No model artifact at {artifact_dir(model_path)} or {path}")
+
+
+def load_transformer(model_path: str | Path) -> Any:
+    """The ``FeatureTransformer`` fitted at training time; artifacts older than it get one without medians."""
+    from src.feature_engineering import FEATURE_COLUMNS, FeatureTransformer
+
+    artifact = load_artifact(model_path)
+    spec = artifact.get("transformer")
+    if spec is not None:
+        return FeatureTransformer.from_dict(spec)
+    return FeatureTransformer(feature_names=artifact.get("features", FEATURE_COLUMNS))
@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+_FORMAT_VERSION = 1
+
+
+def compiled_model_path(model_path: str | Path) -> Path:
+    """Location of the NumPy export that accompanies a trained model artifact."""
+    return Path(model_path).with_suffix(".npz")
+
+
+@dataclass(frozen=True)
+class CompiledEnsemble:
+    """Binary tree ensemble flattened into contiguous node arrays.
+
+    All trees share one node table; leaves point at themselves so every row can
+    take exactly ``max_depth`` steps without per-row branching.
+    """
+
+    feature: np.ndarray
+    threshold: np.ndarray
+    left: np.ndarray
+    right: np.ndarray
+    default_left: np.ndarray
+    value: np.ndarray
+    roots: np.ndarray
+    base_margin: float
+    max_depth: int
+    strict_less: bool
+    feature_names: tuple[str, ...]
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def decision_function(self, X: Any, batch_size: int = 4096) -> np.ndarray:
+        """Raw log-odds margin for each row of ``X`` (array or DataFrame in feature order)."""
+        if hasattr(X, "columns"):
+            X = X[list(self.feature_names)].to_numpy(dtype=np.float32)
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != len(self.feature_names):
+            raise ValueError(f"Expected a 2-D matrix with {len(self.feature_names)} feature columns")
+
+        n_features = X.shape[1]
+        children = np.column_stack([self.right, self.left]).ravel()
+        out = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), batch_size):
+            chunk = np.ascontiguousarray(X[start : start + batch_size])
+            flat = chunk.ravel()
+            row_offset = (np.arange(len(chunk), dtype=np.int64) * n_features)[:, None]
+            has_missing = bool(np.isnan(flat).any())
+            idx = np.broadcast_to(self.roots, (len(chunk), self.n_trees)).copy()
+            for _ in range(self.max_depth):
+                x = flat.take(row_offset + self.feature.take(idx))
+                thr = self.threshold.take(idx)
+                go_left = x < thr if self.strict_less else x <= thr
+                if has_missing:
+                    go_left = np.where(np.isnan(x), self.default_left.take(idx), go_left)
+                idx = children.take(2 * idx + go_left)
+            out[start : start + len(chunk)] = self.value.take(idx).sum(axis=1)
+        return out + self.base_margin
+
+    def predict_proba(self, X: Any) -> np.ndarray:
+        p = 1.0 / (1.0 + np.exp(-self.decision_function(X)))
+        return np.column_stack([1.0 - p, p])
+
+    def save(self, path: str | Path) -> None:
+        meta = {
+            "format_version": _FORMAT_VERSION,
+            "base_margin": self.base_margin,
+            "max_depth": self.max_depth,
+            "strict_less": self.strict_less,
+            "feature_names": list(self.feature_names),
+        }
+        np.savez(
+            path,
+            feature=self.feature,
+            threshold=self.threshold,
+            left=self.left,
+            right=self.right,
+            default_left=self.default_left,
+            value=self.value,
+            roots=self.roots,
+            meta=np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8),
+        )
+
+    @classmethod
+    def load(cls, path: str | Path) -> "CompiledEnsemble":
+        with np.load(path) as data:
+            meta = json.loads(data["meta"].tobytes().decode())
+            if meta.get("format_version") != _FORMAT_VERSION:
+                raise ValueError(f"Unsupported compiled model format: {meta.get('format_version')}")
+            return cls(
+                feature=data["feature"],
+                threshold=data["threshold"],
+                left=data["left"],
+                right=data["right"],
+                default_left=data["default_left"],
+                value=data["value"],
+                roots=data["roots"],
+                base_margin=float(meta["base_margin"]),
+                max_depth=int(meta["max_depth"]),
+                strict_less=bool(meta["strict_less"]),
+                feature_names=tuple(meta["feature_names"]),
+            )
+
+
+def _tree_depth(left: np.ndarray, right: np.ndarray) -> int:
+    frontier = np.array([0])
+    level = 0
+    while frontier.size:
+        children = np.concatenate([left[frontier], right[frontier]])
+        frontier = children[children >= 0]
+        level += 1
+    return level - 1
+
+
+def _assemble(trees: list[dict[str, np.ndarray]], base_margin: float, strict_less: bool, feature_names) -> CompiledEnsemble:
+    """Concatenate per-tree node tables, rebasing child indices and making leaves self-loops."""
+    parts: dict[str, list[np.ndarray]] = {k: [] for k in ("feature", "threshold", "left", "right", "default_left", "value")}
+    roots = []
+    offset = 0
+    max_depth = 0
+    for tree in trees:
+        left, right = tree["left"], tree["right"]
+        n = len(left)
+        own = np.arange(offset, offset + n, dtype=np.int32)
+        is_leaf = left < 0
+        parts["feature"].append(np.where(is_leaf, 0, tree["feature"]).astype(np.int32))
+        parts["threshold"].append(np.where(is_leaf, np.inf, tree["threshold"]).astype(np.float64))
+        parts["left"].append(np.where(is_leaf, own, left + offset).astype(np.int32))
+        parts["right"].append(np.where(is_leaf, own, right + offset).astype(np.int32))
+        parts["default_left"].append(np.where(is_leaf, True, tree["default_left"]).astype(bool))
+        parts["value"].append(np.where(is_leaf, tree["value"], 0.0).astype(np.float64))
+        roots.append(offset)
+        max_depth = max(max_depth, _tree_depth(left, right))
+        offset += n
+
+    return CompiledEnsemble(
+        **{k: np.ascontiguousarray(np.concatenate(v)) for k, v in parts.items()},
+        roots=np.asarray(roots, dtype=np.int32),
+        base_margin=float(base_margin),
+        max_depth=max_depth,
+        strict_less=strict_less,
+        feature_names=tuple(str(f) for f in feature_names),
+    )
+
+
+def _compile_xgboost(model: Any) -> CompiledEnsemble:
+    booster = model.get_booster() if hasattr(model, "get_booster") else model
+    doc = json.loads(booster.save_raw("json"))
+    learner = doc["learner"]
+    if learner["objective"]["name"] != "binary:logistic":
+        raise ValueError(f"Unsupported XGBoost objective: {learner['objective']['name']}")
+    gbm = learner["gradient_booster"]
+    if gbm["name"] != "gbtree":
+        raise ValueError(f"Unsupported XGBoost booster: {gbm['name']}")
+
+    trees = []
+    for tree in gbm["model"]["trees"]:
+        if tree.get("categories_nodes"):
+            raise ValueError("Categorical splits are not supported by the compiled engine")
+        trees.append(
+            {
+                "feature": np.asarray(tree["split_indices"]),
+                "threshold": np.asarray(tree["split_conditions"], dtype=np.float32),
+                "left": np.asarray(tree["left_children"]),
+                "right": np.asarray(tree["right_children"]),
+                "default_left": np.asarray(tree["default_left"], dtype=bool),
+                "value": np.asarray(tree["split_conditions"], dtype=np.float32),
+            }
+        )
+
+    base_score = float(str(learner["learner_model_param"]["base_score"]).strip("[]"))
+    base_margin = float(np.log(base_score / (1.0 - base_score)))
+    names = booster.feature_names or [f"f{i}" for i in range(int(learner["learner_model_param"]["num_feature"]))]
+    return _assemble(trees, base_margin, strict_less=True, feature_names=names)
+
+
+def _compile_sklearn_gbm(model: Any) -> CompiledEnsemble:
+    if len(getattr(model, "classes_", [])) != 2:
+        raise ValueError("Only binary GradientBoostingClassifier models can be compiled")
+
+    trees = []
+    for estimator in model.estimators_[:, 0]:
+        t = estimator.tree_
+        missing_left = getattr(t, "missing_go_to_left", None)
+        trees.append(
+            {
+                "feature": t.feature,
+                "threshold": t.threshold,
+                "left": t.children_left,
+                "right": t.children_right,
+                "default_left": np.zeros(t.node_count, dtype=bool) if missing_left is None else missing_left.astype(bool),
+                "value": t.value[:, 0, 0] * model.learning_rate,
+            }
+        )
+
+    if model.init_ == "zero":
+        base_margin = 0.0
+    else:
+        prior = float(np.clip(model.init_.class_prior_[1], 1e-15, 1 - 1e-15))
+        base_margin = float(np.log(prior / (1.0 - prior)))
+    names = getattr(model, "feature_names_in_", [f"f{i}" for i in range(model.n_features_in_)])
+    return _assemble(trees, base_margin, strict_less=False, feature_names=names)
+
+
+def compile_model(model: Any) -> CompiledEnsemble:
+    """Flatten an ``XGBClassifier``/``Booster`` or sklearn ``GradientBoostingClassifier``."""
+    if hasattr(model, "get_booster") or type(model).__name__ == "Booster":
+        return _compile_xgboost(model)
+    if hasattr(model, "estimators_") and hasattr(model, "init_"):
+        return _compile_sklearn_gbm(model)
+    raise TypeError(f"Cannot compile model of type {type(model).__name__}")
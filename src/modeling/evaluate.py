@@ -2,7 +2,10 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 import numpy as np
-from sklearn.metrics import average_precision_score, f1_score, roc_auc_score
+
+DEFAULT_FN_COST = 10.0
+DEFAULT_FP_COST = 1.0
+_BOOTSTRAP_BLOCK_ELEMENTS = 20_000_000
 
 
 @dataclass
@@ -11,16 +14,207 @@ class Metrics:
     pr_auc: float
     f1: float
     expected_cost: float
+    optimal_threshold: float = float("nan")
+    optimal_cost: float = float("nan")
+
+
+@dataclass
+class CostCurve:
+    """Confusion counts and cost at every distinct threshold, highest threshold first.
+
+    Row ``k`` predicts positive for scores ``>= thresholds[k]``. Row 0 sits just
+    above the top score, so it is the predict-nothing operating point.
+    """
+
+    thresholds: np.ndarray
+    tp: np.ndarray
+    fp: np.ndarray
+    fn: np.ndarray
+    cost: np.ndarray
+
+    @property
+    def best(self) -> int:
+        return int(np.argmin(self.cost))
+
+    @property
+    def optimal_threshold(self) -> float:
+        return float(self.thresholds[self.best])
+
+    @property
+    def optimal_cost(self) -> float:
+        return float(self.cost[self.best])
+
+    def at(self, threshold: float) -> int:
+        """Row of the operating point for ``threshold`` (predict positive when ``score >= threshold``).
+
+        A threshold above every score maps to row 0, the predict-nothing point.
+        """
+        return max(int(np.searchsorted(-self.thresholds, -threshold, side="right")) - 1, 0)
+
+
+def _sorted_groups(y_true: np.ndarray, y_proba: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Scores sorted descending, labels in that order, and the last position of each run of tied scores."""
+    y_proba = np.asarray(y_proba, dtype=np.float64)
+    order = np.argsort(-y_proba, kind="mergesort")
+    scores = y_proba[order]
+    labels = np.asarray(y_true)[order].astype(bool)
+    ends = np.append(np.flatnonzero(np.diff(scores)), len(scores) - 1) if len(scores) else np.empty(0, dtype=np.int64)
+    return order, scores, labels, ends
+
+
+def _curve_from_counts(thresholds, tp, fp, n_pos, fn_cost, fp_cost) -> CostCurve:
+    fn = n_pos - tp
+    return CostCurve(thresholds, tp, fp, fn, fn_cost * fn + fp_cost * fp)
+
 
+def cost_curve(
+    y_true: np.ndarray, y_proba: np.ndarray, fn_cost: float = DEFAULT_FN_COST, fp_cost: float = DEFAULT_FP_COST
+) -> CostCurve:
+    """TP/FP/FN and ``fn_cost * FN + fp_cost * FP`` at every distinct threshold, from one sort and two cumsums."""
+    _, scores, labels, ends = _sorted_groups(y_true, y_proba)
+    tp = np.concatenate(([0], np.cumsum(labels)[ends]))
+    fp = np.concatenate(([0], np.cumsum(~labels)[ends]))
+    top = scores[0] if len(scores) else 1.0
+    thresholds = np.concatenate(([np.nextafter(top, np.inf)], scores[ends]))
+    return _curve_from_counts(thresholds, tp, fp, int(labels.sum()), fn_cost, fp_cost)
 
-def evaluate_binary(y_true: np.ndarray, y_proba: np.ndarray, threshold: float = 0.5) -> Metrics:
-    y_pred = (y_proba >= threshold).astype(int)
-    fn = ((y_true == 1) & (y_pred == 0)).sum()
-    fp = ((y_true == 0) & (y_pred == 1)).sum()
-    expected_cost = 10 * fn + 1 * fp
+
+def _auc_from_counts(tp: np.ndarray, fp: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """ROC-AUC (trapezoids) and average precision from cumulative counts along the last axis, row 0 being (0, 0)."""
+    n_pos, n_neg = tp[..., -1:], fp[..., -1:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tpr, fpr = tp / n_pos, fp / n_neg
+        roc = np.sum(np.diff(fpr, axis=-1) * (tpr[..., 1:] + tpr[..., :-1]) / 2, axis=-1)
+        predicted = tp[..., 1:] + fp[..., 1:]
+        precision = np.divide(tp[..., 1:], predicted, out=np.ones(predicted.shape), where=predicted > 0)
+        ap = np.sum(np.diff(tpr, axis=-1) * precision, axis=-1)
+    invalid = (n_pos[..., 0] == 0) | (n_neg[..., 0] == 0)
+    return np.where(invalid, np.nan, roc), np.where(invalid, np.nan, ap)
+
+
+def evaluate_binary(
+    y_true: np.ndarray,
+    y_proba: np.ndarray,
+    threshold: float = 0.5,
+    fn_cost: float = DEFAULT_FN_COST,
+    fp_cost: float = DEFAULT_FP_COST,
+) -> Metrics:
+    """Metrics at ``threshold`` plus the cost-optimal threshold, all from a single sort of the scores.
+
+    AUCs are NaN when only one class is present.
+    """
+    curve = cost_curve(y_true, y_proba, fn_cost=fn_cost, fp_cost=fp_cost)
+    roc_auc, pr_auc = _auc_from_counts(curve.tp.astype(np.float64), curve.fp.astype(np.float64))
+    k = curve.at(threshold)
+    tp, fp, fn = curve.tp[k], curve.fp[k], curve.fn[k]
+    denom = 2 * tp + fp + fn
     return Metrics(
-        roc_auc=roc_auc_score(y_true, y_proba),
-        pr_auc=average_precision_score(y_true, y_proba),
-        f1=f1_score(y_true, y_pred, zero_division=0),
-        expected_cost=float(expected_cost),
+        roc_auc=float(roc_auc),
+        pr_auc=float(pr_auc),
+        f1=float(2 * tp / denom) if denom else 0.0,
+        expected_cost=float(curve.cost[k]),
+        optimal_threshold=curve.optimal_threshold,
+        optimal_cost=curve.optimal_cost,
     )
+
+
+def bootstrap_intervals(
+    y_true: np.ndarray,
+    y_proba: np.ndarray,
+    threshold: float = 0.5,
+    n_boot: int = 200,
+    alpha: float = 0.05,
+    fn_cost: float = DEFAULT_FN_COST,
+    fp_cost: float = DEFAULT_FP_COST,
+    random_state: int = 0,
+) -> dict[str, tuple[float, float]]:
+    """Percentile bootstrap intervals for PR-AUC and expected cost at ``threshold``.
+
+    Scores are sorted once. Each block of resamples is a ``(resamples, n)`` index
+    matrix, turned into per-row counts with one ``bincount``; weighted cumsums
+    along the shared sort order then give every resample's curve at once. Blocks
+    are sized to keep the index matrix near 20M entries.
+    """
+    _, scores, labels, ends = _sorted_groups(y_true, y_proba)
+    n = len(scores)
+    if n == 0:
+        raise ValueError("Cannot bootstrap an empty sample")
+    rng = np.random.default_rng(random_state)
+    # row of the operating point in the per-group counts (0 = predict nothing)
+    k = int(np.searchsorted(-scores[ends], -threshold, side="right"))
+    block = max(1, _BOOTSTRAP_BLOCK_ELEMENTS // n)
+    pr_auc, cost = [], []
+    for start in range(0, n_boot, block):
+        rows = min(block, n_boot - start)
+        # sampled positions index the sorted order directly, so no resample needs its own sort
+        idx = rng.integers(0, n, size=(rows, n)) + (np.arange(rows) * n)[:, None]
+        weights = np.bincount(idx.ravel(), minlength=rows * n).reshape(rows, n)
+        del idx
+        tp = np.cumsum(weights * labels, axis=1)[:, ends]
+        fp = np.cumsum(weights * ~labels, axis=1)[:, ends]
+        tp = np.concatenate((np.zeros((rows, 1)), tp), axis=1)
+        fp = np.concatenate((np.zeros((rows, 1)), fp), axis=1)
+        pr_auc.append(_auc_from_counts(tp, fp)[1])
+        cost.append(fn_cost * (tp[:, -1] - tp[:, k]) + fp_cost * fp[:, k])
+
+    q = [100 * alpha / 2, 100 * (1 - alpha / 2)]
+    out = {}
+    for name, values in (("pr_auc", np.concatenate(pr_auc)), ("expected_cost", np.concatenate(cost))):
+        lo, hi = np.nanpercentile(values, q) if np.isfinite(values).any() else (np.nan, np.nan)
+        out[name] = (float(lo), float(hi))
+    return out
+
+
+class StreamingBinaryMetrics:
+    """Chunk-by-chunk accumulator for ``evaluate_binary``-style metrics.
+
+    Threshold counts are exact. ROC-AUC, PR-AUC and the cost-optimal threshold
+    come from fixed-bin score histograms per class, so memory stays constant and
+    they are accurate to the bin width.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.5,
+        n_bins: int = 10_000,
+        fn_cost: float = DEFAULT_FN_COST,
+        fp_cost: float = DEFAULT_FP_COST,
+    ) -> None:
+        self.threshold = threshold
+        self.n_bins = n_bins
+        self.fn_cost = fn_cost
+        self.fp_cost = fp_cost
+        self.pos_hist = np.zeros(n_bins, dtype=np.int64)
+        self.neg_hist = np.zeros(n_bins, dtype=np.int64)
+        self.tp = self.fp = self.fn = 0
+
+    def update(self, y_true: np.ndarray, y_proba: np.ndarray) -> None:
+        y_true = np.asarray(y_true).astype(bool)
+        y_proba = np.asarray(y_proba, dtype=np.float64)
+        bins = np.clip((y_proba * self.n_bins).astype(np.int64), 0, self.n_bins - 1)
+        self.pos_hist += np.bincount(bins[y_true], minlength=self.n_bins)
+        self.neg_hist += np.bincount(bins[~y_true], minlength=self.n_bins)
+
+        y_pred = y_proba >= self.threshold
+        self.tp += int((y_true & y_pred).sum())
+        self.fp += int((~y_true & y_pred).sum())
+        self.fn += int((y_true & ~y_pred).sum())
+
+    def result(self) -> Metrics:
+        tps = np.concatenate(([0], np.cumsum(self.pos_hist[::-1])))
+        fps = np.concatenate(([0], np.cumsum(self.neg_hist[::-1])))
+        roc_auc, pr_auc = _auc_from_counts(tps.astype(np.float64), fps.astype(np.float64))
+        # row k predicts positive for the top k bins, i.e. scores >= (n_bins - k) / n_bins
+        curve = _curve_from_counts(
+            (self.n_bins - np.arange(self.n_bins + 1)) / self.n_bins, tps, fps, tps[-1], self.fn_cost, self.fp_cost
+        )
+
+        denom = 2 * self.tp + self.fp + self.fn
+        return Metrics(
+            roc_auc=float(roc_auc),
+            pr_auc=float(pr_auc),
+            f1=2 * self.tp / denom if denom else 0.0,
+            expected_cost=float(self.fn_cost * self.fn + self.fp_cost * self.fp),
+            optimal_threshold=min(curve.optimal_threshold, 1.0),
+            optimal_cost=curve.optimal_cost,
+        )
@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import hashlib
+import os
+from pathlib import Path
+from typing import Hashable, Iterator, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.data_loader import DEFAULT_CACHE_DIR, REQUIRED_COLUMNS, open_columns
+from src.feature_store import ASSET_COLUMN
+
+SENSOR_COLUMNS = [c for c in REQUIRED_COLUMNS if c != "failure"]
+_MATRIX_BLOCK_ROWS = 1 << 20
+
+
+def _asset_order(codes: np.ndarray | None) -> np.ndarray | None:
+    """Row order that makes every asset's readings contiguous, or None when they already are."""
+    if codes is None or len(codes) == 0:
+        return None
+    runs = 1 + int(np.count_nonzero(codes[1:] != codes[:-1]))
+    if runs == len(np.unique(codes)):
+        return None
+    return np.argsort(codes, kind="stable")
+
+
+class SequenceDataset:
+    """Fixed-length windows over per-asset telemetry, as strided views rather than copies.
+
+    ``values`` is a row-major ``(rows, features)`` array (in memory or memory-mapped)
+    whose rows are grouped by asset and in time order within each asset.
+    ``windows`` is an ``(n, window_size, features)`` view over it: a window is
+    materialized only when a batch asks for it. Windows that would cross from
+    one asset into the next are excluded, and each window is labelled with the
+    target of its last reading.
+    """
+
+    def __init__(
+        self,
+        values: np.ndarray,
+        labels: np.ndarray,
+        window_size: int,
+        segments: np.ndarray | None = None,
+        feature_names: Sequence[str] | None = None,
+    ) -> None:
+        if values.ndim != 2 or len(values) != len(labels):
+            raise ValueError("values must be (rows, features) with one label per row")
+        if window_size < 1:
+            raise ValueError("window_size must be >= 1")
+        self.values = values
+        self.labels = np.asarray(labels)
+        self.window_size = window_size
+        self.feature_names = list(feature_names) if feature_names is not None else None
+        n_starts = max(len(values) - window_size + 1, 0)
+        if n_starts == 0:
+            self.windows = np.empty((0, window_size, values.shape[1]), dtype=values.dtype)
+            self.starts = np.empty(0, dtype=np.int64)
+        else:
+            self.windows = np.lib.stride_tricks.sliding_window_view(values, window_size, axis=0).transpose(0, 2, 1)
+            if segments is None:
+                self.starts = np.arange(n_starts, dtype=np.int64)
+            else:
+                segments = np.asarray(segments)
+                self.starts = np.flatnonzero(segments[:n_starts] == segments[window_size - 1 :]).astype(np.int64)
+        # asset code and label of each window, both taken at its last reading
+        last = self.starts + window_size - 1
+        self.segments = None if segments is None else np.asarray(segments)[last]
+        self.targets = self.labels[last]
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @property
+    def n_features(self) -> int:
+        return self.values.shape[1]
+
+    def batch(self, index: np.ndarray, dtype: np.dtype = np.float32) -> tuple[np.ndarray, np.ndarray]:
+        """Copy the windows at ``index`` (positions into this dataset) into a ``(batch, window, features)`` array."""
+        index = np.asarray(index)
+        return self.windows[self.starts[index]].astype(dtype, copy=False), self.targets[index]
+
+    def batches(
+        self,
+        batch_size: int = 256,
+        shuffle: bool = True,
+        seed: int | None = None,
+        index: np.ndarray | None = None,
+        dtype: np.dtype = np.float32,
+    ) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+        """Yield ``(X, y)`` batches over ``index`` (default: every window), shuffled by window."""
+        order = np.arange(len(self)) if index is None else np.asarray(index)
+        if shuffle:
+            order = np.random.default_rng(seed).permutation(order)
+        for start in range(0, len(order), batch_size):
+            yield self.batch(order[start : start + batch_size], dtype=dtype)
+
+    def split(self, valid_fraction: float = 0.2) -> tuple[np.ndarray, np.ndarray]:
+        """``(train, valid)`` window positions: the last ``valid_fraction`` of each asset's windows validates.
+
+        Training windows that overlap a validation window of the same asset are
+        dropped, so no reading is seen on both sides.
+        """
+        n = len(self)
+        if n == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        seg = self.segments if self.segments is not None else np.zeros(n, dtype=np.int64)
+        is_start = np.ones(n, dtype=bool)
+        is_start[1:] = seg[1:] != seg[:-1]
+        first = np.maximum.accumulate(np.where(is_start, np.arange(n), 0))
+        counts = np.diff(np.append(np.flatnonzero(is_start), n))
+        size = np.repeat(counts, counts)
+        rank = np.arange(n) - first
+        cut = np.floor(size * (1 - valid_fraction)).astype(np.int64)
+        valid = rank >= cut
+        train = rank < cut - (self.window_size - 1)
+        return np.flatnonzero(train), np.flatnonzero(valid)
+
+    def feature_stats(self, index: np.ndarray | None = None, rows: int = 1_000_000) -> tuple[np.ndarray, np.ndarray]:
+        """Per-feature mean and standard deviation of the readings in the windows at ``index`` (default: all rows).
+
+        Values are read in blocks so memory-mapped data is never loaded whole.
+        """
+        covered = None
+        if index is not None:
+            starts = self.starts[np.asarray(index)]
+            edges = np.zeros(len(self.values) + 1, dtype=np.int64)
+            np.add.at(edges, starts, 1)
+            np.add.at(edges, starts + self.window_size, -1)
+            covered = np.cumsum(edges[:-1]) > 0
+        total = np.zeros(self.n_features)
+        total_sq = np.zeros(self.n_features)
+        n = 0
+        for start in range(0, len(self.values), rows):
+            block = np.asarray(self.values[start : start + rows], dtype=np.float64)
+            if covered is not None:
+                block = block[covered[start : start + rows]]
+            total += block.sum(axis=0)
+            total_sq += np.square(block).sum(axis=0)
+            n += len(block)
+        n = max(n, 1)
+        mean = total / n
+        std = np.sqrt(np.maximum(total_sq / n - mean**2, 0.0))
+        return mean, np.where(std > 0, std, 1.0)
+
+    @classmethod
+    def from_arrays(
+        cls,
+        X: np.ndarray,
+        y: np.ndarray,
+        window_size: int,
+        asset_ids: Sequence[Hashable] | np.ndarray | None = None,
+        feature_names: Sequence[str] | None = None,
+    ) -> SequenceDataset:
+        """Windows over in-memory arrays; rows are regrouped by asset (keeping time order) only if they are interleaved."""
+        values = np.ascontiguousarray(X, dtype=np.float32)
+        y = np.asarray(y)
+        codes = None
+        if asset_ids is not None:
+            codes, _ = pd.factorize(pd.Series(asset_ids, copy=False), use_na_sentinel=False)
+            order = _asset_order(codes)
+            if order is not None:
+                values, y, codes = values[order], y[order], codes[order]
+        return cls(values, y, window_size, segments=codes, feature_names=feature_names)
+
+    @classmethod
+    def from_frame(
+        cls,
+        df: pd.DataFrame,
+        window_size: int,
+        feature_columns: Sequence[str] = SENSOR_COLUMNS,
+        label_column: str = "failure",
+    ) -> SequenceDataset:
+        asset_ids = df[ASSET_COLUMN].to_numpy() if ASSET_COLUMN in df.columns else None
+        return cls.from_arrays(
+            df[list(feature_columns)].to_numpy(dtype=np.float32),
+            df[label_column].to_numpy(),
+            window_size,
+            asset_ids=asset_ids,
+            feature_names=feature_columns,
+        )
+
+    @classmethod
+    def from_cache(
+        cls,
+        path: str,
+        window_size: int,
+        feature_columns: Sequence[str] = SENSOR_COLUMNS,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+    ) -> SequenceDataset:
+        """Windows over a memory-mapped row-major copy of the columnar cache.
+
+        The cache stores one file per column, so the feature columns are interleaved
+        once into a ``sequence-*.npy`` file next to them (grouped by asset), which
+        is then memory-mapped; later calls reuse it.
+        """
+        feature_columns = list(feature_columns)
+        names = feature_columns + ["failure"]
+        probe = open_columns(path, columns=None, cache_dir=cache_dir, decode_assets=False)
+        has_assets = ASSET_COLUMN in probe
+        columns = {name: probe[name] for name in names + ([ASSET_COLUMN] if has_assets else [])}
+        codes = np.asarray(columns[ASSET_COLUMN]) if has_assets else None
+        order = _asset_order(codes)
+
+        entry_dir = Path(columns["failure"].filename).parent
+        key = hashlib.sha256(",".join(feature_columns).encode()).hexdigest()[:12]
+        matrix_path = entry_dir / f"sequence-{key}.npy"
+        if not matrix_path.exists():
+            _write_row_matrix(matrix_path, [columns[c] for c in feature_columns], order)
+        values = np.load(matrix_path, mmap_mode="r")
+
+        labels = np.asarray(columns["failure"])
+        if order is not None:
+            labels, codes = labels[order], codes[order]
+        return cls(values, labels, window_size, segments=codes, feature_names=feature_columns)
+
+
+def _write_row_matrix(path: Path, columns: list[np.ndarray], order: np.ndarray | None) -> None:
+    rows = len(columns[0])
+    tmp = path.with_name(f".{path.name}.tmp-{os.getpid()}")
+    out = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.float32, shape=(rows, len(columns)))
+    for start in range(0, rows, _MATRIX_BLOCK_ROWS):
+        stop = min(start + _MATRIX_BLOCK_ROWS, rows)
+        picked = slice(start, stop) if order is None else order[start:stop]
+        for j, column in enumerate(columns):
+            out[start:stop, j] = column[picked]
+    out.flush()
+    del out
+    os.replace(tmp, path)
@@ -1,22 +1,219 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Hashable, Sequence
+
 import numpy as np
 
+from src.modeling.sequence_data import SequenceDataset
+from src.utils import setup_logger
+
+logger = setup_logger(__name__)
+
+_GRAD_CLIP = 5.0
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 0.5 * (1.0 + np.tanh(0.5 * x))
+
+
+class NumpyLSTM:
+    """Single-layer LSTM over a window, with a logistic head on the last hidden state.
+
+    Inputs are standardized with the ``mean``/``std`` stored on the model, so a
+    trained model scores raw windows. Gate order in the weights is input, forget,
+    output, candidate.
+    """
+
+    def __init__(self, n_features: int, hidden_size: int = 16, seed: int = 0) -> None:
+        rng = np.random.default_rng(seed)
+        h = hidden_size
+        self.hidden_size = h
+        self.params = {
+            "Wx": rng.normal(0, 1 / np.sqrt(n_features), (n_features, 4 * h)).astype(np.float32),
+            "Wh": rng.normal(0, 1 / np.sqrt(h), (h, 4 * h)).astype(np.float32),
+            "b": np.zeros(4 * h, dtype=np.float32),
+            "Wy": rng.normal(0, 1 / np.sqrt(h), (h, 1)).astype(np.float32),
+            "by": np.zeros(1, dtype=np.float32),
+        }
+        self.params["b"][h : 2 * h] = 1.0  # forget-gate bias of 1 keeps early gradients flowing
+        self.mean = np.zeros(n_features, dtype=np.float32)
+        self.std = np.ones(n_features, dtype=np.float32)
+
+    def _forward(self, X: np.ndarray) -> tuple[np.ndarray, list]:
+        p, h = self.params, self.hidden_size
+        X = (X - self.mean) / self.std
+        batch, steps, _ = X.shape
+        h_t = np.zeros((batch, h), dtype=np.float32)
+        c_t = np.zeros((batch, h), dtype=np.float32)
+        # input projections for every step in one matmul
+        xz = X @ p["Wx"] + p["b"]
+        cache = []
+        for t in range(steps):
+            z = xz[:, t] + h_t @ p["Wh"]
+            i, f, o = _sigmoid(z[:, :h]), _sigmoid(z[:, h : 2 * h]), _sigmoid(z[:, 2 * h : 3 * h])
+            g = np.tanh(z[:, 3 * h :])
+            c_prev, h_prev = c_t, h_t
+            c_t = f * c_prev + i * g
+            tanh_c = np.tanh(c_t)
+            h_t = o * tanh_c
+            cache.append((X[:, t], h_prev, c_prev, i, f, o, g, tanh_c))
+        logits = (h_t @ p["Wy"] + p["by"])[:, 0]
+        return logits, cache + [h_t]
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """``(batch,)`` failure probabilities for ``(batch, window, features)`` windows."""
+        return _sigmoid(self._forward(np.asarray(X, dtype=np.float32))[0])
+
+    def loss_and_grads(self, X: np.ndarray, y: np.ndarray, pos_weight: float = 1.0) -> tuple[float, dict]:
+        """Class-weighted binary cross-entropy and its gradients, by backpropagation through time."""
+        p, h = self.params, self.hidden_size
+        logits, cache = self._forward(X)
+        h_last, steps = cache.pop(), cache
+        y = y.astype(np.float32)
+        prob = _sigmoid(logits)
+        eps = 1e-7
+        loss = -np.mean(pos_weight * y * np.log(prob + eps) + (1 - y) * np.log(1 - prob + eps))
+        dlogit = ((pos_weight * y * (prob - 1) + (1 - y) * prob) / len(y)).astype(np.float32)[:, None]
+
+        grads = {name: np.zeros_like(value) for name, value in p.items()}
+        grads["Wy"] = h_last.T @ dlogit
+        grads["by"] = dlogit.sum(axis=0)
+        dh = dlogit @ p["Wy"].T
+        dc = np.zeros_like(dh)
+        for x_t, h_prev, c_prev, i, f, o, g, tanh_c in reversed(steps):
+            dc = dc + dh * o * (1 - tanh_c**2)
+            dz = np.concatenate(
+                [
+                    dc * g * i * (1 - i),
+                    dc * c_prev * f * (1 - f),
+                    dh * tanh_c * o * (1 - o),
+                    dc * i * (1 - g**2),
+                ],
+                axis=1,
+            )
+            grads["Wx"] += x_t.T @ dz
+            grads["Wh"] += h_prev.T @ dz
+            grads["b"] += dz.sum(axis=0)
+            dh = dz @ p["Wh"].T
+            dc = dc * f
+        return float(loss), grads
+
+
+class _Adam:
+    def __init__(self, params: dict, lr: float, beta1: float = 0.9, beta2: float = 0.999) -> None:
+        self.lr, self.beta1, self.beta2 = lr, beta1, beta2
+        self.m = {k: np.zeros_like(v) for k, v in params.items()}
+        self.v = {k: np.zeros_like(v) for k, v in params.items()}
+        self.t = 0
+
+    def step(self, params: dict, grads: dict) -> None:
+        norm = np.sqrt(sum(float(np.square(g).sum()) for g in grads.values()))
+        scale = min(1.0, _GRAD_CLIP / (norm + 1e-12))
+        self.t += 1
+        lr = self.lr * np.sqrt(1 - self.beta2**self.t) / (1 - self.beta1**self.t)
+        for k, g in grads.items():
+            g = g * scale
+            self.m[k] = self.beta1 * self.m[k] + (1 - self.beta1) * g
+            self.v[k] = self.beta2 * self.v[k] + (1 - self.beta2) * g * g
+            params[k] -= (lr * self.m[k] / (np.sqrt(self.v[k]) + 1e-8)).astype(params[k].dtype)
+
 
 @dataclass
 class LSTMTrainingResult:
     message: str
     window_size: int
+    model: NumpyLSTM | None = field(default=None, repr=False)
+    n_windows: int = 0
+    epochs_run: int = 0
+    best_epoch: int = 0
+    best_valid_loss: float = float("nan")
+    train_loss: list[float] = field(default_factory=list)
+    valid_loss: list[float] = field(default_factory=list)
+
+
+def _mean_loss(model: NumpyLSTM, dataset: SequenceDataset, index: np.ndarray, batch_size: int, pos_weight: float) -> float:
+    total = 0.0
+    for X, y in dataset.batches(batch_size, shuffle=False, index=index):
+        prob = model.predict_proba(X)
+        eps = 1e-7
+        total += float(-(pos_weight * y * np.log(prob + eps) + (1 - y) * np.log(1 - prob + eps)).sum())
+    return total / max(len(index), 1)
+
+
+def train_lstm_on_dataset(
+    dataset: SequenceDataset,
+    hidden_size: int = 16,
+    epochs: int = 20,
+    batch_size: int = 256,
+    learning_rate: float = 5e-3,
+    patience: int = 3,
+    valid_fraction: float = 0.2,
+    random_state: int = 42,
+) -> LSTMTrainingResult:
+    """Fit a ``NumpyLSTM`` on shuffled window batches, stopping when validation loss stops improving.
+
+    The last ``valid_fraction`` of each asset's windows is held out and feature
+    scaling is fitted on the training windows only. The weights from the best
+    validation epoch are kept; if no epoch gives a finite validation loss, the
+    weights of the last epoch are.
+    """
+    train_idx, valid_idx = dataset.split(valid_fraction)
+    if len(train_idx) == 0 or len(valid_idx) == 0:
+        return LSTMTrainingResult(
+            message="Insufficient sequence length for LSTM training. Provide more timesteps.",
+            window_size=dataset.window_size,
+            n_windows=len(dataset),
+        )
+
+    model = NumpyLSTM(dataset.n_features, hidden_size=hidden_size, seed=random_state)
+    mean, std = dataset.feature_stats(train_idx)
+    model.mean, model.std = mean.astype(np.float32), std.astype(np.float32)
+    y_train = dataset.targets[train_idx]
+    pos_weight = float(max(1, (y_train == 0).sum()) / max(1, (y_train == 1).sum()))
+    optimizer = _Adam(model.params, learning_rate)
+
+    result = LSTMTrainingResult(message="", window_size=dataset.window_size, n_windows=len(dataset))
+    best_params, best_loss, stale = None, np.inf, 0
+    for epoch in range(1, epochs + 1):
+        losses = []
+        for X, y in dataset.batches(batch_size, seed=random_state + epoch, index=train_idx):
+            loss, grads = model.loss_and_grads(X, y, pos_weight)
+            optimizer.step(model.params, grads)
+            losses.append(loss)
+        valid_loss = _mean_loss(model, dataset, valid_idx, batch_size, pos_weight)
+        result.train_loss.append(float(np.mean(losses)))
+        result.valid_loss.append(valid_loss)
+        result.epochs_run = epoch
+        logger.info("epoch %d train_loss=%.4f valid_loss=%.4f", epoch, result.train_loss[-1], valid_loss)
+        if valid_loss < best_loss - 1e-4:
+            best_params, best_loss, stale = {k: v.copy() for k, v in model.params.items()}, valid_loss, 0
+            result.best_epoch = epoch
+        else:
+            stale += 1
+            if stale >= patience:
+                break
+
+    if best_params is not None:
+        model.params = best_params
+        result.best_valid_loss = float(best_loss)
+    result.model = model
+    stopped = "early stopping" if result.epochs_run < epochs else "all epochs"
+    result.message = f"Trained on {len(train_idx)} windows ({stopped}); best epoch {result.best_epoch}."
+    return result
 
 
-def train_lstm_sequence_model(X: np.ndarray, y: np.ndarray, window_size: int = 20) -> LSTMTrainingResult:
+def train_lstm_sequence_model(
+    X: np.ndarray,
+    y: np.ndarray,
+    window_size: int = 20,
+    asset_ids: Sequence[Hashable] | np.ndarray | None = None,
+    **kwargs,
+) -> LSTMTrainingResult:
+    """Train on ``(rows, features)`` telemetry in time order; ``kwargs`` go to ``train_lstm_on_dataset``."""
     if len(X) < window_size:
         return LSTMTrainingResult(
             message="Insufficient sequence length for LSTM training. Provide more timesteps.",
             window_size=window_size,
         )
-    return LSTMTrainingResult(
-        message="LSTM extension scaffolded. Integrate torch training loop and early stopping for production.",
-        window_size=window_size,
-    )
+    return train_lstm_on_dataset(SequenceDataset.from_arrays(X, y, window_size, asset_ids=asset_ids), **kwargs)
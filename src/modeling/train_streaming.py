@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import os
+import tempfile
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from monitoring.streaming_drift import HistogramSketch
+from src.config import ProjectConfig
+from src.data_loader import DEFAULT_CHUNKSIZE, iter_dataset_chunks
+from src.feature_engineering import FeatureTransformer
+from src.feature_store import ASSET_COLUMN, ChunkedRollingFeatures
+from src.modeling.evaluate import StreamingBinaryMetrics
+from src.modeling.train_xgboost import XGB_PARAMS, full_training_lineage, save_model_artifact, training_summary
+from src.utils import setup_logger
+
+logger = setup_logger(__name__)
+
+_MAX_BIN = 256
+
+
+def _splitmix64(x: np.ndarray) -> np.ndarray:
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def stratified_test_mask(labels: np.ndarray, seen: dict[int, int], test_size: float, seed: int) -> np.ndarray:
+    """Assign rows to the test split class by class, from each row's rank within its class.
+
+    Every ``1 / test_size``-th row of a class (at a seed-dependent phase) is held
+    out, so each class lands in the test split at ``test_size`` up to rounding and
+    the first row of every class is always held out; a class with any rows never
+    leaves the test split empty. ``seen`` carries the per-class ranks across
+    chunks, which makes the split the same for any chunking.
+    """
+    labels = np.asarray(labels)
+    mask = np.zeros(len(labels), dtype=bool)
+    for label in np.unique(labels):
+        rows = np.flatnonzero(labels == label)
+        start = seen.get(int(label), 0)
+        seen[int(label)] = start + len(rows)
+        # phase in [1 - test_size, 1): the class's first row is always a test row
+        u = _splitmix64(np.array([seed * 2 + int(label)], dtype=np.uint64)) >> np.uint64(11)
+        phase = 1.0 - test_size * (1.0 - float(u[0]) * 2.0**-53)
+        rank = np.arange(start, start + len(rows), dtype=np.float64)
+        mask[rows] = np.floor((rank + 1) * test_size + phase) > np.floor(rank * test_size + phase)
+    return mask
+
+
+class _FeatureChunks:
+    """Re-iterable source of ``(features, labels, is_test)`` chunks built from the raw dataset."""
+
+    def __init__(
+        self,
+        data_path: str,
+        chunksize: int,
+        use_cache: bool,
+        test_size: float,
+        seed: int,
+    ) -> None:
+        self.data_path = data_path
+        self.chunksize = chunksize
+        self.use_cache = use_cache
+        self.test_size = test_size
+        self.seed = seed
+        # out-of-core medians: taken from the first chunk, which keeps imputation one-pass
+        first = next(self._raw_chunks(), None)
+        if first is None:
+            raise ValueError(f"Dataset at {data_path} is empty")
+        self.transformer = FeatureTransformer.fit(first)
+
+    def _raw_chunks(self, columns: list[str] | None = None) -> Iterator[pd.DataFrame]:
+        return iter_dataset_chunks(self.data_path, self.chunksize, columns=columns, use_cache=self.use_cache)
+
+    def label_counts(self) -> tuple[int, int]:
+        """``(positives, negatives)`` in the training split, reading only the label column."""
+        pos = neg = 0
+        seen: dict[int, int] = {}
+        for chunk in self._raw_chunks(columns=["failure"]):
+            y = chunk["failure"].to_numpy(dtype=np.int64)
+            train = ~stratified_test_mask(y, seen, self.test_size, self.seed)
+            pos += int((y[train] == 1).sum())
+            neg += int((y[train] == 0).sum())
+        return pos, neg
+
+    def __iter__(self) -> Iterator[tuple[pd.DataFrame, np.ndarray, np.ndarray]]:
+        rolling = ChunkedRollingFeatures()
+        seen: dict[int, int] = {}
+        for chunk in self._raw_chunks():
+            assets = chunk[ASSET_COLUMN].to_numpy() if ASSET_COLUMN in chunk.columns else None
+            torque = self.transformer.column(chunk, "torque")
+            feats = self.transformer.frame(chunk, rolling=rolling.transform(torque, assets))
+            y = chunk["failure"].to_numpy(dtype=np.int64)
+            yield feats, y, stratified_test_mask(y, seen, self.test_size, self.seed)
+
+
+def _streamed_baseline(sketch: HistogramSketch, total: np.ndarray, total_sq: np.ndarray, n: np.ndarray) -> dict:
+    """``build_monitoring_baseline``'s ``{mean, std, p95}`` from streamed sums and the sketch's histogram."""
+    n = np.maximum(n, 1)
+    mean = total / n
+    std = np.sqrt(np.maximum(total_sq / n - mean**2, 0.0))
+    p95 = sketch.quantile(0.95)
+    return {
+        col: {"mean": float(mean[j]), "std": float(std[j]), "p95": float(p95[j])}
+        for j, col in enumerate(sketch.features)
+    }
+
+
+class _TrainSplitIter(xgb.DataIter):
+    """Feeds the training rows of each chunk to XGBoost's external-memory builder."""
+
+    def __init__(self, chunks: _FeatureChunks, cache_prefix: str) -> None:
+        self._chunks = chunks
+        self._it: Iterator | None = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data) -> bool:
+        if self._it is None:
+            self._it = iter(self._chunks)
+        for X, y, is_test in self._it:
+            train = ~is_test
+            if train.any():
+                input_data(data=X[train], label=y[train])
+                return True
+        return False
+
+    def reset(self) -> None:
+        self._it = None
+
+
+def train_xgboost_streaming(
+    data_path: str,
+    model_path: str,
+    random_state: int = 42,
+    use_cache: bool = False,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    test_size: float = 0.2,
+    cache_dir: str | None = None,
+    params: dict | None = None,
+) -> dict:
+    """Train on data larger than RAM; peak memory scales with ``chunksize``, not dataset size."""
+    chunks = _FeatureChunks(data_path, chunksize, use_cache, test_size, random_state)
+    pos, neg = chunks.label_counts()
+    scale_pos_weight = max(1, neg) / max(1, pos)
+
+    model_params = {**XGB_PARAMS, **(params or {})}
+    booster_params = {k: v for k, v in model_params.items() if k != "n_estimators"}
+    booster_params.update(seed=random_state, scale_pos_weight=scale_pos_weight, tree_method="hist", max_bin=_MAX_BIN)
+
+    with tempfile.TemporaryDirectory(dir=cache_dir) as tmp:
+        dtrain = xgb.ExtMemQuantileDMatrix(_TrainSplitIter(chunks, os.path.join(tmp, "train")), max_bin=_MAX_BIN)
+        booster = xgb.train(booster_params, dtrain, num_boost_round=model_params["n_estimators"])
+        del dtrain
+
+    cfg = ProjectConfig()
+    acc = StreamingBinaryMetrics(threshold=0.5, fn_cost=cfg.fn_cost, fp_cost=cfg.fp_cost)
+    sketch: HistogramSketch | None = None
+    total = total_sq = observed = 0
+    for X, y, is_test in chunks:
+        if sketch is None:
+            # bin edges come from the first chunk; later outliers land in the overflow bins
+            sketch = HistogramSketch.fit_edges(X)
+        sketch.update(X)
+        values = X[sketch.features].to_numpy(dtype=np.float64)
+        total = total + np.nansum(values, axis=0)
+        total_sq = total_sq + np.nansum(values**2, axis=0)
+        observed = observed + (~np.isnan(values)).sum(axis=0)
+        if is_test.any():
+            acc.update(y[is_test], booster.inplace_predict(X[is_test]))
+    metrics = acc.result()
+
+    model = xgb.XGBClassifier(**model_params, random_state=random_state, scale_pos_weight=scale_pos_weight)
+    model.load_model(bytearray(booster.save_raw("ubj")))
+    save_model_artifact(
+        model,
+        metrics,
+        model_path,
+        extra={
+            "params": model_params,
+            "scale_pos_weight": scale_pos_weight,
+            "lineage": full_training_lineage(data_path),
+            "monitoring_baseline": _streamed_baseline(sketch, total, total_sq, observed),
+        },
+        reference_sketch=sketch,
+        transformer=chunks.transformer,
+    )
+    logger.info("Streaming training used %d positive / %d negative training rows", pos, neg)
+    return training_summary(metrics, scale_pos_weight, model)
@@ -1,62 +1,198 @@
 from __future__ import annotations
 
 import argparse
+import time
 from dataclasses import asdict
+from pathlib import Path
 from typing import Any
 
-import joblib
 import numpy as np
-from sklearn.ensemble import GradientBoostingClassifier
-from sklearn.model_selection import train_test_split
 
+from monitoring.streaming_drift import HistogramSketch, drift_reference_path
 from src.config import ProjectConfig
-from src.data_loader import load_dataset
-from src.feature_engineering import FEATURE_COLUMNS, build_features
+from src.data_loader import DEFAULT_CACHE_DIR, DEFAULT_CHUNKSIZE, load_dataset, source_digest
+from src.explainability.shap_analysis import build_explainer
+from src.feature_engineering import FEATURE_COLUMNS, FeatureTransformer
+from src.modeling.artifact import COMPILED_NAME, DRIFT_REFERENCE_NAME, write_artifact
+from src.modeling.compiled_model import CompiledEnsemble, compile_model, compiled_model_path
 from src.modeling.evaluate import Metrics, evaluate_binary
-from src.preprocessing import preprocess
-from src.utils import ensure_parent_dir, setup_logger
+from src.monitoring_report import build_monitoring_baseline
+from src.tracking import RunTracker
+from src.utils import ensure_parent_dir, peak_rss_mb, setup_logger
 
 logger = setup_logger(__name__)
 
 
-def _resolve_model(scale_pos_weight: float, random_state: int) -> Any:
-    """Prefer XGBoost when installed, fallback to sklearn for constrained environments."""
+XGB_PARAMS = {
+    "n_estimators": 300,
+    "max_depth": 5,
+    "learning_rate": 0.05,
+    "subsample": 0.9,
+    "colsample_bytree": 0.9,
+    "objective": "binary:logistic",
+    "eval_metric": "aucpr",
+}
+
+
+_SHARED_SKLEARN_PARAMS = ("n_estimators", "max_depth", "learning_rate", "subsample")
+
+
+def resolve_model(scale_pos_weight: float, random_state: int, params: dict | None = None) -> Any:
+    """Prefer XGBoost when installed, fallback to sklearn for constrained environments.
+
+    ``params`` overrides entries of ``XGB_PARAMS`` (for example a tuned config).
+    """
+    params = params or {}
     try:
         from xgboost import XGBClassifier
 
         logger.info("Using XGBoost backend")
         return XGBClassifier(
-            n_estimators=300,
-            max_depth=5,
-            learning_rate=0.05,
-            subsample=0.9,
-            colsample_bytree=0.9,
-            objective="binary:logistic",
-            eval_metric="aucpr",
-            random_state=random_state,
-            scale_pos_weight=scale_pos_weight,
+            **{**XGB_PARAMS, **params}, random_state=random_state, scale_pos_weight=scale_pos_weight
         )
     except Exception as exc:  # pragma: no cover - only used when xgboost is unavailable
         logger.warning("XGBoost unavailable (%s). Falling back to GradientBoostingClassifier.", exc)
-        return GradientBoostingClassifier(random_state=random_state)
+        from sklearn.ensemble import GradientBoostingClassifier
+
+        shared = {k: v for k, v in params.items() if k in _SHARED_SKLEARN_PARAMS}
+        return GradientBoostingClassifier(random_state=random_state, **shared)
+
+
+def _explainer_expected_value(model: Any) -> float | None:
+    explainer = build_explainer(model)
+    if explainer is None:
+        return None
+    value = np.ravel(np.asarray(explainer.expected_value, dtype=float))
+    return float(value[-1]) if value.size else None
+
+
+def save_model_artifact(
+    model: Any,
+    metrics: Metrics,
+    model_path: str,
+    extra: dict | None = None,
+    reference_sketch: HistogramSketch | None = None,
+    legacy_pickle: bool = True,
+    transformer: FeatureTransformer | None = None,
+) -> None:
+    """Write the artifact directory plus its compiled export and, when given, the drift reference sketch.
+
+    ``transformer`` is stored in the manifest so scoring and serving reuse the
+    training medians. ``legacy_pickle`` also writes the old single-file joblib dict at ``model_path``
+    for consumers that have not moved to ``load_artifact`` yet.
+    """
+    ensure_parent_dir(model_path)
+    metadata = {
+        "features": transformer.feature_names if transformer is not None else FEATURE_COLUMNS,
+        "metrics": asdict(metrics),
+        "backend": type(model).__name__,
+        "explainer_expected_value": _explainer_expected_value(model),
+        **(extra or {}),
+    }
+    if transformer is not None:
+        metadata["transformer"] = transformer.to_dict()
+    compiled = _compile_or_none(model)
+
+    def companions(directory: Path) -> None:
+        if compiled is not None:
+            compiled.save(directory / COMPILED_NAME)
+        if reference_sketch is not None:
+            reference_sketch.save(directory / DRIFT_REFERENCE_NAME)
+
+    write_artifact(model, metadata, model_path, companions=companions)
+    if legacy_pickle:
+        import joblib
 
+        joblib.dump({"model": model, **metadata}, model_path)
+    _write_compiled(compiled, model_path)
+    if reference_sketch is not None:
+        reference_sketch.save(drift_reference_path(model_path))
 
-def train_xgboost(data_path: str, model_path: str, random_state: int = 42) -> dict:
-    df = preprocess(load_dataset(data_path))
-    feat_df = build_features(df)
 
-    X = feat_df[FEATURE_COLUMNS]
-    y = feat_df["failure"].astype(int)
+def full_training_lineage(data_path: str, rows: int | None = None, cache_dir: str = DEFAULT_CACHE_DIR) -> dict:
+    """Lineage for a model trained from scratch; warm-start updates chain onto it (``src.modeling.update``)."""
+    digest = source_digest(data_path, cache_dir=cache_dir)
+    return {"mode": "full", "parents": [], "data": {"path": str(data_path), "digest": digest, "rows": rows}}
+
+
+def training_summary(metrics: Metrics, scale_pos_weight: float, model: Any) -> dict:
+    return {
+        "roc_auc": metrics.roc_auc,
+        "pr_auc": metrics.pr_auc,
+        "f1": metrics.f1,
+        "expected_cost": metrics.expected_cost,
+        "optimal_threshold": metrics.optimal_threshold,
+        "optimal_cost": metrics.optimal_cost,
+        "scale_pos_weight": scale_pos_weight,
+        "backend": type(model).__name__,
+    }
+
+
+def train_xgboost(
+    data_path: str,
+    model_path: str,
+    random_state: int = 42,
+    use_cache: bool = False,
+    streaming: bool = False,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    params: dict | None = None,
+    extra: dict | None = None,
+) -> dict:
+    if streaming:
+        from src.modeling.train_streaming import train_xgboost_streaming
+
+        return train_xgboost_streaming(
+            data_path, model_path, random_state=random_state, use_cache=use_cache, chunksize=chunksize, params=params
+        )
+
+    df = load_dataset(data_path, use_cache=use_cache)
+    transformer = FeatureTransformer.fit(df)
+    X = transformer.frame(df)
+    y = df["failure"].astype(int)
+
+    model, metrics, scale_pos_weight = fit_model(X, y, random_state=random_state, params=params)
+    extra = {
+        "params": {**XGB_PARAMS, **(params or {})},
+        "scale_pos_weight": scale_pos_weight,
+        "lineage": full_training_lineage(data_path, len(df)),
+        "monitoring_baseline": build_monitoring_baseline(X),
+        **(extra or {}),
+    }
+    save_model_artifact(
+        model,
+        metrics,
+        model_path,
+        extra=extra,
+        reference_sketch=HistogramSketch.from_reference(X),
+        transformer=transformer,
+    )
+    return training_summary(metrics, scale_pos_weight, model)
+
+
+def fit_model(
+    X: Any,
+    y: Any,
+    random_state: int = 42,
+    test_size: float = 0.2,
+    params: dict | None = None,
+    fn_cost: float | None = None,
+    fp_cost: float | None = None,
+) -> tuple[Any, Metrics, float]:
+    """Fit on a stratified split of ``X``/``y`` and score the held-out part.
+
+    The error costs default to ``ProjectConfig``'s ``fn_cost``/``fp_cost``.
+    """
+    from sklearn.model_selection import train_test_split
 
     X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=random_state, stratify=y
+        X, y, test_size=test_size, random_state=random_state, stratify=y
     )
 
     pos = max(1, int((y_train == 1).sum()))
     neg = max(1, int((y_train == 0).sum()))
     scale_pos_weight = neg / pos
 
-    model = _resolve_model(scale_pos_weight=scale_pos_weight, random_state=random_state)
+    model = resolve_model(scale_pos_weight=scale_pos_weight, random_state=random_state, params=params)
     model.fit(X_train, y_train)
 
     if hasattr(model, "predict_proba"):
@@ -65,54 +201,98 @@ def train_xgboost(data_path: str, model_path: str, random_state: int = 42) -> di
         raw = model.decision_function(X_test)
         y_proba = 1 / (1 + np.exp(-raw))
 
-    metrics: Metrics = evaluate_binary(np.asarray(y_test), np.asarray(y_proba), threshold=0.5)
+    cfg = ProjectConfig()
+    metrics: Metrics = evaluate_binary(
+        np.asarray(y_test),
+        np.asarray(y_proba),
+        threshold=0.5,
+        fn_cost=cfg.fn_cost if fn_cost is None else fn_cost,
+        fp_cost=cfg.fp_cost if fp_cost is None else fp_cost,
+    )
+    return model, metrics, scale_pos_weight
 
-    ensure_parent_dir(model_path)
-    artifact = {
-        "model": model,
-        "features": FEATURE_COLUMNS,
-        "metrics": asdict(metrics),
-        "backend": type(model).__name__,
-    }
-    joblib.dump(artifact, model_path)
 
-    return {
-        "roc_auc": metrics.roc_auc,
-        "pr_auc": metrics.pr_auc,
-        "f1": metrics.f1,
-        "expected_cost": metrics.expected_cost,
-        "scale_pos_weight": scale_pos_weight,
-        "backend": type(model).__name__,
-    }
+def _compile_or_none(model: Any) -> CompiledEnsemble | None:
+    try:
+        return compile_model(model)
+    except (TypeError, ValueError) as exc:
+        logger.warning("Compiled model export skipped: %s", exc)
+        return None
 
 
-def _log_with_mlflow(metrics: dict[str, float | str], data_path: str, cfg: ProjectConfig) -> None:
-    try:
-        import mlflow
+def _write_compiled(compiled: CompiledEnsemble | None, model_path: str) -> str | None:
+    out_path = compiled_model_path(model_path)
+    if compiled is None:
+        # never leave an export of a previous model next to this artifact
+        out_path.unlink(missing_ok=True)
+        return None
+    compiled.save(out_path)
+    return str(out_path)
+
+
+def export_compiled_model(model: Any, model_path: str) -> str | None:
+    """Write the NumPy inference export next to ``model_path`` for lightweight serving."""
+    return _write_compiled(_compile_or_none(model), model_path)
 
-        mlflow.set_tracking_uri(cfg.mlflow_tracking_uri)
-        mlflow.set_experiment(cfg.mlflow_experiment)
-        with mlflow.start_run(run_name="xgboost_baseline"):
-            for key, value in metrics.items():
-                if isinstance(value, (int, float)):
-                    mlflow.log_metric(key, float(value))
-                else:
-                    mlflow.log_param(key, value)
-            mlflow.log_param("data_path", data_path)
-    except Exception as exc:  # pragma: no cover
-        logger.warning("MLflow logging skipped: %s", exc)
+
+def _train_or_update(args: argparse.Namespace, cfg: ProjectConfig) -> dict:
+    if args.update:
+        from src.modeling.update import update_xgboost
+
+        summary = update_xgboost(
+            args.data_path,
+            args.model_path,
+            rounds=args.rounds,
+            replay_path=args.replay_path,
+            replay_rows=args.replay_rows,
+            holdout_fraction=args.holdout_fraction,
+            tolerance=args.tolerance,
+            random_state=cfg.random_state,
+            use_cache=args.use_cache,
+            cache_dir=args.cache_dir,
+        )
+        logger.info("Update %s: %s", "promoted" if summary["promoted"] else "rejected", summary)
+        return summary
+
+    metrics = train_xgboost(
+        args.data_path,
+        args.model_path,
+        random_state=cfg.random_state,
+        use_cache=args.use_cache,
+        streaming=args.streaming,
+        chunksize=args.chunksize,
+    )
+    logger.info("Training complete: %s", metrics)
+    return metrics
 
 
 def main() -> None:
     parser = argparse.ArgumentParser()
     parser.add_argument("--data-path", default=ProjectConfig().data_path)
     parser.add_argument("--model-path", default=ProjectConfig().model_path)
+    parser.add_argument("--use-cache", action="store_true", help="Read the dataset through the columnar cache")
+    parser.add_argument("--streaming", action="store_true", help="Train out of core from dataset chunks")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    update = parser.add_argument_group("warm-start update (--data-path holds only the new readings)")
+    update.add_argument("--update", action="store_true", help="Continue boosting the model at --model-path")
+    update.add_argument("--rounds", type=int, default=50, help="Trees to add")
+    update.add_argument("--replay-path", help="Older dataset to mix a replay sample from")
+    update.add_argument("--replay-rows", type=int, default=0)
+    update.add_argument("--holdout-fraction", type=float, default=0.2, help="Newest share of the new data held out")
+    update.add_argument("--tolerance", type=float, default=0.0, help="Allowed PR-AUC drop / relative cost increase")
+    update.add_argument(
+        "--cache-dir", default=DEFAULT_CACHE_DIR, help="Columnar cache and digest index for the new and replay data"
+    )
     args = parser.parse_args()
 
     cfg = ProjectConfig()
-    metrics = train_xgboost(args.data_path, args.model_path, random_state=cfg.random_state)
-    _log_with_mlflow(metrics, args.data_path, cfg)
-    logger.info("Training complete: %s", metrics)
+    tracker = RunTracker("xgboost_update" if args.update else "xgboost_baseline", cfg=cfg)
+    tracker.log_params({"data_path": args.data_path, "model_path": args.model_path})
+    with tracker:
+        start = time.perf_counter()
+        summary = _train_or_update(args, cfg)
+        tracker.log_metrics({**summary, "train_seconds": time.perf_counter() - start, "peak_rss_mb": peak_rss_mb()})
+        tracker.log_params({k: v for k, v in summary.items() if isinstance(v, (str, bool))})
 
 
 if __name__ == "__main__":
@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from multiprocessing import resource_tracker, shared_memory
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from src.config import ProjectConfig
+from src.data_loader import load_dataset
+from src.feature_engineering import FeatureTransformer
+from src.modeling.evaluate import evaluate_binary
+from src.modeling.train_xgboost import resolve_model, train_xgboost
+from src.utils import setup_logger
+
+logger = setup_logger(__name__)
+
+DEFAULT_GRID: dict[str, list] = {
+    "n_estimators": [150, 300, 500],
+    "max_depth": [3, 5, 7],
+    "learning_rate": [0.03, 0.05, 0.1],
+    "subsample": [0.8, 0.9, 1.0],
+    "colsample_bytree": [0.8, 0.9, 1.0],
+}
+
+
+@dataclass
+class CandidateResult:
+    params: dict
+    pr_auc_mean: float
+    pr_auc_std: float
+    expected_cost_mean: float
+    expected_cost_std: float
+    roc_auc_mean: float
+    fit_seconds: float
+
+
+def parameter_candidates(grid: dict[str, list], n_iter: int | None = None, random_state: int = 42) -> list[dict]:
+    """Every grid combination, or ``n_iter`` of them drawn without replacement (random search)."""
+    names = sorted(grid)
+    combos = [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+    if n_iter is None or n_iter >= len(combos):
+        return combos
+    rng = np.random.default_rng(random_state)
+    return [combos[i] for i in rng.choice(len(combos), size=n_iter, replace=False)]
+
+
+class _SharedArray:
+    """A NumPy array placed once in POSIX shared memory; workers attach by name instead of unpickling it."""
+
+    def __init__(self, arr: np.ndarray) -> None:
+        arr = np.ascontiguousarray(arr)
+        self.shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+        np.ndarray(arr.shape, dtype=arr.dtype, buffer=self.shm.buf)[...] = arr
+        self.spec = (self.shm.name, arr.shape, arr.dtype.str)
+
+    def release(self) -> None:
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _attach(spec: tuple) -> tuple[shared_memory.SharedMemory, np.ndarray]:
+    name, shape, dtype = spec
+    if sys.version_info >= (3, 13):
+        shm = shared_memory.SharedMemory(name=name, track=False)
+    else:
+        shm = shared_memory.SharedMemory(name=name)
+        # only the creating process may unlink the block; stop this worker's tracker from doing it
+        resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore[attr-defined]
+    return shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+_WORKER: dict[str, Any] = {}
+
+
+def _init_worker(x_spec: tuple, y_spec: tuple, fold_spec: tuple, random_state: int, threads: int) -> None:
+    handles = [_attach(spec) for spec in (x_spec, y_spec, fold_spec)]
+    _WORKER.update(
+        handles=[h for h, _ in handles],
+        X=handles[0][1],
+        y=handles[1][1],
+        folds=handles[2][1],
+        random_state=random_state,
+        threads=threads,
+    )
+
+
+def _score_fold(task: tuple[int, dict, int]) -> tuple[int, int, float, float, float, float]:
+    candidate, params, fold = task
+    X, y, folds = _WORKER["X"], _WORKER["y"], _WORKER["folds"]
+    train, test = folds != fold, folds == fold
+
+    pos = max(1, int(y[train].sum()))
+    neg = max(1, int(train.sum()) - pos)
+    model = resolve_model(neg / pos, _WORKER["random_state"], params={**params, "n_jobs": _WORKER["threads"]})
+    start = time.perf_counter()
+    model.fit(X[train], y[train])
+    elapsed = time.perf_counter() - start
+    cfg = ProjectConfig()
+    m = evaluate_binary(y[test], model.predict_proba(X[test])[:, 1], fn_cost=cfg.fn_cost, fp_cost=cfg.fp_cost)
+    return candidate, fold, float(m.pr_auc), float(m.expected_cost), float(m.roc_auc), elapsed
+
+
+def cross_validate_candidates(
+    X: np.ndarray,
+    y: np.ndarray,
+    candidates: list[dict],
+    n_folds: int = 5,
+    n_jobs: int = 1,
+    random_state: int = 42,
+    threads_per_worker: int = 1,
+) -> list[CandidateResult]:
+    """Stratified K-fold CV of every candidate, ranked by PR-AUC then expected cost.
+
+    ``X``, ``y`` and the fold assignment are copied into shared memory once;
+    each (candidate, fold) task ships only its parameter dict.
+    """
+    from sklearn.model_selection import StratifiedKFold
+
+    folds = np.empty(len(y), dtype=np.int8)
+    splitter = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=random_state)
+    for k, (_, test_idx) in enumerate(splitter.split(np.zeros(len(y)), y)):
+        folds[test_idx] = k
+
+    X = np.asarray(X, dtype=np.float32)
+    y = np.asarray(y, dtype=np.int8)
+    tasks = [(c, params, fold) for c, params in enumerate(candidates) for fold in range(n_folds)]
+    workers = min(n_jobs if n_jobs > 0 else os.cpu_count() or 1, len(tasks))
+    if workers == 1:
+        _WORKER.update(X=X, y=y, folds=folds, random_state=random_state, threads=threads_per_worker)
+        try:
+            scores = [_score_fold(t) for t in tasks]
+        finally:
+            _WORKER.clear()
+    else:
+        shared = [_SharedArray(X), _SharedArray(y), _SharedArray(folds)]
+        try:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=mp.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(*(s.spec for s in shared), random_state, threads_per_worker),
+            ) as pool:
+                scores = list(pool.map(_score_fold, tasks, chunksize=1))
+        finally:
+            for s in shared:
+                s.release()
+
+    per_candidate: dict[int, list[tuple]] = {}
+    for candidate, _, pr_auc, cost, roc_auc, seconds in scores:
+        per_candidate.setdefault(candidate, []).append((pr_auc, cost, roc_auc, seconds))
+
+    results = []
+    for candidate, rows in per_candidate.items():
+        arr = np.asarray(rows, dtype=float)
+        results.append(
+            CandidateResult(
+                params=candidates[candidate],
+                pr_auc_mean=float(arr[:, 0].mean()),
+                pr_auc_std=float(arr[:, 0].std()),
+                expected_cost_mean=float(arr[:, 1].mean()),
+                expected_cost_std=float(arr[:, 1].std()),
+                roc_auc_mean=float(np.nanmean(arr[:, 2])),
+                fit_seconds=float(arr[:, 3].sum()),
+            )
+        )
+    return sorted(results, key=lambda r: (-r.pr_auc_mean, r.expected_cost_mean))
+
+
+def tune(
+    data_path: str,
+    model_path: str,
+    grid: dict[str, list] | None = None,
+    n_iter: int | None = None,
+    n_folds: int = 5,
+    n_jobs: int = 1,
+    random_state: int = 42,
+    test_size: float = 0.2,
+    top_k: int = 10,
+) -> dict:
+    """Search on the training split, then retrain with the best config and store it in the artifact.
+
+    The search never sees the rows ``train_xgboost`` holds out, so the metrics it
+    reports stay an unbiased estimate for the tuned model.
+    """
+    from sklearn.model_selection import train_test_split
+
+    df = load_dataset(data_path)
+    X = FeatureTransformer.fit(df).transform(df)
+    y = df["failure"].astype(int).to_numpy()
+    X_train, _, y_train, _ = train_test_split(X, y, test_size=test_size, random_state=random_state, stratify=y)
+
+    candidates = parameter_candidates(grid or DEFAULT_GRID, n_iter=n_iter, random_state=random_state)
+    logger.info("Evaluating %d candidates x %d folds on %d worker(s)", len(candidates), n_folds, n_jobs)
+    results = cross_validate_candidates(
+        X_train, y_train, candidates, n_folds=n_folds, n_jobs=n_jobs, random_state=random_state
+    )
+
+    best = results[0]
+    tuning = {
+        "n_candidates": len(candidates),
+        "n_folds": n_folds,
+        "ranked_by": ["pr_auc_mean desc", "expected_cost_mean asc"],
+        "results": [asdict(r) for r in results[:top_k]],
+    }
+    metrics = train_xgboost(
+        data_path, model_path, random_state=random_state, params=best.params, extra={"tuning": tuning}
+    )
+    return {"best_params": best.params, "cv": asdict(best), "holdout": metrics}
+
+
+def main() -> None:
+    cfg = ProjectConfig()
+    parser = argparse.ArgumentParser(description="Cross-validated hyperparameter search for the failure model")
+    parser.add_argument("--data-path", default=cfg.data_path)
+    parser.add_argument("--model-path", default=cfg.model_path)
+    parser.add_argument("--grid", help="JSON file mapping parameter names to candidate value lists")
+    parser.add_argument("--n-iter", type=int, default=None, help="Random search: sample this many grid points")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Worker processes (-1 = all cores)")
+    args = parser.parse_args()
+
+    grid = json.loads(Path(args.grid).read_text()) if args.grid else None
+    summary = tune(
+        args.data_path,
+        args.model_path,
+        grid=grid,
+        n_iter=args.n_iter,
+        n_folds=args.folds,
+        n_jobs=args.n_jobs,
+        random_state=cfg.random_state,
+        test_size=cfg.test_size,
+    )
+    logger.info("Best config: %s", summary["best_params"])
+    logger.info("Cross-validated: %s", summary["cv"])
+    logger.info("Holdout: %s", summary["holdout"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import time
+from dataclasses import asdict
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from monitoring.streaming_drift import HistogramSketch, drift_reference_path
+from src.config import ProjectConfig
+from src.data_loader import DEFAULT_CACHE_DIR, file_digest, load_dataset, open_columns, source_digest
+from src.feature_engineering import SENSOR_FEATURES, FeatureTransformer
+from src.feature_store import ASSET_COLUMN, rolling_torque_features
+from src.modeling.artifact import DRIFT_REFERENCE_NAME, ModelArtifact, load_artifact, load_transformer
+from src.modeling.evaluate import Metrics, evaluate_binary
+from src.modeling.train_xgboost import XGB_PARAMS, save_model_artifact, training_summary
+from src.monitoring_report import build_monitoring_baseline
+from src.utils import setup_logger
+
+logger = setup_logger(__name__)
+
+REPLAY_BLOCK_ROWS = 256
+MAX_LINEAGE_PARENTS = 20
+
+
+def replay_sample(
+    path: str,
+    rows: int,
+    transformer: FeatureTransformer,
+    random_state: int = 42,
+    block_rows: int = REPLAY_BLOCK_ROWS,
+    cache_dir: str = DEFAULT_CACHE_DIR,
+) -> tuple[pd.DataFrame, np.ndarray, int]:
+    """About ``rows`` older readings as ``(features, labels, blocks)``, read from the memory-mapped columnar cache.
+
+    Rows are drawn as random contiguous blocks so rolling features keep most of
+    their history. Rolling state restarts at each block. Only the sampled rows
+    are read, so the cost follows ``rows`` rather than the size of the history.
+    """
+    names = SENSOR_FEATURES + ["failure"]
+    columns = open_columns(path, columns=None, cache_dir=cache_dir, decode_assets=False)
+    has_assets = ASSET_COLUMN in columns
+    n = len(columns["failure"])
+    block_rows = max(1, min(block_rows, n))
+    n_blocks = min(-(-rows // block_rows), n - block_rows + 1) if rows > 0 and n else 0
+    if n_blocks <= 0:
+        return pd.DataFrame(columns=transformer.feature_names, dtype=np.float32), np.empty(0, dtype=int), 0
+
+    rng = np.random.default_rng(random_state)
+    starts = np.sort(rng.choice(n - block_rows + 1, size=n_blocks, replace=False))
+    index = np.unique((starts[:, None] + np.arange(block_rows)).ravel())
+    data = {name: np.asarray(columns[name][index]) for name in names}
+    # one rolling group per (block, asset), so no window reaches across a gap in the sample
+    block = np.searchsorted(starts, index, side="right") - 1
+    if has_assets:
+        codes = np.asarray(columns[ASSET_COLUMN][index], dtype=np.int64)
+        # rows without an id (code -1) stay stateless, as in the uncached path
+        groups = np.where(codes >= 0, block * (int(codes.max()) + 1) + codes, np.nan)
+    else:
+        groups = block
+    rolling = rolling_torque_features(transformer.column(data, "torque"), groups)
+    X = transformer.frame(data, rolling=rolling)
+    return X, data["failure"].astype(int), n_blocks
+
+
+def promotion_check(parent: Metrics, candidate: Metrics, tolerance: float = 0.0) -> list[str]:
+    """Reasons to keep the parent model; empty when the candidate may be promoted.
+
+    ``tolerance`` is the allowed PR-AUC drop (absolute) and expected-cost increase
+    (relative). A holdout with a single class has no PR-AUC, and with rare
+    failures many do, so then only expected cost is compared.
+    """
+    reasons = []
+    if np.isfinite(parent.pr_auc) and np.isfinite(candidate.pr_auc) and candidate.pr_auc < parent.pr_auc - tolerance:
+        reasons.append(f"PR-AUC fell from {parent.pr_auc:.4f} to {candidate.pr_auc:.4f}")
+    if candidate.expected_cost > parent.expected_cost * (1 + tolerance):
+        reasons.append(f"expected_cost rose from {parent.expected_cost:.1f} to {candidate.expected_cost:.1f}")
+    return reasons
+
+
+def _parent_version(artifact: Any, model_path: str) -> str:
+    return artifact.version if isinstance(artifact, ModelArtifact) else file_digest(model_path)[:12]
+
+
+def _parent_sketch(artifact: Any, model_path: str) -> HistogramSketch | None:
+    path = artifact.file(DRIFT_REFERENCE_NAME) if isinstance(artifact, ModelArtifact) else drift_reference_path(model_path)
+    return HistogramSketch.load(path) if path is not None and path.exists() else None
+
+
+def merge_reference(
+    parent_sketch: HistogramSketch | None, parent_baseline: dict | None, X_new: pd.DataFrame, X_fallback: pd.DataFrame
+) -> tuple[HistogramSketch, dict, dict]:
+    """Drift reference and monitoring baseline for an updated model, plus how they were made.
+
+    The parent's sketch gains the counts of the new readings, and its baseline is
+    pooled with theirs, weighting by the sketch's row count; p95 comes from the
+    merged histogram. When the parent has no sketch or baseline for these
+    features, both are rebuilt from ``X_fallback``.
+    """
+    features = list(X_new.columns)
+    if (
+        parent_sketch is not None
+        and parent_sketch.features == features
+        and parent_sketch.count > 0
+        and all(name in (parent_baseline or {}) for name in features)
+    ):
+        n_old, n_new = parent_sketch.count, len(X_new)
+        sketch = parent_sketch.empty_like().merge(parent_sketch)
+        sketch.update(X_new)
+        new = build_monitoring_baseline(X_new)
+        p95 = sketch.quantile(0.95)
+        baseline = {}
+        for j, name in enumerate(features):
+            old, cur = parent_baseline[name], new[name]
+            mean = (n_old * old["mean"] + n_new * cur["mean"]) / (n_old + n_new)
+            second = (n_old * (old["std"] ** 2 + old["mean"] ** 2) + n_new * (cur["std"] ** 2 + cur["mean"] ** 2)) / (
+                n_old + n_new
+            )
+            baseline[name] = {"mean": mean, "std": float(np.sqrt(max(second - mean**2, 0.0))), "p95": float(p95[j])}
+        return sketch, baseline, {"mode": "merged", "parent_rows": n_old, "new_rows": n_new}
+    sketch = HistogramSketch.from_reference(X_fallback)
+    return sketch, build_monitoring_baseline(X_fallback), {"mode": "rebuilt", "rows": len(X_fallback)}
+
+
+def update_xgboost(
+    new_data_path: str,
+    model_path: str,
+    rounds: int = 50,
+    replay_path: str | None = None,
+    replay_rows: int = 0,
+    holdout_fraction: float = 0.2,
+    tolerance: float = 0.0,
+    random_state: int = 42,
+    use_cache: bool = False,
+    cache_dir: str = DEFAULT_CACHE_DIR,
+) -> dict:
+    """Continue boosting the model at ``model_path`` on new readings and promote it only if it holds up.
+
+    The newest ``holdout_fraction`` of ``new_data_path`` is a rolling holdout. The
+    rest, plus an optional replay sample of older data, trains ``rounds`` more
+    trees on top of the existing booster, using the parent's hyperparameters
+    and fitted transformer. Parent and candidate are then scored on the holdout.
+    The artifact is replaced, with lineage, only when ``promotion_check`` passes,
+    so the cost follows the size of the new data rather than the full history.
+    The promoted artifact's drift reference and monitoring baseline are the
+    parent's merged with the new readings (``merge_reference``). ``cache_dir``
+    holds the columnar cache and digest index for both datasets.
+    """
+    from xgboost import XGBClassifier
+
+    artifact = load_artifact(model_path)
+    parent = artifact["model"]
+    if not hasattr(parent, "get_booster"):
+        raise TypeError(f"Warm-start updates need an XGBoost model, not {type(parent).__name__}; retrain from scratch")
+    parent_version = _parent_version(artifact, model_path)
+    transformer = load_transformer(model_path)
+
+    df = load_dataset(new_data_path, use_cache=use_cache, cache_dir=cache_dir)
+    if not transformer.medians:
+        transformer = FeatureTransformer.fit(df, transformer.feature_names)
+    cut = int(len(df) * (1 - holdout_fraction))
+    if cut <= 0 or cut >= len(df):
+        raise ValueError(f"{len(df)} new rows cannot be split into training rows and a {holdout_fraction:.0%} holdout")
+    X = transformer.frame(df)
+    y = df["failure"].astype(int).to_numpy()
+    X_train, y_train, X_hold, y_hold = X.iloc[:cut], y[:cut], X.iloc[cut:], y[cut:]
+
+    replay = None
+    if replay_path and replay_rows > 0:
+        X_replay, y_replay, blocks = replay_sample(replay_path, replay_rows, transformer, random_state, cache_dir=cache_dir)
+        X_train = pd.concat([X_train, X_replay], ignore_index=True)
+        y_train = np.concatenate([y_train, y_replay])
+        replay = {"path": str(replay_path), "digest": source_digest(replay_path, cache_dir=cache_dir), "rows": len(y_replay), "blocks": blocks}
+
+    params = {**XGB_PARAMS, **artifact.get("params", {})}
+    scale_pos_weight = artifact.get("scale_pos_weight") or max(1, int((y_train == 0).sum())) / max(1, int(y_train.sum()))
+    candidate = XGBClassifier(
+        **{**params, "n_estimators": rounds}, random_state=random_state, scale_pos_weight=scale_pos_weight
+    )
+    start = time.perf_counter()
+    candidate.fit(X_train, y_train, xgb_model=parent.get_booster())
+    fit_seconds = time.perf_counter() - start
+
+    cfg = ProjectConfig()
+    costs = {"fn_cost": cfg.fn_cost, "fp_cost": cfg.fp_cost}
+    parent_metrics = evaluate_binary(y_hold, parent.predict_proba(X_hold)[:, 1], **costs)
+    metrics = evaluate_binary(y_hold, candidate.predict_proba(X_hold)[:, 1], **costs)
+    reasons = promotion_check(parent_metrics, metrics, tolerance)
+
+    parent_lineage = artifact.get("lineage") or {}
+    lineage = {
+        "mode": "update",
+        "parent_version": parent_version,
+        "parents": [parent_version, *parent_lineage.get("parents", [])][:MAX_LINEAGE_PARENTS],
+        "rounds_added": rounds,
+        "total_rounds": candidate.get_booster().num_boosted_rounds(),
+        "data": {
+            "path": str(new_data_path),
+            "digest": source_digest(new_data_path, cache_dir=cache_dir),
+            "rows": len(df),
+            "train_rows": [0, cut],
+            "holdout_rows": [cut, len(df)],
+        },
+        "replay": replay,
+        "holdout_metrics": {"parent": asdict(parent_metrics), "candidate": asdict(metrics)},
+        "updated_at": time.time(),
+    }
+    promoted = not reasons
+    if promoted:
+        # the parent's reference already covers the replayed history, so only the new readings are added
+        sketch, baseline, lineage["reference"] = merge_reference(
+            _parent_sketch(artifact, model_path), artifact.get("monitoring_baseline"), X, X_train
+        )
+        save_model_artifact(
+            candidate,
+            metrics,
+            model_path,
+            extra={
+                "params": params,
+                "scale_pos_weight": scale_pos_weight,
+                "lineage": lineage,
+                "monitoring_baseline": baseline,
+            },
+            reference_sketch=sketch,
+            transformer=transformer,
+        )
+        logger.info("Promoted update of %s: %d trees added in %.2fs", parent_version, rounds, fit_seconds)
+    else:
+        logger.warning("Kept model %s; update rejected: %s", parent_version, "; ".join(reasons))
+
+    return {
+        **training_summary(metrics, scale_pos_weight, candidate),
+        "promoted": promoted,
+        "reasons": reasons,
+        "parent_version": parent_version,
+        "parent_pr_auc": parent_metrics.pr_auc,
+        "parent_expected_cost": parent_metrics.expected_cost,
+        "train_rows": len(y_train),
+        "fit_seconds": fit_seconds,
+    }
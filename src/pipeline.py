@@ -1,42 +1,340 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
+import importlib
+import inspect
 import json
+import time
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
+from typing import Any, Callable
 
-import joblib
-
+from monitoring.streaming_drift import HistogramSketch
 from src.config import ProjectConfig
-from src.data_loader import load_dataset
+from src.data_loader import load_dataset, source_digest
 from src.explainability.shap_analysis import compute_shap_summary
-from src.feature_engineering import FEATURE_COLUMNS, build_features
-from src.modeling.train_xgboost import train_xgboost
+from src.feature_engineering import FeatureTransformer
+from src.modeling.evaluate import Metrics
+from src.modeling.train_xgboost import XGB_PARAMS, fit_model, full_training_lineage, save_model_artifact, training_summary
 from src.monitoring_report import build_monitoring_baseline
-from src.preprocessing import preprocess
-from src.utils import setup_logger
+from src.tracking import RunTracker
+from src.utils import peak_rss_mb, record_spans, setup_logger, span
 
 logger = setup_logger(__name__)
 
+STAGE_CACHE_DIR = "data/processed/pipeline_cache"
+
+
+@dataclass(frozen=True)
+class PipelineContext:
+    data_path: str
+    model_path: str
+    use_cache: bool = False
+    random_state: int = 42
+    test_size: float = 0.2
+    fn_cost: float = 10.0
+    fp_cost: float = 1.0
+
+
+@dataclass(frozen=True)
+class Stage:
+    """One pipeline step: ``run(ctx, *input_outputs)`` plus what its cache key depends on.
+
+    ``config`` names the ``PipelineContext`` fields the stage reads and ``code``
+    the modules whose source versions its output. Stages with ``persist=False``
+    still have a key for their dependents but rerun whenever they are needed,
+    for outputs that are no cheaper to reload than to rebuild.
+    """
+
+    name: str
+    run: Callable[..., Any]
+    inputs: tuple[str, ...] = ()
+    config: tuple[str, ...] = ()
+    code: tuple[str, ...] = ()
+    persist: bool = True
+
+
+@dataclass
+class StageReport:
+    name: str
+    key: str
+    status: str
+    seconds: float = 0.0
+    peak_rss_mb: float = 0.0
+
+
+@dataclass
+class _StageCache:
+    root: Path
+    _code_hashes: dict[str, str] = field(default_factory=dict)
+
+    def path(self, stage: str, key: str) -> Path:
+        return self.root / stage / f"{key}.joblib"
+
+    def code_version(self, module_name: str) -> str:
+        if module_name not in self._code_hashes:
+            source = Path(inspect.getsourcefile(importlib.import_module(module_name))).read_bytes()
+            self._code_hashes[module_name] = hashlib.sha256(source).hexdigest()
+        return self._code_hashes[module_name]
+
+    def load(self, stage: str, key: str) -> Any:
+        import joblib
+
+        return joblib.load(self.path(stage, key))
+
+    def save(self, stage: str, key: str, value: Any) -> None:
+        import joblib
+
+        out = self.path(stage, key)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        tmp = out.with_suffix(".tmp")
+        joblib.dump(value, tmp)
+        tmp.replace(out)
+
+
+def _load_stage(ctx: PipelineContext) -> Any:
+    return load_dataset(ctx.data_path, use_cache=ctx.use_cache)
+
+
+def _preprocess_stage(ctx: PipelineContext, raw: Any) -> FeatureTransformer:
+    return FeatureTransformer.fit(raw)
+
+
+def _features_stage(ctx: PipelineContext, raw: Any, transformer: FeatureTransformer) -> dict:
+    return {"X": transformer.frame(raw), "y": raw["failure"].astype(int)}
+
+
+def _train_stage(ctx: PipelineContext, features: dict) -> dict:
+    model, metrics, scale_pos_weight = fit_model(
+        features["X"],
+        features["y"],
+        random_state=ctx.random_state,
+        test_size=ctx.test_size,
+        fn_cost=ctx.fn_cost,
+        fp_cost=ctx.fp_cost,
+    )
+    return {"model": model, "metrics": metrics, "scale_pos_weight": scale_pos_weight}
+
+
+def _shap_stage(ctx: PipelineContext, trained: dict, features: dict) -> Any:
+    return compute_shap_summary(trained["model"], features["X"])
+
+
+def _monitoring_stage(ctx: PipelineContext, features: dict) -> dict:
+    return build_monitoring_baseline(features["X"])
+
+
+def _drift_reference_stage(ctx: PipelineContext, features: dict) -> HistogramSketch:
+    return HistogramSketch.from_reference(features["X"])
+
+
+STAGES: tuple[Stage, ...] = (
+    # the raw frame is not pickled: it would be a second copy of the dataset that reloads no faster
+    Stage("load", _load_stage, config=("data_digest", "use_cache"), code=("src.data_loader",), persist=False),
+    Stage("preprocess", _preprocess_stage, inputs=("load",), code=("src.feature_engineering",)),
+    Stage(
+        "features",
+        _features_stage,
+        inputs=("load", "preprocess"),
+        code=("src.feature_engineering", "src.feature_store"),
+    ),
+    Stage(
+        "train",
+        _train_stage,
+        inputs=("features",),
+        config=("random_state", "test_size", "fn_cost", "fp_cost"),
+        code=("src.modeling.train_xgboost", "src.modeling.evaluate"),
+    ),
+    Stage(
+        "shap",
+        _shap_stage,
+        inputs=("train", "features"),
+        code=("src.explainability.shap_analysis", "src.explainability.permutation"),
+    ),
+    Stage("monitoring", _monitoring_stage, inputs=("features",), code=("src.monitoring_report",)),
+    Stage("drift_reference", _drift_reference_stage, inputs=("features",), code=("monitoring.streaming_drift",)),
+)
+
+
+def _stage_keys(stages: tuple[Stage, ...], ctx: PipelineContext, cache: _StageCache) -> dict[str, str]:
+    """Hash each stage's upstream keys, config values and code, in topological order."""
+    values = {**asdict(ctx), "data_digest": source_digest(ctx.data_path, cache_dir=str(cache.root))}
+    keys: dict[str, str] = {}
+    for stage in stages:
+        payload = {
+            "stage": stage.name,
+            "inputs": [keys[name] for name in stage.inputs],
+            "config": {name: values[name] for name in stage.config},
+            "code": [cache.code_version(module) for module in stage.code],
+        }
+        keys[stage.name] = hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()[:24]
+    return keys
+
+
+def _forced_with_dependents(stages: tuple[Stage, ...], forced: set[str]) -> set[str]:
+    unknown = forced - {s.name for s in stages} - {"all"}
+    if unknown:
+        raise ValueError(f"Unknown pipeline stage(s): {sorted(unknown)}")
+    if "all" in forced:
+        return {s.name for s in stages}
+    out = set(forced)
+    for stage in stages:
+        if any(name in out for name in stage.inputs):
+            out.add(stage.name)
+    return out
+
+
+def run_stages(
+    ctx: PipelineContext,
+    wanted: tuple[str, ...],
+    force: set[str] | None = None,
+    cache_dir: str = STAGE_CACHE_DIR,
+    stages: tuple[Stage, ...] = STAGES,
+) -> tuple[dict[str, Any], list[StageReport]]:
+    """Produce the outputs of ``wanted`` stages, rerunning only stages whose key has no cached result.
+
+    Cached outputs are read from disk only when something downstream needs them.
+    """
+    cache = _StageCache(Path(cache_dir))
+    keys = _stage_keys(stages, ctx, cache)
+    forced = _forced_with_dependents(stages, force or set())
+    by_name = {s.name: s for s in stages}
+    results: dict[str, Any] = {}
+    reports: dict[str, StageReport] = {}
+
+    def resolve(name: str) -> Any:
+        if name in results:
+            return results[name]
+        stage, key = by_name[name], keys[name]
+        if stage.persist and name not in forced and cache.path(name, key).exists():
+            start = time.perf_counter()
+            with span(f"stage.{name}.load"):
+                results[name] = cache.load(name, key)
+            reports.setdefault(name, StageReport(name, key, "hit", time.perf_counter() - start, peak_rss_mb()))
+            return results[name]
+
+        upstream = [resolve(dep) for dep in stage.inputs]
+        start = time.perf_counter()
+        with span(f"stage.{name}"):
+            results[name] = stage.run(ctx, *upstream)
+        elapsed = time.perf_counter() - start
+        if stage.persist:
+            with span(f"stage.{name}.save"):
+                cache.save(name, key, results[name])
+        reports[name] = StageReport(name, key, "forced" if name in forced else "miss", elapsed, peak_rss_mb())
+        return results[name]
+
+    for name in wanted:
+        resolve(name)
+    ordered = [reports.get(s.name, StageReport(s.name, keys[s.name], "skipped")) for s in stages]
+    return {name: results[name] for name in wanted}, ordered
+
+
+def _log_stage_report(reports: list[StageReport]) -> None:
+    logger.info("%-12s %-8s %-24s %10s %12s", "stage", "status", "key", "seconds", "peak_rss_mb")
+    for r in reports:
+        logger.info("%-12s %-8s %-24s %10.3f %12.1f", r.name, r.status, r.key, r.seconds, r.peak_rss_mb)
+
+
+def _track_outputs(tracker: RunTracker, outputs: dict, results: dict, summary_path: Path) -> None:
+    tracker.set_tags({f"stage.{s['name']}.status": s["status"] for s in outputs["stages"]})
+    tracker.log_metrics(outputs["metrics"])
+    for stage in outputs["stages"]:
+        if stage["status"] != "skipped":
+            tracker.log_metrics(
+                {"seconds": stage["seconds"], "peak_rss_mb": stage["peak_rss_mb"]}, prefix=f"stage.{stage['name']}."
+            )
+    tracker.log_metrics(outputs["spans"], prefix="span.")
+    tracker.log_metrics({"peak_rss_mb": outputs["peak_rss_mb"]})
+    tracker.log_dict(results["shap"].to_dict(), "shap_summary.json")
+    tracker.log_dict(results["monitoring"], "monitoring_baseline.json")
+    tracker.log_artifact(summary_path)
+
+
+def run_pipeline(
+    data_path: str,
+    model_path: str,
+    use_cache: bool = False,
+    force_stages: tuple[str, ...] = (),
+    cache_dir: str = STAGE_CACHE_DIR,
+    summary_path: str = "reports/pipeline_summary.json",
+    tracker: RunTracker | None = None,
+) -> dict:
+    """Run (or reuse) every stage, save the artifact and write the summary.
+
+    Metrics, params, per-stage durations and peak memory, SHAP and monitoring
+    outputs go to ``tracker``, which sends them from a background thread. Without
+    one, a ``RunTracker`` named ``pipeline`` is created that only records when
+    ``PIPELINE_TRACKING`` is set, so library callers opt in to tracking.
+    """
+    cfg = ProjectConfig()
+    owns_tracker = tracker is None
+    if tracker is None:
+        tracker = RunTracker("pipeline", cfg=cfg, enabled=cfg.tracking_enabled and cfg.pipeline_tracking)
+    ctx = PipelineContext(
+        data_path=data_path,
+        model_path=model_path,
+        use_cache=use_cache,
+        random_state=cfg.random_state,
+        test_size=cfg.test_size,
+        fn_cost=cfg.fn_cost,
+        fp_cost=cfg.fp_cost,
+    )
+    # logged first, so the tracking run is created while the stages run
+    tracker.log_params({**asdict(ctx), "data_digest": source_digest(data_path, cache_dir=cache_dir)})
+    tracker.log_params(XGB_PARAMS, prefix="xgb.")
+    try:
+        outputs = _run_tracked_stages(ctx, force_stages, cache_dir, Path(summary_path), tracker)
+    except BaseException:
+        if owns_tracker:
+            tracker.close("FAILED")
+        raise
+    if owns_tracker:
+        outputs["tracking"] = tracker.close()
+    return outputs
 
-def run_pipeline(data_path: str, model_path: str) -> dict:
-    metrics = train_xgboost(data_path=data_path, model_path=model_path)
-    artifact = joblib.load(model_path)
 
-    df = preprocess(load_dataset(data_path))
-    X = build_features(df)[FEATURE_COLUMNS]
+def _run_tracked_stages(
+    ctx: PipelineContext, force_stages: tuple[str, ...], cache_dir: str, out_path: Path, tracker: RunTracker
+) -> dict:
+    with record_spans() as spans:
+        results, reports = run_stages(
+            ctx, ("preprocess", "train", "shap", "monitoring", "drift_reference"), force=set(force_stages), cache_dir=cache_dir
+        )
+        _log_stage_report(reports)
 
-    shap_summary = compute_shap_summary(artifact["model"], X)
-    monitoring = build_monitoring_baseline(X)
+        trained = results["train"]
+        metrics: Metrics = trained["metrics"]
+        with span("save_artifact"):
+            save_model_artifact(
+                trained["model"],
+                metrics,
+                ctx.model_path,
+                extra={
+                    "params": XGB_PARAMS,
+                    "scale_pos_weight": trained["scale_pos_weight"],
+                    "lineage": full_training_lineage(ctx.data_path, cache_dir=cache_dir),
+                    "monitoring_baseline": results["monitoring"],
+                },
+                reference_sketch=results["drift_reference"],
+                transformer=results["preprocess"],
+            )
+    spans.add("total", time.perf_counter() - spans.started)
+    logger.info("Pipeline spans (s): %s", ", ".join(f"{k}={v:.3f}" for k, v in spans.totals().items()))
 
     outputs = {
-        "metrics": metrics,
-        "top_features": shap_summary.head(5).to_dict(),
-        "monitoring_baseline": monitoring,
+        "metrics": training_summary(metrics, trained["scale_pos_weight"], trained["model"]),
+        "top_features": results["shap"].head(5).to_dict(),
+        "monitoring_baseline": results["monitoring"],
+        "stages": [asdict(r) for r in reports],
+        "spans": spans.totals(),
+        "peak_rss_mb": peak_rss_mb(),
     }
 
-    out_path = Path("reports/pipeline_summary.json")
     out_path.parent.mkdir(parents=True, exist_ok=True)
     out_path.write_text(json.dumps(outputs, indent=2))
+    _track_outputs(tracker, outputs, results, out_path)
     return outputs
 
 
@@ -44,9 +342,27 @@ def main() -> None:
     parser = argparse.ArgumentParser()
     parser.add_argument("--data-path", default=ProjectConfig().data_path)
     parser.add_argument("--model-path", default=ProjectConfig().model_path)
+    parser.add_argument("--use-cache", action="store_true", help="Read the dataset through the columnar cache")
+    parser.add_argument(
+        "--force-stage",
+        action="append",
+        default=[],
+        choices=[s.name for s in STAGES] + ["all"],
+        help="Rerun this stage and everything downstream of it even on a cache hit (repeatable)",
+    )
+    parser.add_argument("--stage-cache-dir", default=STAGE_CACHE_DIR)
     args = parser.parse_args()
 
-    outputs = run_pipeline(args.data_path, args.model_path)
+    # the CLI tracks unless TRACKING_ENABLED=0
+    with RunTracker("pipeline") as tracker:
+        outputs = run_pipeline(
+            args.data_path,
+            args.model_path,
+            use_cache=args.use_cache,
+            force_stages=tuple(args.force_stage),
+            cache_dir=args.stage_cache_dir,
+            tracker=tracker,
+        )
     logger.info("Pipeline complete. Summary written to reports/pipeline_summary.json")
     logger.info("Top feature drivers: %s", outputs["top_features"])
 
@@ -2,10 +2,12 @@ from __future__ import annotations
 
 import pandas as pd
 
+from src.feature_store import ASSET_COLUMN
+
 
 def preprocess(df: pd.DataFrame) -> pd.DataFrame:
     data = df.copy()
     for col in data.columns:
-        if data[col].dtype.kind in {"i", "f"}:
+        if col != ASSET_COLUMN and data[col].dtype.kind in {"i", "f"}:
             data[col] = data[col].fillna(data[col].median())
     return data
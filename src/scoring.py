@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.config import ProjectConfig
+from src.data_loader import DEFAULT_CHUNKSIZE, REQUIRED_COLUMNS, dataset_columns, iter_dataset_chunks
+from src.feature_engineering import FEATURE_COLUMNS, FeatureTransformer
+from src.feature_store import ASSET_COLUMN, ChunkedRollingFeatures
+from src.modeling.artifact import COMPILED_NAME, ModelArtifact, load_artifact, load_transformer
+from src.modeling.compiled_model import CompiledEnsemble, compiled_model_path
+from src.modeling.survival_model import DEFAULT_HORIZONS, surrogate_survival_risk, survival_risk_matrix
+from src.utils import setup_logger
+
+logger = setup_logger(__name__)
+
+SENSOR_COLUMNS = [c for c in REQUIRED_COLUMNS if c != "failure"]
+SURVIVAL_HORIZON_DAYS = 30
+
+
+def risk_levels(scores: np.ndarray, cfg: ProjectConfig) -> np.ndarray:
+    return np.select(
+        [scores >= cfg.risk_threshold_high, scores >= cfg.risk_threshold_medium],
+        ["HIGH", "MEDIUM"],
+        default="LOW",
+    )
+
+
+def load_scorer(model_path: str | Path) -> tuple[Any, list[str]]:
+    """``(scorer, feature names)`` for a model artifact, preferring its compiled NumPy export."""
+    artifact = load_artifact(model_path)
+    compiled = artifact.file(COMPILED_NAME) if isinstance(artifact, ModelArtifact) else compiled_model_path(model_path)
+    if compiled is not None and compiled.exists():
+        scorer = CompiledEnsemble.load(compiled)
+        return scorer, list(scorer.feature_names)
+    return artifact["model"], list(artifact.get("features", FEATURE_COLUMNS))
+
+
+_WORKER: dict[str, Any] = {}
+
+
+def _init_worker(
+    model_path: str,
+    output_dir: str,
+    file_format: str,
+    cfg: ProjectConfig,
+    horizon_days: int,
+    horizons: tuple[int, ...],
+    transformer: FeatureTransformer,
+) -> None:
+    scorer, _ = load_scorer(model_path)
+    _WORKER.update(
+        scorer=scorer,
+        transformer=transformer,
+        output_dir=Path(output_dir),
+        file_format=file_format,
+        cfg=cfg,
+        horizon_days=horizon_days,
+        horizons=horizons,
+    )
+
+
+def score_chunk(
+    chunk: pd.DataFrame,
+    rolling: tuple[np.ndarray, np.ndarray],
+    scorer: Any,
+    transformer: FeatureTransformer,
+    cfg: ProjectConfig,
+    horizon_days: int = SURVIVAL_HORIZON_DAYS,
+    horizons: Sequence[int] = (),
+) -> pd.DataFrame:
+    """Failure probability, risk level and survival risk for every row of a raw sensor chunk.
+
+    ``survival_risk`` is ``surrogate_survival_risk`` over ``horizon_days``; each of
+    ``horizons`` adds a float32 ``risk_<days>d`` column of the calibrated survival curve.
+    """
+    feats = transformer.frame(chunk, rolling=rolling)
+    probability = np.asarray(scorer.predict_proba(feats)[:, 1], dtype=float)
+    out = {ASSET_COLUMN: chunk[ASSET_COLUMN].to_numpy()} if ASSET_COLUMN in chunk.columns else {}
+    out.update(
+        failure_probability=probability,
+        risk_level=risk_levels(probability, cfg),
+        survival_risk=surrogate_survival_risk(probability, horizon_days),
+    )
+    if horizons:
+        curve = survival_risk_matrix(probability, horizons, dtype=np.float32)
+        out.update({f"risk_{days}d": curve[:, j] for j, days in enumerate(horizons)})
+    return pd.DataFrame(out, index=chunk.index)
+
+
+def _write_part(frame: pd.DataFrame, output_dir: Path, index: int, file_format: str) -> Path:
+    path = output_dir / f"part-{index:05d}.{file_format}"
+    tmp = path.with_name(f".{path.name}.tmp")
+    if file_format == "parquet":
+        frame.to_parquet(tmp, index=True)
+    else:
+        frame.to_csv(tmp, index=True)
+    tmp.replace(path)
+    return path
+
+
+def _score_part(index: int, chunk: pd.DataFrame, rolling: tuple[np.ndarray, np.ndarray]) -> tuple[int, int, str]:
+    w = _WORKER
+    scored = score_chunk(chunk, rolling, w["scorer"], w["transformer"], w["cfg"], w["horizon_days"], w["horizons"])
+    scored.index.name = "row"
+    path = _write_part(scored, w["output_dir"], index, w["file_format"])
+    return index, len(scored), path.name
+
+
+def _input_columns(input_path: str) -> list[str]:
+    return SENSOR_COLUMNS + ([ASSET_COLUMN] if ASSET_COLUMN in dataset_columns(input_path) else [])
+
+
+def _prepared_chunks(input_path: str, chunksize: int, transformer: FeatureTransformer):
+    """Raw chunks with global row numbers and rolling features carried across chunks.
+
+    Rolling state is sequential, so it is computed here (over the imputed torque)
+    before chunks fan out to workers, which impute and build the rest.
+    """
+    rolling = ChunkedRollingFeatures()
+    offset = 0
+    for chunk in iter_dataset_chunks(input_path, chunksize, columns=_input_columns(input_path)):
+        chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+        offset += len(chunk)
+        assets = chunk[ASSET_COLUMN].to_numpy() if ASSET_COLUMN in chunk.columns else None
+        yield chunk, rolling.transform(transformer.column(chunk, "torque"), assets)
+
+
+def score_file(
+    input_path: str,
+    output_dir: str,
+    model_path: str,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    workers: int | None = None,
+    file_format: str = "parquet",
+    horizon_days: int = SURVIVAL_HORIZON_DAYS,
+    horizons: Sequence[int] = DEFAULT_HORIZONS,
+    progress_seconds: float = 5.0,
+) -> dict:
+    """Score a CSV/Parquet telemetry export into ordered ``part-NNNNN`` files under ``output_dir``.
+
+    Chunks are scored in a process pool whose workers load the model once. At
+    most ``2 * workers`` chunks are in flight, so memory is bounded by the chunk
+    size rather than the file size. Results are collected in input order.
+    Features are built with the transformer stored in the model artifact.
+    """
+    if file_format not in {"parquet", "csv"}:
+        raise ValueError("file_format must be 'parquet' or 'csv'")
+    workers = max(1, workers or os.cpu_count() or 1)
+    out = Path(output_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    for stale in out.glob("part-*"):
+        stale.unlink()
+    transformer = load_transformer(model_path)
+    if not transformer.medians:
+        # artifacts without a fitted transformer: impute with the medians of the first chunk
+        first = next(iter_dataset_chunks(input_path, chunksize, columns=_input_columns(input_path)), None)
+        if first is not None:
+            transformer = FeatureTransformer.fit(first, transformer.feature_names)
+    initargs = (model_path, str(out), file_format, ProjectConfig(), horizon_days, tuple(horizons), transformer)
+
+    parts: list[str] = []
+    rows = 0
+    start = last_report = time.perf_counter()
+
+    def collect(index: int, n: int, name: str) -> None:
+        nonlocal rows, last_report
+        parts.append(name)
+        rows += n
+        now = time.perf_counter()
+        if now - last_report >= progress_seconds:
+            last_report = now
+            logger.info("Scored %d rows in %d chunks (%.0f rows/s)", rows, index + 1, rows / (now - start))
+
+    chunks = enumerate(_prepared_chunks(input_path, chunksize, transformer))
+    if workers == 1:
+        _init_worker(*initargs)
+        try:
+            for index, (chunk, rolling) in chunks:
+                collect(*_score_part(index, chunk, rolling))
+        finally:
+            _WORKER.clear()
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=mp.get_context("spawn"), initializer=_init_worker, initargs=initargs
+        ) as pool:
+            pending: deque[Future] = deque()
+            for index, (chunk, rolling) in chunks:
+                pending.append(pool.submit(_score_part, index, chunk, rolling))
+                if len(pending) >= 2 * workers:
+                    collect(*pending.popleft().result())
+            while pending:
+                collect(*pending.popleft().result())
+
+    elapsed = time.perf_counter() - start
+    summary = {
+        "input": str(input_path),
+        "model_path": str(model_path),
+        "rows": rows,
+        "parts": parts,
+        "format": file_format,
+        "horizons": list(horizons),
+        "workers": workers,
+        "seconds": elapsed,
+        "rows_per_s": rows / elapsed if elapsed > 0 else 0.0,
+    }
+    (out / "manifest.json").write_text(json.dumps(summary, indent=2))
+    logger.info("Scored %d rows into %d parts in %.2fs (%.0f rows/s)", rows, len(parts), elapsed, summary["rows_per_s"])
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Score a telemetry export offline")
+    parser.add_argument("input", help="CSV or Parquet file of sensor readings")
+    parser.add_argument("--output-dir", default="data/processed/scores")
+    parser.add_argument("--model-path", default=ProjectConfig().model_path)
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--format", choices=["parquet", "csv"], default="parquet")
+    parser.add_argument("--horizon-days", type=int, default=SURVIVAL_HORIZON_DAYS)
+    parser.add_argument(
+        "--horizons",
+        default=",".join(map(str, DEFAULT_HORIZONS)),
+        help="Comma-separated days for risk_<days>d survival-curve columns (empty for none)",
+    )
+    args = parser.parse_args()
+    score_file(
+        args.input,
+        args.output_dir,
+        args.model_path,
+        chunksize=args.chunksize,
+        workers=args.workers,
+        file_format=args.format,
+        horizon_days=args.horizon_days,
+        horizons=tuple(int(h) for h in args.horizons.split(",") if h),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+from __future__ import annotations
+
+import json
+import queue
+import shutil
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from src.config import ProjectConfig
+from src.utils import setup_logger
+
+logger = setup_logger(__name__)
+
+# per-call limits of MLflow's log_batch
+MLFLOW_MAX_METRICS = 1000
+MLFLOW_MAX_PARAMS = 100
+MLFLOW_MAX_TAGS = 100
+MLFLOW_MAX_PARAM_LENGTH = 6000
+
+DEFAULT_QUEUE_SIZE = 10_000
+
+
+@dataclass
+class TrackingBatch:
+    """Everything logged since the last flush; metrics are ``(key, value, timestamp_ms, step)``."""
+
+    metrics: list[tuple[str, float, int, int]] = field(default_factory=list)
+    params: dict[str, str] = field(default_factory=dict)
+    tags: dict[str, str] = field(default_factory=dict)
+    artifacts: list[tuple[str, str | None]] = field(default_factory=list)
+    texts: list[tuple[str, str]] = field(default_factory=list)
+
+    def add(self, kind: str, payload: Any) -> None:
+        if kind == "metrics":
+            self.metrics.extend(payload)
+        elif kind == "params":
+            self.params.update(payload)
+        elif kind == "tags":
+            self.tags.update(payload)
+        elif kind == "artifact":
+            self.artifacts.append(payload)
+        elif kind == "text":
+            self.texts.append(payload)
+
+    def __bool__(self) -> bool:
+        return bool(self.metrics or self.params or self.tags or self.artifacts or self.texts)
+
+
+def _chunks(items: list, size: int) -> list[list]:
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+class MlflowBackend:
+    """One MLflow run, written through ``MlflowClient.log_batch``; mlflow is imported by ``start``."""
+
+    name = "mlflow"
+
+    def __init__(self, tracking_uri: str, experiment: str, run_name: str) -> None:
+        self.tracking_uri = tracking_uri
+        self.experiment = experiment
+        self.run_name = run_name
+        self.client: Any = None
+        self.run_id: str | None = None
+
+    def start(self) -> None:
+        from mlflow.tracking import MlflowClient
+
+        self.client = MlflowClient(tracking_uri=self.tracking_uri)
+        experiment = self.client.get_experiment_by_name(self.experiment)
+        experiment_id = experiment.experiment_id if experiment else self.client.create_experiment(self.experiment)
+        self.run_id = self.client.create_run(experiment_id, run_name=self.run_name).info.run_id
+
+    def log_batch(self, batch: TrackingBatch) -> None:
+        from mlflow.entities import Metric, Param, RunTag
+
+        metrics = [Metric(key, value, ts, step) for key, value, ts, step in batch.metrics]
+        params = [Param(key, value[:MLFLOW_MAX_PARAM_LENGTH]) for key, value in batch.params.items()]
+        tags = [RunTag(key, value) for key, value in batch.tags.items()]
+        for chunk in _chunks(params, MLFLOW_MAX_PARAMS):
+            self.client.log_batch(self.run_id, params=chunk)
+        for chunk in _chunks(tags, MLFLOW_MAX_TAGS):
+            self.client.log_batch(self.run_id, tags=chunk)
+        for chunk in _chunks(metrics, MLFLOW_MAX_METRICS):
+            self.client.log_batch(self.run_id, metrics=chunk)
+        for path, artifact_path in batch.artifacts:
+            self.client.log_artifact(self.run_id, path, artifact_path)
+        for artifact_file, text in batch.texts:
+            self.client.log_text(self.run_id, text, artifact_file)
+
+    def finish(self, status: str) -> None:
+        self.client.set_terminated(self.run_id, status)
+
+
+class LocalBackend:
+    """A run as ``run.jsonl`` (one line per batch) plus an ``artifacts/`` directory under ``root``."""
+
+    name = "local"
+
+    def __init__(self, root: str | Path, run_name: str) -> None:
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        self.directory = Path(root) / f"{run_name}-{stamp}-{uuid.uuid4().hex[:6]}"
+        self.run_name = run_name
+
+    def _append(self, record: dict) -> None:
+        with open(self.directory / "run.jsonl", "a") as fh:
+            fh.write(json.dumps(record, default=str) + "\n")
+
+    def start(self) -> None:
+        (self.directory / "artifacts").mkdir(parents=True, exist_ok=True)
+        self._append({"run_name": self.run_name, "started_at": time.time()})
+
+    def log_batch(self, batch: TrackingBatch) -> None:
+        self._append({"metrics": batch.metrics, "params": batch.params, "tags": batch.tags})
+        artifacts = self.directory / "artifacts"
+        for path, artifact_path in batch.artifacts:
+            target = artifacts / (artifact_path or "")
+            target.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(path, target / Path(path).name)
+        for artifact_file, text in batch.texts:
+            target = artifacts / artifact_file
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_text(text)
+
+    def finish(self, status: str) -> None:
+        self._append({"status": status, "finished_at": time.time()})
+
+
+def load_local_run(directory: str | Path) -> dict:
+    """Merge a ``LocalBackend`` run back into ``{"metrics": {key: [(value, step), ...]}, "params", "tags", "status"}``."""
+    run: dict = {"metrics": {}, "params": {}, "tags": {}, "status": None}
+    for line in (Path(directory) / "run.jsonl").read_text().splitlines():
+        record = json.loads(line)
+        for key, value, _, step in record.get("metrics", []):
+            run["metrics"].setdefault(key, []).append((value, step))
+        run["params"].update(record.get("params", {}))
+        run["tags"].update(record.get("tags", {}))
+        run["status"] = record.get("status", run["status"])
+    return run
+
+
+class RunTracker:
+    """Buffered, non-blocking experiment tracking for one run.
+
+    ``log_*`` calls only put onto a bounded queue; when it is full the entry is
+    dropped and counted rather than slowing the caller down. A background
+    thread groups what is queued into batches (up to ``batch_size`` entries or
+    ``flush_interval`` seconds) and sends them to ``backend`` (MLflow by
+    default), retrying failures with exponential backoff. When the backend is
+    unavailable, keeps failing, or takes longer than ``slow_seconds`` for a
+    batch, the rest of the run is written to a ``LocalBackend`` under
+    ``fallback_dir``. ``close`` waits at most ``timeout`` seconds for the queue
+    to drain; whatever is still queued then goes to the local store.
+    """
+
+    def __init__(
+        self,
+        run_name: str,
+        backend: Any = None,
+        fallback_dir: str | Path | None = None,
+        enabled: bool | None = None,
+        cfg: ProjectConfig | None = None,
+        max_queue: int = DEFAULT_QUEUE_SIZE,
+        batch_size: int = 500,
+        flush_interval: float = 0.5,
+        retries: int = 3,
+        backoff: float = 0.5,
+        slow_seconds: float | None = None,
+    ) -> None:
+        cfg = cfg or ProjectConfig()
+        self.run_name = run_name
+        self.enabled = cfg.tracking_enabled if enabled is None else enabled
+        self.primary = backend if backend is not None else MlflowBackend(cfg.mlflow_tracking_uri, cfg.mlflow_experiment, run_name)
+        self.fallback = LocalBackend(fallback_dir or cfg.tracking_fallback_dir, run_name)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retries = retries
+        self.backoff = backoff
+        self.slow_seconds = cfg.tracking_slow_seconds if slow_seconds is None else slow_seconds
+        self.close_timeout = cfg.tracking_flush_timeout
+        self.dropped = 0
+        self.batches = 0
+        self.fallback_reason: str | None = None
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._closing = threading.Event()
+        self._abandoned = threading.Event()
+        self._fallback_lock = threading.Lock()
+        self._started: set[str] = set()
+        self._primary_failed = False
+        self._thread: threading.Thread | None = None
+        if self.enabled:
+            self._thread = threading.Thread(target=self._run, name=f"tracking-{run_name}", daemon=True)
+            self._thread.start()
+
+    # -- producer side: never blocks ------------------------------------------------
+
+    def _put(self, kind: str, payload: Any) -> None:
+        if not self.enabled or self._closing.is_set():
+            return
+        try:
+            self._queue.put_nowait((kind, payload))
+        except queue.Full:
+            if not self.dropped:
+                logger.warning("Tracking queue full; dropping entries for run %s", self.run_name)
+            self.dropped += 1
+
+    def log_metric(self, key: str, value: float, step: int = 0) -> None:
+        self._put("metrics", [(key, float(value), int(time.time() * 1000), step)])
+
+    def log_metrics(self, metrics: dict[str, Any], step: int = 0, prefix: str = "") -> None:
+        """Log the numeric entries of ``metrics``; anything else is skipped."""
+        now = int(time.time() * 1000)
+        values = [
+            (f"{prefix}{key}", float(value), now, step)
+            for key, value in metrics.items()
+            if isinstance(value, (int, float)) and not isinstance(value, bool)
+        ]
+        if values:
+            self._put("metrics", values)
+
+    def log_params(self, params: dict[str, Any], prefix: str = "") -> None:
+        self._put("params", {f"{prefix}{key}": str(value) for key, value in params.items()})
+
+    def set_tags(self, tags: dict[str, Any]) -> None:
+        self._put("tags", {key: str(value) for key, value in tags.items()})
+
+    def log_artifact(self, path: str | Path, artifact_path: str | None = None) -> None:
+        self._put("artifact", (str(path), artifact_path))
+
+    def log_dict(self, payload: Any, artifact_file: str) -> None:
+        self._put("text", (artifact_file, json.dumps(payload, indent=2, default=str)))
+
+    # -- consumer side ----------------------------------------------------------------
+
+    def _next_batch(self) -> TrackingBatch | None:
+        try:
+            kind, payload = self._queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return None
+        batch = TrackingBatch()
+        batch.add(kind, payload)
+        deadline = time.monotonic() + self.flush_interval
+        for _ in range(self.batch_size - 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._closing.is_set():
+                remaining = 0
+            try:
+                kind, payload = self._queue.get(timeout=remaining) if remaining else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.add(kind, payload)
+        return batch
+
+    def _drain(self) -> TrackingBatch:
+        batch = TrackingBatch()
+        while True:
+            try:
+                batch.add(*self._queue.get_nowait())
+            except queue.Empty:
+                return batch
+
+    def _send_primary(self, batch: TrackingBatch) -> str | None:
+        """Deliver ``batch`` to the primary backend; the reason to stop using it, or None."""
+        error: Exception | None = None
+        for attempt in range(self.retries + 1):
+            start = time.perf_counter()
+            try:
+                if self.primary.name not in self._started:
+                    self.primary.start()
+                    self._started.add(self.primary.name)
+                self.primary.log_batch(batch)
+            except ImportError as exc:
+                return f"{self.primary.name} unavailable: {exc}"
+            except Exception as exc:
+                error = exc
+                if attempt < self.retries and not self._abandoned.is_set():
+                    self._abandoned.wait(self.backoff * 2**attempt)
+                    continue
+                break
+            else:
+                self.batches += 1
+                elapsed = time.perf_counter() - start
+                if elapsed > self.slow_seconds:
+                    # delivered, but later batches go local
+                    self._use_fallback(f"{self.primary.name} took {elapsed:.1f}s for one batch")
+                return None
+        self._primary_failed = True
+        return f"{self.primary.name} failed after {attempt + 1} attempt(s): {error}"
+
+    def _use_fallback(self, reason: str) -> None:
+        if self.fallback_reason is None:
+            self.fallback_reason = reason
+            logger.warning("Tracking run %s falls back to %s: %s", self.run_name, self.fallback.directory, reason)
+
+    def _send_fallback(self, batch: TrackingBatch) -> None:
+        with self._fallback_lock:
+            try:
+                if self.fallback.name not in self._started:
+                    self.fallback.start()
+                    self._started.add(self.fallback.name)
+                    batch.tags["tracking.fallback_reason"] = self.fallback_reason or ""
+                self.fallback.log_batch(batch)
+                self.batches += 1
+            except Exception as exc:  # pragma: no cover
+                logger.warning("Local tracking store failed; %s lost: %s", self.run_name, exc)
+
+    def _deliver(self, batch: TrackingBatch) -> None:
+        if self.fallback_reason is None:
+            reason = self._send_primary(batch)
+            if reason is None:
+                return
+            self._use_fallback(reason)
+        self._send_fallback(batch)
+
+    def _run(self) -> None:
+        while not (self._closing.is_set() and self._queue.empty()):
+            batch = self._next_batch()
+            if batch:
+                self._deliver(batch)
+
+    def _finish(self, status: str) -> None:
+        for backend in (self.primary, self.fallback):
+            if backend.name not in self._started or (backend is self.primary and self._primary_failed):
+                continue
+            try:
+                backend.finish(status)
+            except Exception as exc:  # pragma: no cover
+                logger.warning("Could not finish %s run %s: %s", backend.name, self.run_name, exc)
+
+    def close(self, status: str = "FINISHED", timeout: float | None = None) -> dict:
+        """Flush what is queued (for at most ``timeout`` seconds), end the run and return its delivery stats."""
+        if self._thread is not None:
+            self._closing.set()
+            timeout = self.close_timeout if timeout is None else timeout
+            finisher = threading.Thread(target=lambda: (self._thread.join(), self._finish(status)), daemon=True)
+            finisher.start()
+            finisher.join(timeout)
+            if finisher.is_alive():
+                self._abandoned.set()
+                self._use_fallback(f"flush took longer than {timeout:.1f}s")
+                leftover = self._drain()
+                if leftover:
+                    self._send_fallback(leftover)
+                if self.fallback.name in self._started:
+                    with self._fallback_lock:
+                        self.fallback.finish(status)
+            self._thread = None
+        return self.stats()
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.primary.name if self.fallback_reason is None else self.fallback.name,
+            "batches": self.batches,
+            "pending": self._queue.qsize(),
+            "dropped": self.dropped,
+            "fallback_reason": self.fallback_reason,
+            "fallback_dir": str(self.fallback.directory) if self.fallback.name in self._started else None,
+        }
+
+    def __enter__(self) -> RunTracker:
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        self.close("FAILED" if exc_type is not None else "FINISHED")
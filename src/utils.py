@@ -1,7 +1,18 @@
 from __future__ import annotations
 
 import logging
+import resource
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
 from pathlib import Path
+from typing import Callable, Iterable, Iterator, TypeVar
+
+F = TypeVar("F", bound=Callable)
 
 
 def setup_logger(name: str = "grid_pm") -> logging.Logger:
@@ -17,3 +28,148 @@ def setup_logger(name: str = "grid_pm") -> logging.Logger:
 
 def ensure_parent_dir(path: str) -> None:
     Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+
+def peak_rss_mb() -> float:
+    """Highest resident set size of this process so far, in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+
+class SpanRecorder:
+    """Named durations collected for one unit of work, such as a request or a pipeline run."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.spans: list[tuple[str, float]] = []
+
+    def add(self, name: str, seconds: float) -> None:
+        self.spans.append((name, seconds))
+
+    def totals(self) -> dict[str, float]:
+        """Seconds per span name, summed over repeats, in first-seen order."""
+        out: dict[str, float] = {}
+        for name, seconds in self.spans:
+            out[name] = out.get(name, 0.0) + seconds
+        return out
+
+    def server_timing(self) -> str:
+        """The spans as a ``Server-Timing`` header value (durations in milliseconds)."""
+        return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.totals().items())
+
+
+_RECORDER: ContextVar[SpanRecorder | None] = ContextVar("span_recorder", default=None)
+
+
+@contextmanager
+def record_spans() -> Iterator[SpanRecorder]:
+    """Collect the spans opened in this context (and threads or tasks started from it)."""
+    recorder = SpanRecorder()
+    token = _RECORDER.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _RECORDER.reset(token)
+
+
+class span:
+    """Time a block or function into the active recorder; without one it only costs a context lookup.
+
+    Use as ``with span("features"):`` or as a ``@span("features")`` decorator.
+    """
+
+    __slots__ = ("name", "_recorder", "_start")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __enter__(self) -> span:
+        self._recorder = _RECORDER.get()
+        if self._recorder is not None:
+            self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self._recorder is not None:
+            self._recorder.add(self.name, time.perf_counter() - self._start)
+
+    def __call__(self, fn: F) -> F:
+        name = self.name
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+
+def mark_span(name: str) -> None:
+    """Record the time from the start of the active recorder until now as ``name``."""
+    recorder = _RECORDER.get()
+    if recorder is not None:
+        recorder.add(name, time.perf_counter() - recorder.started)
+
+
+class SamplingProfiler:
+    """Sample Python stacks on a background thread and write them as collapsed stacks.
+
+    Only stacks that pass through a file under one of ``roots`` are kept, so idle
+    server threads drop out. The output (``frame;frame;frame count`` per line) is
+    read by ``flamegraph.pl``, speedscope and similar tools.
+    """
+
+    def __init__(self, interval: float = 0.002, roots: Iterable[str | Path] = ()) -> None:
+        self.interval = interval
+        self.roots = tuple(str(Path(r).resolve()) for r in roots)
+        self.samples: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _frame_label(self, code) -> str:
+        filename = code.co_filename
+        for root in self.roots:
+            if filename.startswith(root):
+                filename = filename[len(root) + 1 :]
+                break
+        else:
+            filename = Path(filename).name
+        return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+    def _sample(self) -> None:
+        own = threading.get_ident()
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            codes = []
+            while frame is not None:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            if self.roots and not any(c.co_filename.startswith(self.roots) for c in codes):
+                continue
+            self.samples[";".join(self._frame_label(c) for c in reversed(codes))] += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self) -> SamplingProfiler:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+    def write(self, path: str | Path) -> Path:
+        out = Path(path)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(self.collapsed())
+        return out
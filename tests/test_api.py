@@ -1,5 +1,7 @@
 import pytest
 
+pd = pytest.importorskip("pandas")
+
 pytest.importorskip("fastapi")
 from fastapi.testclient import TestClient
 from api.app import app
@@ -43,3 +45,374 @@ def test_predict_with_explanation_endpoint():
     assert response.status_code == 200
     body = response.json()
     assert "failure_probability" in body or "prediction" in body
+
+
+def test_predict_batch_matches_single_predictions():
+    records = [
+        {"air_temperature": 300, "process_temperature": 310, "rotational_speed": 1500, "torque": 40, "tool_wear": 120},
+        {"air_temperature": 302, "process_temperature": 313, "rotational_speed": 1460, "torque": 65, "tool_wear": 210},
+        {"air_temperature": 298, "process_temperature": 307, "rotational_speed": 1540, "torque": 20, "tool_wear": 10},
+    ]
+    response = client.post("/predict_batch", json=records)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["count"] == 3
+
+    singles = [client.post("/predict", json=r).json() for r in records]
+    assert body["failure_probability"] == [s["failure_probability"] for s in singles]
+    assert body["risk_level"] == [s["risk_level"] for s in singles]
+
+
+def test_predict_batch_accepts_columnar_and_ndjson():
+    columnar = {
+        "air_temperature": [300, 301],
+        "process_temperature": [310, 311],
+        "rotational_speed": [1500, 1490],
+        "torque": [40, 42],
+        "tool_wear": [120, 122],
+    }
+    response = client.post("/predict_batch", json=columnar)
+    assert response.status_code == 200
+    assert response.json()["count"] == 2
+
+    ndjson = "\n".join(
+        '{"air_temperature": 300, "process_temperature": 310, "rotational_speed": 1500, "torque": 40, "tool_wear": 120}'
+        for _ in range(4)
+    )
+    response = client.post("/predict_batch", content=ndjson, headers={"content-type": "application/x-ndjson"})
+    assert response.status_code == 200
+    assert response.json()["count"] == 4
+
+
+def test_predict_batch_rejects_invalid_payload():
+    response = client.post("/predict_batch", json={"air_temperature": [300], "torque": [40, 41]})
+    assert response.status_code == 422
+
+
+def test_predict_with_explanation_batch_endpoint():
+    records = [
+        {"air_temperature": 300, "process_temperature": 310, "rotational_speed": 1500, "torque": 40, "tool_wear": 120},
+        {"air_temperature": 302, "process_temperature": 313, "rotational_speed": 1460, "torque": 65, "tool_wear": 210},
+    ]
+    response = client.post("/predict_with_explanation_batch?top_k=2", json=records)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["count"] == 2
+    assert len(body["failure_probability"]) == 2
+
+
+@pytest.fixture
+def registry(monkeypatch, tmp_path):
+    from api import app as app_module
+    from api.model_registry import ModelRegistry
+
+    reg = ModelRegistry(tmp_path / "model.pkl", poll_seconds=0)
+    monkeypatch.setattr(app_module, "REGISTRY", reg)
+    return reg
+
+
+@pytest.fixture(scope="module")
+def sample_model():
+    pytest.importorskip("sklearn")
+    from sklearn.ensemble import GradientBoostingClassifier
+
+    from src.data_loader import load_dataset
+    from src.feature_engineering import FEATURE_COLUMNS, build_features
+
+    feats = build_features(load_dataset("data/raw/ai4i2020.csv"))
+    model = GradientBoostingClassifier(n_estimators=10, random_state=0).fit(feats[FEATURE_COLUMNS], feats["failure"])
+    return model, feats
+
+
+def test_explainer_is_cached_per_artifact(monkeypatch, registry, sample_model):
+    from api import app as app_module
+    from api.model_registry import ModelVersion
+    from src.feature_engineering import FEATURE_COLUMNS
+
+    model, _ = sample_model
+    artifact = {"model": model, "features": FEATURE_COLUMNS}
+    registry.register(ModelVersion("v1", artifact))
+
+    built = []
+    real_build = app_module.build_explainer
+    monkeypatch.setattr(app_module, "build_explainer", lambda m: built.append(m) or real_build(m))
+
+    payload = {"air_temperature": 300, "process_temperature": 310, "rotational_speed": 1500, "torque": 40, "tool_wear": 120}
+    for _ in range(3):
+        assert client.post("/predict_with_explanation", json=payload).status_code == 200
+    body = client.post("/predict_with_explanation_batch?top_k=2", json=[payload, payload]).json()
+    assert len(built) == 1
+    assert [len(c) for c in body["top_contributors"]] == [2, 2]
+
+    registry.register(ModelVersion("v2", dict(artifact)))
+    client.post("/predict_with_explanation", json=payload)
+    assert len(built) == 2
+
+
+def _save_model(model, model_path):
+    import joblib
+
+    from src.feature_engineering import FEATURE_COLUMNS
+    from src.modeling.compiled_model import compile_model, compiled_model_path
+
+    joblib.dump({"model": model, "features": FEATURE_COLUMNS}, model_path)
+    compile_model(model).save(compiled_model_path(model_path))
+
+
+def test_predict_uses_compiled_model_when_exported(registry, sample_model):
+    from src.feature_engineering import FEATURE_COLUMNS, build_features
+
+    model, _ = sample_model
+    _save_model(model, registry.model_path)
+
+    health = client.get("/health").json()
+    assert health["compiled_model"] is True and health["model_version"] == registry.versions()[0]
+    payload = {"air_temperature": 300, "process_temperature": 310, "rotational_speed": 1500, "torque": 40, "tool_wear": 120}
+    body = client.post("/predict", json=payload).json()
+    row = build_features(pd.DataFrame([payload]))[FEATURE_COLUMNS]
+    assert body["failure_probability"] == round(float(model.predict_proba(row)[0, 1]), 4)
+
+
+def test_registry_hot_reloads_routes_by_header_and_shadow_scores(monkeypatch, registry, sample_model):
+    from sklearn.ensemble import GradientBoostingClassifier
+
+    from api import app as app_module
+    from api.model_registry import ShadowScorer
+    from src.feature_engineering import FEATURE_COLUMNS
+
+    model, feats = sample_model
+    _save_model(model, registry.model_path)
+    first = client.get("/health").json()["model_version"]
+
+    other = GradientBoostingClassifier(n_estimators=3, max_depth=1, random_state=0)
+    other.fit(feats[FEATURE_COLUMNS], feats["failure"])
+    _save_model(other, registry.model_path)
+    assert registry.refresh() != []
+    second = client.get("/health").json()["model_version"]
+    assert second != first and registry.versions() == [first, second]
+
+    payload = {"air_temperature": 300, "process_temperature": 310, "rotational_speed": 1500, "torque": 40, "tool_wear": 120}
+    pinned = client.post("/predict", json=payload, headers={"X-Model-Version": first}).json()
+    current = client.post("/predict", json=payload).json()
+    assert pinned != current
+    assert client.post("/predict", json=payload, headers={"X-Model-Version": "nope"}).status_code == 404
+
+    shadow = ShadowScorer()
+    monkeypatch.setattr(app_module, "SHADOW", shadow)
+    monkeypatch.setattr(app_module, "SHADOW_VERSION", first)
+    client.post("/predict_batch", json=[payload, payload])
+    shadow.flush()
+    assert client.get("/health").json()["shadow"]["rows"] == 2
+
+    registry.model_path.write_bytes(b"not a pickle")
+    registry.refresh()
+    assert client.get("/health").json()["model_version"] == second
+
+
+def test_shadow_scores_with_its_own_transformer():
+    from types import SimpleNamespace
+
+    import numpy as np
+
+    from api.model_registry import ShadowScorer
+    from src.feature_engineering import FeatureTransformer
+
+    seen = []
+
+    def predict(feats):
+        seen.append(feats)
+        return np.full(len(feats), 0.9)
+
+    transformer = FeatureTransformer({"torque": 35.0}, feature_names=["torque", "tool_wear", "torque_roll_mean_5"])
+    entry = SimpleNamespace(version="shadow", transformer=transformer, predict=predict)
+    data = pd.DataFrame({"air_temperature": [300.0], "process_temperature": [310.0], "rotational_speed": [1500.0]})
+    data = data.assign(torque=[np.nan], tool_wear=[120.0])
+    shadow = ShadowScorer(high_risk_threshold=0.75)
+    assert shadow.submit(entry, data, (np.array([41.0]), np.array([39.0])), np.array([0.5]))
+    shadow.flush()
+
+    assert list(seen[0].columns) == ["torque", "tool_wear", "torque_roll_mean_5"]
+    assert seen[0]["torque"].iloc[0] == 35.0 and seen[0]["torque_roll_mean_5"].iloc[0] == 41.0
+    assert shadow.stats()["high_risk_flips"] == 1
+
+
+def test_drift_endpoint_reports_scored_traffic(registry, sample_model):
+    from api.model_registry import ModelVersion
+    from monitoring.streaming_drift import HistogramSketch, StreamingDriftMonitor
+    from src.feature_engineering import FEATURE_COLUMNS
+
+    model, feats = sample_model
+    monitor = StreamingDriftMonitor(HistogramSketch.from_reference(feats[FEATURE_COLUMNS]))
+    registry.register(ModelVersion("v1", {"model": model, "features": FEATURE_COLUMNS}, drift_monitor=monitor))
+
+    records = feats[["air_temperature", "process_temperature", "rotational_speed", "torque", "tool_wear"]]
+    assert client.post("/predict_batch", json=records.to_dict(orient="records")).status_code == 200
+
+    body = client.get("/drift?include_sketch=true").json()
+    assert body["enabled"] and body["count"] == len(records)
+    assert set(body["features"]) == set(FEATURE_COLUMNS)
+    assert body["sketch"]["features"] == FEATURE_COLUMNS
+    assert client.get("/drift?window=hourly").status_code == 422
+
+
+def test_metrics_endpoint_counts_predictions():
+    before = client.get("/metrics").text
+    payload = {"air_temperature": 300, "process_temperature": 310, "rotational_speed": 1500, "torque": 40, "tool_wear": 120}
+    client.post("/predict", json=payload)
+    client.post("/predict_batch", json=[payload, payload])
+
+    def total(text):
+        return int(next(line for line in text.splitlines() if line.startswith("gpm_predictions_total ")).split()[1])
+
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain")
+    assert total(response.text) == total(before) + 3
+    assert 'gpm_http_request_duration_seconds_count{route="/predict"}' in response.text
+
+
+def test_predict_micro_batches_concurrent_requests(monkeypatch):
+    import asyncio
+
+    import httpx
+
+    from api import app as app_module
+    from api.batching import MicroBatcher
+
+    batcher = MicroBatcher(app_module._score_tracked, max_batch_size=16, max_wait_ms=20)
+    monkeypatch.setattr(app_module, "BATCHER", batcher)
+    payloads = [
+        {"air_temperature": 300, "process_temperature": 310, "rotational_speed": 1500, "torque": 20 + i, "tool_wear": 5 * i}
+        for i in range(8)
+    ]
+
+    async def fire():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            return await asyncio.gather(*(ac.post("/predict", json=p) for p in payloads))
+
+    batched = [r.json() for r in asyncio.run(fire())]
+    assert batcher.stats.rows == 8 and batcher.stats.batches < 8
+    assert "gpm_microbatch_queue_depth" in client.get("/metrics").text
+
+    monkeypatch.setattr(app_module, "BATCHER", None)
+    assert batched == [client.post("/predict", json=p).json() for p in payloads]
+
+
+def test_registry_serves_directory_artifact_without_loading_the_estimator(registry):
+    pytest.importorskip("xgboost")
+    from src.modeling.train_xgboost import train_xgboost
+
+    train_xgboost("data/raw/ai4i2020.csv", str(registry.model_path), random_state=7)
+    registry.model_path.unlink()  # only the directory artifact remains
+
+    health = client.get("/health").json()
+    assert health["model_loaded"] and health["compiled_model"]
+    payload = {"air_temperature": 300, "process_temperature": 310, "rotational_speed": 1500, "torque": 40, "tool_wear": 120}
+    assert client.post("/predict", json=payload).status_code == 200
+    assert not registry.current().artifact.model_loaded
+
+
+def test_server_timing_header_and_phase_metrics(monkeypatch, tmp_path, registry, sample_model):
+    import dataclasses
+
+    from api import app as app_module
+    from api.model_registry import ModelVersion
+
+    model, _ = sample_model
+    registry.register(ModelVersion(version="v1", artifact={"model": model}))
+    config = dataclasses.replace(app_module.CONFIG, profile_slow_ms=1e-6, profile_dir=str(tmp_path))
+    monkeypatch.setattr(app_module, "CONFIG", config)
+    payload = {"air_temperature": 300, "process_temperature": 310, "rotational_speed": 1500, "torque": 40, "tool_wear": 120}
+
+    response = client.post("/predict_with_explanation", json=payload)
+    assert response.status_code == 200
+    phases = dict(part.split(";dur=") for part in response.headers["server-timing"].split(", "))
+    assert {"validate", "features", "predict", "explain", "total"} <= set(phases)
+    assert float(phases["total"]) >= float(phases["explain"])
+
+    profile = (tmp_path / "predict_with_explanation.collapsed").read_text()
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in profile.splitlines())
+
+    text = client.get("/metrics").text
+    assert 'gpm_request_phase_duration_seconds_count{route="/predict_with_explanation",phase="explain"}' in text
+
+
+def test_prediction_responses_include_requested_survival_horizons():
+    payload = {"air_temperature": 300, "process_temperature": 310, "rotational_speed": 1500, "torque": 40, "tool_wear": 120}
+    plain = client.post("/predict", json=payload).json()
+    assert "survival_risk" not in plain
+
+    single = client.post("/predict?horizons=7,30,90", json=payload).json()
+    assert single["horizons"] == [7, 30, 90]
+    assert single["survival_risk"] == sorted(single["survival_risk"])
+    assert single["survival_risk"][1] == pytest.approx(single["failure_probability"], abs=1e-3)
+
+    batch = client.post("/predict_batch?horizons=30,365", json=[payload, payload]).json()
+    assert len(batch["survival_risk"]) == 2 and len(batch["survival_risk"][0]) == 2
+
+    assert client.post("/predict?horizons=7,abc", json=payload).status_code == 422
+    assert client.post("/predict?horizons=0", json=payload).status_code == 422
+
+
+def test_ready_waits_for_model_and_explainer(monkeypatch, sample_model):
+    import threading
+
+    from api import app as app_module
+    from api.model_registry import ModelRegistry, ModelVersion
+    from src.feature_engineering import FEATURE_COLUMNS
+
+    registry = ModelRegistry("missing.pkl", poll_seconds=0)
+    monkeypatch.setattr(app_module, "REGISTRY", registry)
+    results = []
+    with registry._lock:  # a load in progress on another thread
+        thread = threading.Thread(target=lambda: results.extend([client.get("/health"), client.get("/ready")]))
+        thread.start()
+        thread.join(timeout=5)
+    health, ready = results
+    assert health.json()["status"] == "ok" and health.json()["ready"] is False
+    assert ready.status_code == 503
+
+    model, _ = sample_model
+    registry.register(ModelVersion("v1", {"model": model, "features": FEATURE_COLUMNS}))
+    registry._initialized = True
+    assert client.get("/ready").json()["checks"] == {"model": True, "explainer": False}
+
+    app_module._warm_up()
+    response = client.get("/ready")
+    assert response.status_code == 200 and response.json()["ready"] is True
+    assert client.get("/health").json()["ready"] is True
+
+
+def test_result_cache_serves_repeated_readings_until_the_model_reloads(monkeypatch, registry, sample_model):
+    from api import app as app_module
+    from api.model_registry import ModelVersion
+    from api.result_cache import ResultCache
+    from src.feature_engineering import FEATURE_COLUMNS
+
+    model, _ = sample_model
+    artifact = {"model": model, "features": FEATURE_COLUMNS}
+    registry.register(ModelVersion("v1", artifact, loaded_at=1.0))
+    payload = {"air_temperature": 300, "process_temperature": 310, "rotational_speed": 1500, "torque": 40, "tool_wear": 120}
+    uncached = client.post("/predict_with_explanation", json=payload).json()
+    batch = [payload, {**payload, "torque": 55}]
+    uncached_batch = client.post("/predict_batch", json=batch).json()
+
+    monkeypatch.setattr(app_module, "RESULT_CACHE", ResultCache(decimals=2))
+    explained = []
+    real_explain = app_module.explain_single_prediction
+    monkeypatch.setattr(
+        app_module, "explain_single_prediction", lambda *a, **k: explained.append(1) or real_explain(*a, **k)
+    )
+    for torque in (40, 40, 40.001):
+        assert client.post("/predict_with_explanation", json={**payload, "torque": torque}).json() == uncached
+    assert len(explained) == 1
+    assert client.post("/predict_batch", json=batch).json() == uncached_batch
+    assert client.post("/predict_batch", json=batch).json() == uncached_batch
+
+    registry.register(ModelVersion("v1", dict(artifact), loaded_at=2.0))
+    client.post("/predict_with_explanation", json=payload)
+    assert len(explained) == 2
+    text = client.get("/metrics").text
+    assert 'gpm_result_cache_hits_total{kind="explain"} 2' in text
+    assert 'gpm_result_cache_hits_total{kind="score"} 2' in text
+    assert "gpm_result_cache_invalidations_total 3" in text
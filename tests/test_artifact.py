@@ -0,0 +1,54 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("sklearn")
+pytest.importorskip("xgboost")
+
+from src.modeling.artifact import ModelArtifact, artifact_dir, load_artifact, write_artifact
+
+
+def test_training_writes_lazy_directory_artifact(tmp_path):
+    import joblib
+
+    from src.data_loader import load_dataset
+    from src.feature_engineering import FEATURE_COLUMNS, build_features
+    from src.modeling.train_xgboost import train_xgboost
+
+    model_path = tmp_path / "model.pkl"
+    train_xgboost("data/raw/ai4i2020.csv", str(model_path), random_state=7)
+
+    artifact = load_artifact(model_path)
+    assert isinstance(artifact, ModelArtifact)
+    assert (artifact_dir(model_path) / "model.ubj").exists()
+    assert artifact["features"] == FEATURE_COLUMNS
+    assert set(artifact["monitoring_baseline"]) == set(FEATURE_COLUMNS)
+    assert artifact["backend"] == "XGBClassifier"
+    assert not artifact.model_loaded
+
+    X = build_features(load_dataset("data/raw/ai4i2020.csv"))[FEATURE_COLUMNS]
+    legacy = joblib.load(model_path)
+    np.testing.assert_allclose(
+        artifact["model"].predict_proba(X)[:, 1], legacy["model"].predict_proba(X)[:, 1], rtol=1e-6
+    )
+    assert artifact.model_loaded
+    assert legacy["metrics"] == artifact["metrics"]
+
+
+def test_non_xgboost_models_and_legacy_pickles_still_load(tmp_path):
+    import joblib
+    from sklearn.linear_model import LogisticRegression
+
+    rng = np.random.default_rng(0)
+    X, y = rng.normal(size=(50, 3)), rng.integers(0, 2, 50)
+    model = LogisticRegression().fit(X, y)
+
+    write_artifact(model, {"features": ["a", "b", "c"], "score": np.float32(0.5)}, tmp_path / "lr.pkl")
+    artifact = load_artifact(tmp_path / "lr.pkl")
+    assert artifact["score"] == 0.5
+    np.testing.assert_allclose(artifact["model"].predict_proba(X), model.predict_proba(X))
+
+    joblib.dump({"model": model, "features": ["a", "b", "c"]}, tmp_path / "old.pkl")
+    legacy = load_artifact(tmp_path / "old.pkl")
+    assert isinstance(legacy, dict) and legacy["features"] == ["a", "b", "c"]
+    with pytest.raises(FileNotFoundError):
+        load_artifact(tmp_path / "missing.pkl")
@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+pytest.importorskip("starlette")
+
+from api.batching import MicroBatcher
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_concurrent_submits_share_one_scoring_call():
+    calls = []
+
+    def score(frame):
+        calls.append(len(frame))
+        return frame["x"].to_numpy(dtype=float) * 2
+
+    batcher = MicroBatcher(score, max_batch_size=64, max_wait_ms=20)
+
+    async def main():
+        return await asyncio.gather(*(batcher.submit({"x": i}) for i in range(10)))
+
+    assert _run(main()) == [2.0 * i for i in range(10)]
+    assert calls == [10]
+    assert batcher.stats.rows == 10 and batcher.stats.batches == 1
+    assert any(line.startswith("gpm_microbatch_size_count 1") for line in batcher.prometheus_lines())
+
+
+def test_batches_are_capped_and_errors_reach_every_caller():
+    calls = []
+    batcher = MicroBatcher(lambda f: calls.append(len(f)) or np.zeros(len(f)), max_batch_size=4, max_wait_ms=5)
+
+    async def main():
+        return await asyncio.gather(*(batcher.submit({"x": i}) for i in range(10)))
+
+    assert _run(main()) == [0.0] * 10
+    assert calls == [4, 4, 2]
+
+    def boom(frame):
+        raise RuntimeError("model unavailable")
+
+    failing = MicroBatcher(boom, max_wait_ms=5)
+
+    async def failing_main():
+        return await asyncio.gather(*(failing.submit({"x": i}) for i in range(3)), return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in _run(failing_main()))
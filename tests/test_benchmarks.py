@@ -0,0 +1,34 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from benchmarks.suite import compare, scaled_dataset
+
+
+def _result(case, rows, wall, p99=None, rss=100.0):
+    return {"case": case, "rows": rows, "wall_s": wall, "p99_s": p99 or wall, "peak_rss_mb": rss}
+
+
+def test_compare_flags_only_regressions_beyond_threshold():
+    baseline = [_result("train", 1000, 1.0), _result("features", 1000, 0.001), _result("load", 1000, 0.5, rss=100.0)]
+    results = [
+        _result("train", 1000, 1.5),  # 50% slower
+        _result("features", 1000, 0.003),  # 3x slower but below the noise floor
+        _result("load", 1000, 0.55, rss=200.0),  # within time budget, memory doubled
+        _result("new_case", 1000, 9.0),  # no baseline yet
+    ]
+    regressions = compare(results, baseline, threshold=0.25)
+    assert len(regressions) == 3
+    assert sum("train@1000: wall_s" in r for r in regressions) == 1
+    assert any("load@1000: peak_rss_mb" in r for r in regressions)
+    assert not any("features" in r or "new_case" in r for r in regressions)
+
+
+def test_scaled_dataset_tiles_the_sample(tmp_path):
+    path = scaled_dataset(45, out_dir=tmp_path)
+    df = pd.read_csv(path)
+    source = pd.read_csv("data/raw/ai4i2020.csv")
+    assert len(df) == 45
+    assert list(df.columns) == list(source.columns)
+    assert df["failure"].sum() == source["failure"].sum() * 2 + source["failure"].iloc[: 45 - 2 * len(source)].sum()
+    assert scaled_dataset(45, out_dir=tmp_path) == path
@@ -0,0 +1,49 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+pytest.importorskip("sklearn")
+
+from sklearn.ensemble import GradientBoostingClassifier
+
+from src.modeling.compiled_model import CompiledEnsemble, compile_model
+
+
+@pytest.fixture(scope="module")
+def synthetic():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(2000, 6)), columns=[f"x{i}" for i in range(6)])
+    y = ((X["x0"] + X["x1"] * X["x2"] + rng.normal(scale=0.5, size=len(X))) > 0.5).astype(int)
+    return X, y
+
+
+def test_compiled_xgboost_matches_predict_proba(synthetic, tmp_path):
+    xgboost = pytest.importorskip("xgboost")
+    X, y = synthetic
+    X = X.copy()
+    X.iloc[::9, 1] = np.nan
+    model = xgboost.XGBClassifier(n_estimators=60, max_depth=5, learning_rate=0.1, scale_pos_weight=3.0).fit(X, y)
+
+    compiled = compile_model(model)
+    compiled.save(tmp_path / "model.npz")
+    reloaded = CompiledEnsemble.load(tmp_path / "model.npz")
+
+    expected = model.predict_proba(X)[:, 1]
+    np.testing.assert_allclose(reloaded.predict_proba(X)[:, 1], expected, atol=1e-5)
+    np.testing.assert_allclose(reloaded.predict_proba(X.to_numpy())[:, 1], expected, atol=1e-5)
+
+
+def test_compiled_sklearn_gbm_matches_predict_proba(synthetic):
+    X, y = synthetic
+    model = GradientBoostingClassifier(n_estimators=40, max_depth=4, random_state=0).fit(X, y)
+    compiled = compile_model(model)
+    np.testing.assert_allclose(compiled.predict_proba(X)[:, 1], model.predict_proba(X)[:, 1], atol=1e-9)
+    assert compiled.n_trees == 40
+
+
+def test_compile_rejects_unsupported_model(synthetic):
+    from sklearn.linear_model import LogisticRegression
+
+    X, y = synthetic
+    with pytest.raises(TypeError):
+        compile_model(LogisticRegression().fit(X, y))
@@ -12,3 +12,92 @@ def test_load_and_feature_build():
     feat_df = build_features(df)
     assert "temp_diff" in feat_df.columns
     assert len(feat_df) == len(df)
+
+
+def test_columnar_cache_round_trip_and_reuse(tmp_path, monkeypatch):
+    import numpy as np
+
+    from src import data_loader
+
+    csv_path = tmp_path / "telemetry.csv"
+    csv_path.write_text(open("data/raw/ai4i2020.csv").read())
+    cache_dir = str(tmp_path / "cache")
+
+    cached = load_dataset(str(csv_path), use_cache=True, cache_dir=cache_dir)
+    plain = load_dataset(str(csv_path))
+    assert cached["torque"].dtype == np.float32
+    np.testing.assert_allclose(cached[plain.columns].to_numpy(dtype=float), plain.to_numpy(dtype=float))
+
+    def _no_parse(*args, **kwargs):
+        raise AssertionError("cache hit should not parse the CSV")
+
+    monkeypatch.setattr(data_loader.pd, "read_csv", _no_parse)
+    again = load_dataset(str(csv_path), use_cache=True, cache_dir=cache_dir)
+    assert isinstance(data_loader.open_columns(str(csv_path), cache_dir=cache_dir)["torque"], np.memmap)
+    assert len(again) == len(plain)
+    monkeypatch.undo()
+
+    with open(csv_path, "a") as fh:
+        fh.write("300,310,1500,40,120,1\n")
+    assert len(load_dataset(str(csv_path), use_cache=True, cache_dir=cache_dir)) == len(plain) + 1
+
+
+def test_iter_dataset_chunks_projects_columns(tmp_path):
+    from src.data_loader import iter_dataset_chunks
+
+    for use_cache in (False, True):
+        chunks = list(
+            iter_dataset_chunks(
+                "data/raw/ai4i2020.csv",
+                chunksize=7,
+                columns=["torque", "failure"],
+                use_cache=use_cache,
+                cache_dir=str(tmp_path / "cache"),
+            )
+        )
+        assert [len(c) for c in chunks] == [7, 7, 6]
+        assert all(list(c.columns) == ["torque", "failure"] for c in chunks)
+
+
+def test_cache_builds_from_parquet_and_wraps_the_memmaps(tmp_path):
+    import numpy as np
+
+    pytest.importorskip("pyarrow")
+    from src.data_loader import open_columns
+
+    plain = load_dataset("data/raw/ai4i2020.csv")
+    parquet_path = tmp_path / "telemetry.parquet"
+    plain.to_parquet(parquet_path)
+    cache_dir = str(tmp_path / "cache")
+
+    assert load_dataset(str(parquet_path)).equals(plain)
+    cached = load_dataset(str(parquet_path), use_cache=True, cache_dir=cache_dir)
+    np.testing.assert_allclose(cached[plain.columns].to_numpy(dtype=float), plain.to_numpy(dtype=float), rtol=1e-6)
+    assert isinstance(open_columns(str(parquet_path), cache_dir=cache_dir)["torque"], np.memmap)
+    values = cached["torque"].to_numpy()
+    while not isinstance(values, np.memmap) and isinstance(values.base, np.ndarray):
+        values = values.base
+    assert isinstance(values, np.memmap)
+
+
+def test_cached_and_csv_loads_agree_on_missing_asset_ids(tmp_path):
+    import numpy as np
+    import pandas as pd
+
+    from src.data_loader import open_columns
+
+    source = pd.read_csv("data/raw/ai4i2020.csv")
+    source["asset_id"] = ["a", None, "b", None] * 5
+    csv_path = tmp_path / "fleet.csv"
+    source.to_csv(csv_path, index=False)
+
+    cache_dir = str(tmp_path / "cache")
+    cached = load_dataset(str(csv_path), use_cache=True, cache_dir=cache_dir)
+    plain = load_dataset(str(csv_path))
+    assert cached["asset_id"].isna().sum() == 10
+    codes = open_columns(str(csv_path), cache_dir=cache_dir, decode_assets=False)["asset_id"]
+    assert set(codes[1::2].tolist()) == {-1} and set(codes[::2].tolist()) == {0, 1}
+    np.testing.assert_allclose(
+        build_features(cached)["torque_roll_mean_5"], build_features(plain)["torque_roll_mean_5"], rtol=1e-6
+    )
+    assert [p.name for p in (tmp_path / "cache").glob("index.json*")] == ["index.json"]
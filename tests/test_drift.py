@@ -0,0 +1,56 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+stats = pytest.importorskip("scipy.stats")
+
+from monitoring.streaming_drift import HistogramSketch, StreamingDriftMonitor, drift_scores, merge_sketches
+
+
+def _frame(rng, n, shift=0.0):
+    return pd.DataFrame({"torque": rng.normal(40 + shift, 5, n), "tool_wear": rng.uniform(0, 250, n)})
+
+
+def test_sketch_scores_track_exact_statistics():
+    rng = np.random.default_rng(0)
+    reference, current = _frame(rng, 20_000), _frame(rng, 5_000, shift=3.0)
+    ref_sketch = HistogramSketch.from_reference(reference, bins=128)
+    cur_sketch = ref_sketch.empty_like()
+    cur_sketch.update(current)
+
+    scores = drift_scores(ref_sketch, cur_sketch)
+    exact_ks = stats.ks_2samp(reference["torque"], current["torque"]).statistic
+    exact_w1 = stats.wasserstein_distance(reference["torque"], current["torque"])
+    assert scores["torque"].ks == pytest.approx(exact_ks, abs=0.02)
+    assert scores["torque"].wasserstein == pytest.approx(exact_w1, rel=0.05)
+    assert scores["torque"].drift_detected
+    assert not scores["tool_wear"].drift_detected
+
+
+def test_worker_sketches_merge_to_the_single_sketch():
+    rng = np.random.default_rng(1)
+    reference, traffic = _frame(rng, 5_000), _frame(rng, 3_000)
+    ref_sketch = HistogramSketch.from_reference(reference)
+    parts = [ref_sketch.empty_like() for _ in range(3)]
+    for part, rows in zip(parts, np.array_split(np.arange(len(traffic)), 3)):
+        part.update(traffic.iloc[rows])
+
+    whole = ref_sketch.empty_like()
+    whole.update(traffic)
+    roundtrip = [HistogramSketch.from_dict(p.to_dict()) for p in parts]
+    np.testing.assert_array_equal(merge_sketches(roundtrip).counts, whole.counts)
+
+
+def test_monitor_windows_keep_fixed_memory():
+    rng = np.random.default_rng(2)
+    monitor = StreamingDriftMonitor(HistogramSketch.from_reference(_frame(rng, 5_000)), slot_seconds=10, slots_per_window=6)
+    footprint = monitor._counts.nbytes
+    for t in range(0, 600, 5):
+        monitor.update(_frame(rng, 50, shift=10.0 if t >= 540 else 0.0), now=float(t))
+    assert monitor._counts.nbytes == footprint
+
+    sliding = monitor.report("sliding", now=599.0)
+    assert sliding["count"] == 12 * 50 and sliding["drift_detected"]
+    tumbling = monitor.report("tumbling", now=599.0)
+    assert (tumbling["start"], tumbling["end"]) == (480.0, 540.0)
+    assert not tumbling["features"]["torque"].drift_detected
@@ -14,3 +14,65 @@ def test_evaluate_binary_outputs_reasonable_metrics():
     assert 0.0 <= m.pr_auc <= 1.0
     assert 0.0 <= m.f1 <= 1.0
     assert m.expected_cost >= 0
+
+
+def test_streaming_metrics_match_full_evaluation():
+    from src.modeling.evaluate import StreamingBinaryMetrics
+
+    rng = np.random.default_rng(0)
+    y_true = rng.integers(0, 2, size=5000)
+    y_proba = np.clip(rng.normal(0.35 + 0.3 * y_true, 0.2), 0, 1)
+
+    acc = StreamingBinaryMetrics(threshold=0.5)
+    for start in range(0, len(y_true), 700):
+        acc.update(y_true[start : start + 700], y_proba[start : start + 700])
+    streamed = acc.result()
+    full = evaluate_binary(y_true, y_proba, threshold=0.5)
+
+    assert streamed.f1 == pytest.approx(full.f1)
+    assert streamed.expected_cost == full.expected_cost
+    assert streamed.roc_auc == pytest.approx(full.roc_auc, abs=1e-3)
+    assert streamed.pr_auc == pytest.approx(full.pr_auc, abs=5e-3)
+
+
+def test_threshold_above_every_score_predicts_nothing():
+    y_true = np.array([0, 1, 0, 1, 0])
+    y_proba = np.array([0.1, 0.3, 0.2, 0.25, 0.05])
+    m = evaluate_binary(y_true, y_proba, threshold=0.5)
+    assert m.f1 == 0.0
+    assert m.expected_cost == 20.0
+
+
+def test_cost_curve_matches_threshold_loop_and_sklearn():
+    from sklearn.metrics import average_precision_score, roc_auc_score
+
+    from src.modeling.evaluate import cost_curve
+
+    rng = np.random.default_rng(1)
+    y_true = rng.random(2000) < 0.1
+    y_proba = np.round(rng.random(2000) * 0.5 + 0.4 * y_true, 2)  # plenty of ties
+
+    curve = cost_curve(y_true, y_proba, fn_cost=5.0, fp_cost=2.0)
+    for t, cost in zip(curve.thresholds, curve.cost):
+        pred = y_proba >= t
+        assert cost == 5.0 * (y_true & ~pred).sum() + 2.0 * (~y_true & pred).sum()
+
+    m = evaluate_binary(y_true, y_proba, fn_cost=5.0, fp_cost=2.0)
+    assert m.optimal_cost == curve.cost.min()
+    assert m.expected_cost == curve.cost[curve.at(0.5)]
+    assert m.roc_auc == pytest.approx(roc_auc_score(y_true, y_proba))
+    assert m.pr_auc == pytest.approx(average_precision_score(y_true, y_proba))
+
+
+def test_bootstrap_intervals_bracket_point_estimates():
+    from src.modeling.evaluate import bootstrap_intervals
+
+    rng = np.random.default_rng(2)
+    y_true = rng.integers(0, 2, size=3000)
+    y_proba = np.clip(rng.normal(0.35 + 0.3 * y_true, 0.2), 0, 1)
+
+    m = evaluate_binary(y_true, y_proba)
+    ci = bootstrap_intervals(y_true, y_proba, n_boot=100, random_state=0)
+    assert ci["pr_auc"][0] < m.pr_auc < ci["pr_auc"][1]
+    assert ci["expected_cost"][0] < m.expected_cost < ci["expected_cost"][1]
+    assert ci == bootstrap_intervals(y_true, y_proba, n_boot=100, random_state=0)
@@ -0,0 +1,83 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+pytest.importorskip("sklearn")
+
+from sklearn.ensemble import GradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression
+
+from src.data_loader import load_dataset
+from src.explainability.shap_analysis import build_explainer, explain_batch, explain_single_prediction
+from src.feature_engineering import FEATURE_COLUMNS, build_features
+
+
+@pytest.fixture(scope="module")
+def training_data():
+    feats = build_features(load_dataset("data/raw/ai4i2020.csv"))
+    return feats[FEATURE_COLUMNS], feats["failure"].astype(int)
+
+
+def _top(local: dict[str, float], k: int) -> dict[str, float]:
+    return dict(sorted(local.items(), key=lambda kv: abs(kv[1]), reverse=True)[:k])
+
+
+def test_explain_batch_matches_single_row_explanations(training_data):
+    pytest.importorskip("shap")
+    X, y = training_data
+    model = GradientBoostingClassifier(n_estimators=20, random_state=0).fit(X, y)
+    explainer = build_explainer(model)
+    assert explainer is not None
+
+    batch = explain_batch(model, X.head(5), top_k=3, explainer=explainer)
+    for i, contributors in enumerate(batch):
+        single = explain_single_prediction(model, X.iloc[[i]], explainer=explainer)
+        assert list(contributors) == list(_top(single, 3))
+        np.testing.assert_allclose(list(contributors.values()), list(_top(single, 3).values()), rtol=1e-6)
+
+
+def test_explain_batch_perturbation_fallback_matches_single_row(training_data):
+    X, y = training_data
+    model = LogisticRegression(max_iter=1000).fit(X, y)
+
+    batch = explain_batch(model, X.head(4), top_k=2)
+    for i, contributors in enumerate(batch):
+        single = explain_single_prediction(model, X.iloc[[i]])
+        assert contributors == pytest.approx(_top(single, 2))
+
+
+class _CountingModel:
+    """Scores with column 0 only and records how many predict calls it served."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def predict_proba(self, X):
+        self.calls += 1
+        p = 1 / (1 + np.exp(-np.asarray(X, dtype=float)[:, 0]))
+        return np.column_stack([1 - p, p])
+
+
+def test_permutation_importance_is_seeded_stacked_and_thread_invariant(monkeypatch):
+    from src.explainability import permutation
+    from src.explainability.permutation import permutation_importance
+
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(300, 4)), columns=["a", "b", "c", "d"])
+    model = _CountingModel()
+
+    serial = permutation_importance(model, X, n_repeats=4, random_state=7)
+    assert model.calls == 1 + X.shape[1]
+    assert serial.importances.shape == (4, 4)
+    assert serial.importances_mean["a"] > 0
+    assert (serial.importances_mean[["b", "c", "d"]] == 0).all()
+
+    threaded = permutation_importance(model, X, n_repeats=4, random_state=7, n_jobs=3)
+    pd.testing.assert_series_equal(serial.importances_mean, threaded.importances_mean)
+    monkeypatch.setattr(permutation, "MAX_BLOCK_ROWS", 600)  # two repeats per call
+    model.calls = 0
+    blocked = permutation_importance(model, X, n_repeats=4, random_state=7)
+    assert model.calls == 1 + X.shape[1] * 2
+    pd.testing.assert_frame_equal(serial.importances, blocked.importances)
+    subsampled = permutation_importance(model, X, n_repeats=2, max_samples=0.5)
+    assert subsampled.importances_mean.idxmax() == "a"
@@ -0,0 +1,91 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+from src.feature_engineering import build_features
+from src.feature_store import AssetFeatureStore, rolling_torque_features
+
+
+def test_offline_rolling_matches_pandas_for_single_asset():
+    torque = np.array([40.0, 42.0, 38.0, 45.0, 39.0, 47.0, 36.0, 49.0])
+    roll, lag = rolling_torque_features(torque)
+    s = pd.Series(torque)
+    np.testing.assert_allclose(roll, s.rolling(window=5, min_periods=1).mean())
+    np.testing.assert_allclose(lag, s.shift(1).bfill())
+
+
+def test_online_store_matches_offline_groupby_path():
+    rng = np.random.default_rng(0)
+    assets = rng.choice(["T1", "T2", "T3"], size=200)
+    torque = rng.normal(40, 5, size=200)
+
+    store = AssetFeatureStore(initial_capacity=1)
+    online = np.array([store.update(a, t) for a, t in zip(assets, torque)])
+    roll, lag = rolling_torque_features(torque, assets)
+
+    np.testing.assert_allclose(online[:, 0], roll)
+    np.testing.assert_allclose(online[:, 1], lag)
+    assert len(store) == 3
+
+
+def test_build_features_does_not_mix_assets():
+    df = pd.DataFrame(
+        {
+            "air_temperature": [300.0] * 4,
+            "process_temperature": [310.0] * 4,
+            "rotational_speed": [1500.0] * 4,
+            "torque": [10.0, 50.0, 20.0, 60.0],
+            "tool_wear": [100.0] * 4,
+            "asset_id": ["a", "b", "a", "b"],
+        }
+    )
+    feats = build_features(df)
+    assert feats["torque_lag_1"].tolist() == [10.0, 50.0, 10.0, 50.0]
+    assert feats["torque_roll_mean_5"].tolist() == [10.0, 50.0, 15.0, 55.0]
+
+
+def test_update_many_skips_rows_without_asset():
+    store = AssetFeatureStore()
+    store.update("a", 10.0)
+    roll, lag = store.update_many(["a", None], np.array([30.0, 70.0]))
+    assert roll.tolist() == [20.0, 70.0]
+    assert lag.tolist() == [10.0, 70.0]
+    assert len(store) == 1
+
+
+def test_chunked_rolling_matches_single_pass():
+    from src.feature_store import ChunkedRollingFeatures
+
+    rng = np.random.default_rng(1)
+    assets = rng.choice(["T1", "T2", "T3", "T4"], size=103)
+    torque = rng.normal(40, 5, size=103)
+    roll, lag = rolling_torque_features(torque, assets)
+
+    for ids in (assets, None):
+        expected = (roll, lag) if ids is not None else rolling_torque_features(torque)
+        state = ChunkedRollingFeatures()
+        parts = [state.transform(torque[i : i + 10], None if ids is None else ids[i : i + 10]) for i in range(0, 103, 10)]
+        np.testing.assert_allclose(np.concatenate([p[0] for p in parts]), expected[0])
+        np.testing.assert_allclose(np.concatenate([p[1] for p in parts]), expected[1])
+
+
+def test_store_evicts_least_recently_updated_asset():
+    store = AssetFeatureStore(initial_capacity=1, max_assets=2)
+    store.update("a", 10.0)
+    store.update("b", 20.0)
+    store.update("a", 30.0)
+    assert store.update("c", 50.0) == (50.0, 50.0)
+    assert "b" not in store and len(store) == 2 and store.evictions == 1
+    assert store.update("a", 50.0) == (30.0, 30.0)
+    assert store.update("b", 40.0) == (40.0, 40.0)  # history was dropped
+
+
+def test_missing_ids_are_stateless_offline_and_online():
+    torque = np.array([10.0, 20.0, 30.0, 40.0])
+    ids = ["a", None, np.nan, "a"]
+    roll, lag = rolling_torque_features(torque, ids)
+    online = AssetFeatureStore().update_many(ids, torque)
+    np.testing.assert_allclose(roll, online[0])
+    np.testing.assert_allclose(lag, online[1])
+    assert roll.tolist() == [10.0, 20.0, 30.0, 25.0]
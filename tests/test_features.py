@@ -0,0 +1,42 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+from src.feature_engineering import FEATURE_COLUMNS, FeatureTransformer, build_features
+from src.preprocessing import preprocess
+
+
+def test_transformer_matches_preprocess_and_build_features():
+    rng = np.random.default_rng(0)
+    n = 500
+    df = pd.DataFrame(
+        {
+            "air_temperature": rng.normal(300, 2, n),
+            "process_temperature": rng.normal(310, 1.5, n),
+            "rotational_speed": rng.integers(1300, 1700, n),
+            "torque": rng.normal(40, 10, n),
+            "tool_wear": rng.integers(0, 250, n),
+            "asset_id": rng.choice(["a", "b", "c"], n),
+            "failure": rng.integers(0, 2, n),
+        }
+    )
+    df.loc[::7, "torque"] = np.nan
+    df.loc[::11, "air_temperature"] = np.nan
+
+    transformer = FeatureTransformer.fit(df)
+    X = transformer.transform(df)
+    expected = build_features(preprocess(df))[FEATURE_COLUMNS].to_numpy(dtype=np.float32)
+    assert X.dtype == np.float32 and X.flags.c_contiguous
+    np.testing.assert_array_equal(X, expected)
+
+    # the fitted medians, not the scored frame's, fill gaps at serving time
+    restored = FeatureTransformer.from_dict(transformer.to_dict())
+    row = restored.frame(df.iloc[[0]].assign(torque=np.nan), rolling=(np.zeros(1), np.zeros(1)))
+    assert row["torque"].iloc[0] == np.float32(df["torque"].median())
+    assert list(row.columns) == FEATURE_COLUMNS
+
+
+def test_transformer_rejects_unknown_features():
+    with pytest.raises(ValueError):
+        FeatureTransformer(feature_names=["torque", "vibration"])
@@ -12,3 +12,65 @@ def test_train_xgboost(tmp_path):
     assert model_path.exists()
     assert 0.0 <= metrics["roc_auc"] <= 1.0
     assert 0.0 <= metrics["pr_auc"] <= 1.0
+
+
+def test_train_xgboost_exports_compiled_model(tmp_path):
+    import joblib
+    import numpy as np
+
+    from src.data_loader import load_dataset
+    from src.feature_engineering import FEATURE_COLUMNS, build_features
+    from src.modeling.compiled_model import CompiledEnsemble, compiled_model_path
+
+    model_path = tmp_path / "model.pkl"
+    train_xgboost("data/raw/ai4i2020.csv", str(model_path), random_state=7)
+    compiled = CompiledEnsemble.load(compiled_model_path(model_path))
+
+    X = build_features(load_dataset("data/raw/ai4i2020.csv"))[FEATURE_COLUMNS]
+    expected = joblib.load(model_path)["model"].predict_proba(X)[:, 1]
+    np.testing.assert_allclose(compiled.predict_proba(X)[:, 1], expected, atol=1e-5)
+
+
+def test_train_xgboost_streaming_mode(tmp_path):
+    import joblib
+    import numpy as np
+    import pandas as pd
+
+    from src.feature_engineering import build_features
+    from src.modeling.train_streaming import stratified_test_mask
+
+    rng = np.random.default_rng(3)
+    n = 3000
+    torque = rng.normal(40, 6, n)
+    wear = rng.uniform(0, 250, n)
+    df = pd.DataFrame(
+        {
+            "air_temperature": rng.normal(300, 2, n),
+            "process_temperature": rng.normal(310, 1.5, n),
+            "rotational_speed": rng.normal(1500, 40, n),
+            "torque": torque,
+            "tool_wear": wear,
+            "failure": ((torque > 46) & (wear > 150)).astype(int),
+        }
+    )
+    csv_path = tmp_path / "fleet.csv"
+    df.to_csv(csv_path, index=False)
+
+    model_path = tmp_path / "model.pkl"
+    metrics = train_xgboost(str(csv_path), str(model_path), random_state=7, streaming=True, chunksize=700)
+    assert metrics["roc_auc"] > 0.9
+    assert 0.0 <= metrics["pr_auc"] <= 1.0
+    artifact = joblib.load(model_path)
+    feats = build_features(df.head(3))[artifact["features"]]
+    assert artifact["model"].predict_proba(feats).shape == (3, 2)
+
+    assert set(artifact["monitoring_baseline"]) == set(artifact["features"])
+    assert abs(artifact["monitoring_baseline"]["torque"]["mean"] - df["torque"].mean()) < 1e-6
+
+    labels = np.r_[np.zeros(9_990, dtype=int), np.ones(10, dtype=int)]
+    np.random.default_rng(0).shuffle(labels)
+    mask = stratified_test_mask(labels, {}, 0.2, seed=7)
+    assert mask[labels == 1].sum() == 2 and abs(mask[labels == 0].mean() - 0.2) < 1e-3
+    seen: dict[int, int] = {}
+    chunked = np.concatenate([stratified_test_mask(labels[i : i + 700], seen, 0.2, seed=7) for i in range(0, 10_000, 700)])
+    np.testing.assert_array_equal(chunked, mask)
@@ -0,0 +1,62 @@
+import threading
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from monitoring.performance_tracking import (
+    LatencyHistogram,
+    PredictionAccumulator,
+    PredictionTracker,
+    prometheus_text,
+    summarize_predictions,
+)
+
+
+def test_accumulator_merge_matches_summary_of_all_values():
+    rng = np.random.default_rng(0)
+    probs = rng.beta(2, 5, size=10_000)
+    parts = [PredictionAccumulator() for _ in range(4)]
+    for part, chunk in zip(parts, np.array_split(probs, 4)):
+        for batch in np.array_split(chunk, 7):
+            part.update(batch)
+
+    merged = PredictionAccumulator()
+    for part in parts:
+        merged.merge(PredictionAccumulator.from_dict(part.to_dict()))
+    expected = summarize_predictions(probs)
+    assert merged.count == len(probs) and merged.histogram.sum() == len(probs)
+    assert merged.stats().mean_probability == pytest.approx(expected.mean_probability, rel=1e-12)
+    assert merged.stats().std_probability == pytest.approx(expected.std_probability, rel=1e-9)
+    assert merged.stats().high_risk_rate == expected.high_risk_rate
+
+
+def test_tracker_concurrent_updates_and_time_buckets():
+    tracker = PredictionTracker(bucket_seconds=60, n_buckets=3)
+
+    def worker():
+        for _ in range(200):
+            tracker.update([0.1, 0.9], now=0.0)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    tracker.update([0.5], now=200.0)
+
+    assert tracker.total().count == 8 * 200 * 2 + 1
+    assert tracker.total().high_risk == 8 * 200
+    assert tracker.window(now=200.0).count == 1  # bucket 0 has aged out of the 3-bucket window
+
+
+def test_prometheus_text_exposes_counters_and_histograms():
+    tracker = PredictionTracker()
+    tracker.update([0.2, 0.8, 0.95])
+    latency = LatencyHistogram()
+    latency.observe("/predict", 0.003)
+    text = prometheus_text(tracker, latency)
+    assert "gpm_predictions_total 3" in text
+    assert "gpm_high_risk_predictions_total 2" in text
+    assert 'gpm_prediction_probability_bucket{le="+Inf"} 3' in text
+    assert 'gpm_http_request_duration_seconds_bucket{route="/predict",le="0.005"} 1' in text
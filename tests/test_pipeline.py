@@ -0,0 +1,66 @@
+import pytest
+
+pytest.importorskip("pandas")
+pytest.importorskip("sklearn")
+
+from src.pipeline import run_pipeline
+from src.tracking import LocalBackend, RunTracker, load_local_run
+
+
+def _statuses(outputs):
+    return {s["name"]: s["status"] for s in outputs["stages"]}
+
+
+def test_pipeline_reuses_cached_stages(tmp_path):
+    data_path = tmp_path / "telemetry.csv"
+    data_path.write_text(open("data/raw/ai4i2020.csv").read())
+    untracked = RunTracker("pipeline", backend=LocalBackend(tmp_path / "untracked", "pipeline"), enabled=False)
+    kwargs = dict(
+        model_path=str(tmp_path / "model.pkl"),
+        cache_dir=str(tmp_path / "stages"),
+        summary_path=str(tmp_path / "summary.json"),
+        tracker=untracked,
+    )
+
+    backend = LocalBackend(tmp_path / "tracking", "pipeline")
+    tracker = RunTracker("pipeline", backend=backend, enabled=True)
+    first = run_pipeline(str(data_path), **{**kwargs, "tracker": tracker})
+    assert set(_statuses(first).values()) == {"miss"}
+    assert all(s["peak_rss_mb"] > 0 for s in first["stages"])
+    assert not (tmp_path / "stages" / "load").exists()
+    assert tracker.close()["fallback_reason"] is None
+    run = load_local_run(backend.directory)
+    assert run["params"]["xgb.max_depth"] == "5"
+    assert {"pr_auc", "stage.train.seconds", "stage.train.peak_rss_mb", "peak_rss_mb"} <= set(run["metrics"])
+    assert (backend.directory / "artifacts" / "shap_summary.json").exists()
+
+    second = run_pipeline(str(data_path), **kwargs)
+    assert _statuses(second)["train"] == "hit"
+    assert _statuses(second)["load"] == "skipped"
+    assert second["metrics"] == first["metrics"]
+    assert (tmp_path / "model.pkl").exists()
+
+    forced = run_pipeline(str(data_path), force_stages=("shap",), **kwargs)
+    assert _statuses(forced)["shap"] == "forced"
+    assert _statuses(forced)["train"] == "hit"
+
+    with open(data_path, "a") as fh:
+        fh.write("300,310,1500,40,120,1\n")
+    changed = run_pipeline(str(data_path), **kwargs)
+    assert _statuses(changed)["load"] == "miss"
+    assert _statuses(changed)["train"] == "miss"
+    assert not (tmp_path / "untracked").exists()
+
+
+def test_train_key_depends_on_error_costs(tmp_path):
+    from dataclasses import replace
+
+    from src.pipeline import STAGES, PipelineContext, _StageCache, _stage_keys
+
+    cache = _StageCache(tmp_path / "stages")
+    ctx = PipelineContext(data_path="data/raw/ai4i2020.csv", model_path=str(tmp_path / "model.pkl"))
+    keys = _stage_keys(STAGES, ctx, cache)
+    costly = _stage_keys(STAGES, replace(ctx, fn_cost=50.0), cache)
+    assert costly["train"] != keys["train"]
+    assert costly["features"] == keys["features"]
+    assert (tmp_path / "stages" / "index.json").exists()
@@ -0,0 +1,60 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from api.model_registry import ModelVersion
+from api.result_cache import ResultCache, parse_precision
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _frame(torque):
+    return pd.DataFrame({"torque": torque, "tool_wear": [120.0] * len(torque)})
+
+
+def test_keys_quantize_per_feature_precision():
+    cache = ResultCache(decimals=2, precision=parse_precision("torque=0"))
+    keys = cache.row_keys(_frame([40.2, 39.8, 40.6, float("nan")]))
+    assert keys[0] == keys[1] != keys[2]
+    assert keys[3] is None
+    assert parse_precision(" torque=1, tool_wear=0 ") == {"torque": 1, "tool_wear": 0}
+
+
+def test_ttl_lru_cap_and_reload_invalidation():
+    clock = _Clock()
+    cache = ResultCache(ttl_seconds=10, clock=clock)
+    v1 = ModelVersion("v1", None, loaded_at=1.0)
+    calls = []
+
+    def compute(rows):
+        calls.append(rows)
+        return [float(r) for r in rows]
+
+    feats = _frame([40.0, 41.0, 40.0])
+    assert cache.get_or_compute(v1, "score", feats, compute) == [0.0, 1.0, 0.0]
+    assert cache.get_or_compute(v1, "score", feats, compute) == [0.0, 1.0, 0.0]
+    assert calls == [[0, 1]]
+    assert cache.stats()["hits"] == {"score": 3} and cache.stats()["misses"] == {"score": 3}
+
+    clock.now = 11.0
+    cache.get_or_compute(v1, "score", feats.head(1), compute)
+    assert cache.expirations == 1
+
+    reloaded = ModelVersion("v1", None, loaded_at=2.0)
+    cache.get_or_compute(reloaded, "score", feats.head(1), compute)
+    assert cache.invalidations == 2 and len(cache) == 1
+    # an in-flight request on the old load can neither read nor write
+    assert cache.get_many(v1, "score", cache.row_keys(feats.head(1))) == [None]
+
+    one_entry = cache.bytes
+    small = ResultCache(max_bytes=2 * one_entry, clock=clock)
+    for torque in (1.0, 2.0, 1.0, 3.0):
+        small.get_or_compute(reloaded, "score", _frame([torque]), compute)
+    assert small.evictions == 1 and len(small) == 2
+    assert small.get_many(reloaded, "score", small.row_keys(_frame([1.0, 2.0, 3.0])))[1] is None
@@ -0,0 +1,89 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+pytest.importorskip("xgboost")
+
+from src.scoring import load_scorer, score_file
+
+
+@pytest.fixture(scope="module")
+def fleet(tmp_path_factory):
+    from src.modeling.train_xgboost import train_xgboost
+
+    tmp = tmp_path_factory.mktemp("fleet")
+    model_path = tmp / "model.pkl"
+    train_xgboost("data/raw/ai4i2020.csv", str(model_path), random_state=0)
+
+    rng = np.random.default_rng(0)
+    n = 230
+    readings = pd.DataFrame(
+        {
+            "air_temperature": rng.normal(300, 2, n),
+            "process_temperature": rng.normal(310, 1.5, n),
+            "rotational_speed": rng.normal(1500, 50, n),
+            "torque": rng.normal(40, 10, n),
+            "tool_wear": rng.uniform(0, 250, n),
+            "asset_id": rng.choice(["a", "b", "c"], n),
+        }
+    )
+    return model_path, readings
+
+
+def _expected(model_path, readings):
+    from src.feature_engineering import build_features
+
+    scorer, features = load_scorer(model_path)
+    return scorer.predict_proba(build_features(readings)[features])[:, 1]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_score_file_matches_single_pass_scoring_across_chunks(fleet, tmp_path, workers):
+    model_path, readings = fleet
+    source = tmp_path / "readings.csv"
+    readings.to_csv(source, index=False)
+
+    summary = score_file(str(source), str(tmp_path / "out"), str(model_path), chunksize=40, workers=workers)
+    assert summary["rows"] == len(readings) and len(summary["parts"]) == 6
+    scored = pd.concat(pd.read_parquet(tmp_path / "out" / part) for part in summary["parts"])
+
+    assert scored.index.tolist() == list(range(len(readings)))
+    assert scored["asset_id"].tolist() == readings["asset_id"].tolist()
+    np.testing.assert_allclose(scored["failure_probability"], _expected(model_path, readings), rtol=1e-5)
+    assert set(scored["risk_level"]) <= {"LOW", "MEDIUM", "HIGH"}
+    assert ((scored["survival_risk"] >= 0) & (scored["survival_risk"] <= 1)).all()
+    from src.modeling.survival_model import surrogate_survival_risk
+
+    np.testing.assert_allclose(scored["survival_risk"], surrogate_survival_risk(scored["failure_probability"]))
+    curve = scored[["risk_7d", "risk_30d", "risk_90d"]].to_numpy()
+    assert curve.dtype == np.float32 and (np.diff(curve, axis=1) >= 0).all()
+
+
+def test_score_file_reads_parquet_and_writes_csv(fleet, tmp_path):
+    model_path, readings = fleet
+    source = tmp_path / "readings.parquet"
+    readings.drop(columns="asset_id").to_parquet(source)
+
+    summary = score_file(str(source), str(tmp_path / "out"), str(model_path), chunksize=100, workers=1, file_format="csv")
+    scored = pd.concat(pd.read_csv(tmp_path / "out" / part, index_col="row") for part in summary["parts"])
+    assert "asset_id" not in scored.columns
+    np.testing.assert_allclose(
+        scored["failure_probability"], _expected(model_path, readings.drop(columns="asset_id")), rtol=1e-5
+    )
+
+
+def test_score_file_imputes_with_training_medians(fleet, tmp_path):
+    from src.data_loader import load_dataset
+    from src.modeling.artifact import load_transformer
+
+    model_path, readings = fleet
+    medians = load_transformer(model_path).medians
+    assert medians["torque"] == load_dataset("data/raw/ai4i2020.csv")["torque"].median()
+
+    gappy = readings.drop(columns="asset_id").copy()
+    gappy.loc[::5, "torque"] = np.nan
+    gappy.to_csv(tmp_path / "gappy.csv", index=False)
+    summary = score_file(str(tmp_path / "gappy.csv"), str(tmp_path / "out"), str(model_path), chunksize=100, workers=1)
+    scored = pd.concat(pd.read_parquet(tmp_path / "out" / part) for part in summary["parts"])
+    filled = gappy.fillna({"torque": medians["torque"]})
+    np.testing.assert_allclose(scored["failure_probability"], _expected(model_path, filled), rtol=1e-5)
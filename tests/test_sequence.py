@@ -0,0 +1,91 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+from src.modeling.sequence_data import SENSOR_COLUMNS, SequenceDataset
+from src.modeling.train_lstm import train_lstm_sequence_model
+
+
+def _telemetry(n=600, assets=("a", "b", "c"), seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({c: rng.normal(100, 10, n) for c in SENSOR_COLUMNS})
+    df["asset_id"] = rng.choice(assets, n)  # interleaved, as readings arrive from the fleet
+    df["failure"] = rng.integers(0, 2, n)
+    return df
+
+
+def test_windows_are_views_that_never_cross_assets():
+    df = _telemetry()
+    ds = SequenceDataset.from_frame(df, window_size=8)
+
+    assert ds.windows.shape[1:] == (8, len(SENSOR_COLUMNS))
+    assert np.shares_memory(ds.windows, ds.values)
+    expected = sum(max(0, count - 7) for count in df["asset_id"].value_counts())
+    assert len(ds) == expected
+
+    X, y = ds.batch(np.arange(len(ds)))
+    # asset codes follow first appearance, like groupby(sort=False)
+    for code, (_, group) in enumerate(df.groupby("asset_id", sort=False)):
+        rows = group[SENSOR_COLUMNS].to_numpy(dtype=np.float32)
+        expected_windows = np.lib.stride_tricks.sliding_window_view(rows, 8, axis=0).transpose(0, 2, 1)
+        np.testing.assert_array_equal(X[ds.segments == code], expected_windows)
+        np.testing.assert_array_equal(y[ds.segments == code], group["failure"].to_numpy()[7:])
+    seen = np.concatenate([xb for xb, _ in ds.batches(batch_size=50, seed=1)])
+    assert len(seen) == len(ds)
+
+    train, valid = ds.split(0.25)
+    assert not set(train) & set(valid)
+    for seg in np.unique(ds.segments):
+        t, v = train[ds.segments[train] == seg], valid[ds.segments[valid] == seg]
+        assert t.max() + 8 <= v.min()  # no reading shared between the two sides
+
+
+def test_cache_backed_dataset_is_memory_mapped(tmp_path):
+    df = _telemetry(n=300)
+    csv = tmp_path / "fleet.csv"
+    df.to_csv(csv, index=False)
+
+    cached = SequenceDataset.from_cache(str(csv), window_size=6, cache_dir=str(tmp_path / "cache"))
+    in_memory = SequenceDataset.from_frame(df, window_size=6)
+    assert isinstance(cached.values, np.memmap)
+    assert len(cached) == len(in_memory)
+    np.testing.assert_array_equal(cached.batch(np.arange(len(cached)))[0], in_memory.batch(np.arange(len(in_memory)))[0])
+    np.testing.assert_array_equal(cached.targets, in_memory.targets)
+
+
+def test_numpy_lstm_learns_and_stops_early():
+    rng = np.random.default_rng(0)
+    n = 2400
+    torque = rng.normal(0, 1, n)
+    X = np.column_stack([torque, rng.normal(0, 1, n)])
+    # failure follows a sustained torque excursion over the last few readings
+    y = (pd.Series(torque).rolling(4).mean().fillna(0).to_numpy() > 0.6).astype(int)
+
+    result = train_lstm_sequence_model(X, y, window_size=6, hidden_size=8, epochs=12, patience=2, learning_rate=0.02)
+    assert result.model is not None and result.n_windows == n - 5
+    assert 1 <= result.best_epoch <= result.epochs_run <= 12
+    assert result.best_valid_loss == min(result.valid_loss) < result.valid_loss[0] * 0.8
+
+    ds = SequenceDataset.from_arrays(X, y, 6)
+    Xb, yb = ds.batch(np.arange(len(ds)))
+    prob = result.model.predict_proba(Xb)
+    assert prob[yb == 1].mean() > prob[yb == 0].mean() + 0.3
+
+    short = train_lstm_sequence_model(X[:3], y[:3], window_size=6)
+    assert short.model is None and "Insufficient" in short.message
+
+
+def test_lstm_scales_on_training_windows_and_keeps_weights_without_improvement():
+    X = np.column_stack([np.arange(200, dtype=float), np.ones(200)])
+    y = np.zeros(200, dtype=int)
+    ds = SequenceDataset.from_arrays(X, y, 5)
+    train_idx, _ = ds.split(0.2)
+    mean, _ = ds.feature_stats(train_idx)
+    assert mean[0] == pytest.approx(X[: train_idx.max() + 5, 0].mean())
+
+    result = train_lstm_sequence_model(X, y, window_size=5, epochs=0)
+    assert result.model is not None and result.best_epoch == 0
+    Xb, _ = ds.batch(np.arange(3))
+    assert np.isfinite(result.model.predict_proba(Xb)).all()
+    assert result.model.mean[0] == pytest.approx(mean[0])
@@ -0,0 +1,16 @@
+import pytest
+
+pytest.importorskip("pandas")
+
+from benchmarks.import_time import ENTRY_POINTS, check, deferred_imports, import_profile
+
+
+@pytest.mark.parametrize("name", sorted(ENTRY_POINTS))
+def test_entry_points_stay_within_import_budget(name):
+    assert check(name) == []
+
+
+def test_import_profile_sees_heavy_modules_when_imported():
+    profile = import_profile(("-c", "import scipy.stats"))
+    assert "scipy.stats" in profile
+    assert deferred_imports(profile) == ["scipy"]
@@ -0,0 +1,30 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.modeling.survival_model import ExpLookup, daily_hazard, survival_risk_matrix
+
+
+def test_risk_matrix_broadcasts_probabilities_over_horizons():
+    probs = np.array([0.0, 0.05, 0.5, 0.999])
+    matrix = survival_risk_matrix(probs, horizons=[7, 30, 90], reference_days=30)
+
+    assert matrix.shape == (4, 3) and matrix.dtype == np.float64
+    np.testing.assert_allclose(matrix[:, 1], probs, atol=1e-6)  # calibrated at the reference horizon
+    assert np.all(np.diff(matrix, axis=1) >= 0) and np.all(np.diff(matrix, axis=0) >= 0)
+    expected = 1 - (1 - probs[:, None]) ** (np.array([7, 30, 90]) / 30)
+    np.testing.assert_allclose(matrix, expected, atol=1e-6)
+
+    by_hazard = survival_risk_matrix(hazard=daily_hazard(probs, 30), horizons=[7, 30, 90])
+    np.testing.assert_allclose(by_hazard, matrix)
+
+
+def test_float32_lookup_table_matches_exact_curve():
+    probs = np.random.default_rng(0).random(1000)
+    exact = survival_risk_matrix(probs, horizons=[1, 7, 30, 90, 365])
+    approx = survival_risk_matrix(probs, horizons=[1, 7, 30, 90, 365], dtype=np.float32, lut=ExpLookup())
+    assert approx.dtype == np.float32
+    np.testing.assert_allclose(approx, exact, atol=1e-5)
+
+    with pytest.raises(ValueError):
+        survival_risk_matrix(probs, hazard=probs)
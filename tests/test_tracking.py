@@ -0,0 +1,98 @@
+import threading
+import time
+
+from src.tracking import LocalBackend, RunTracker, load_local_run
+
+
+class _FakeBackend:
+    name = "fake"
+
+    def __init__(self, delay=0.0, failures=0, gate=None):
+        self.delay, self.failures, self.gate = delay, failures, gate
+        self.calls = 0
+        self.metrics = []
+
+    def start(self):
+        pass
+
+    def log_batch(self, batch):
+        self.calls += 1
+        if self.gate is not None:
+            self.gate.wait()
+        time.sleep(self.delay)
+        if self.calls <= self.failures:
+            raise ConnectionError("tracking server unreachable")
+        self.metrics.extend(batch.metrics)
+
+    def finish(self, status):
+        self.status = status
+
+
+def _local_metrics(tracker):
+    return load_local_run(tracker.stats()["fallback_dir"])["metrics"]
+
+
+def test_tracker_batches_metrics_off_the_calling_thread(tmp_path):
+    backend = _FakeBackend(delay=0.05)
+    tracker = RunTracker("run", backend=backend, fallback_dir=tmp_path, enabled=True, flush_interval=0.05)
+    start = time.perf_counter()
+    for step in range(200):
+        tracker.log_metric("loss", 1.0 / (step + 1), step=step)
+    assert time.perf_counter() - start < 0.05
+    stats = tracker.close(timeout=5)
+    assert stats["fallback_reason"] is None and stats["dropped"] == 0
+    assert [m[3] for m in backend.metrics] == list(range(200))
+    assert backend.calls < 20
+    assert backend.status == "FINISHED"
+
+
+def test_tracker_retries_then_falls_back_to_local_store(tmp_path):
+    backend = _FakeBackend(failures=10)
+    tracker = RunTracker("run", backend=backend, fallback_dir=tmp_path, enabled=True, retries=2, backoff=0.01)
+    tracker.log_params({"max_depth": 5})
+    tracker.log_metrics({"pr_auc": 0.8, "backend": "XGBClassifier"})
+    tracker.log_dict({"a": 1}, "nested/summary.json")
+    stats = tracker.close(timeout=5)
+    assert backend.calls == 3
+    assert "failed after 3 attempt(s)" in stats["fallback_reason"]
+    run = load_local_run(stats["fallback_dir"])
+    assert run["params"]["max_depth"] == "5"
+    assert run["metrics"] == {"pr_auc": [(0.8, 0)]}
+    assert run["status"] == "FINISHED"
+    assert next(tmp_path.glob("run-*/artifacts/nested/summary.json")).read_text().startswith("{")
+
+
+def test_slow_backend_never_blocks_logging(tmp_path):
+    gate = threading.Event()
+    backend = _FakeBackend(gate=gate)
+    tracker = RunTracker(
+        "run", backend=backend, fallback_dir=tmp_path, enabled=True, max_queue=4, flush_interval=0.01, slow_seconds=0.05
+    )
+    tracker.log_metric("first", 1.0)
+    time.sleep(0.1)  # the worker is now stuck in the first batch
+    start = time.perf_counter()
+    for i in range(10):
+        tracker.log_metric(f"m{i}", float(i))
+    assert time.perf_counter() - start < 0.05
+    assert tracker.dropped == 6
+
+    stats = tracker.close(timeout=0.2)
+    assert stats["fallback_reason"] == "flush took longer than 0.2s"
+    assert set(_local_metrics(tracker)) == {"m0", "m1", "m2", "m3"}
+
+    gate.set()  # the first batch arrives late: delivered, but marked slow
+    tracker2 = RunTracker("run2", backend=_FakeBackend(delay=0.1), fallback_dir=tmp_path, enabled=True, slow_seconds=0.05)
+    tracker2.log_metric("a", 1.0)
+    time.sleep(0.8)
+    tracker2.log_metric("b", 2.0)
+    stats = tracker2.close(timeout=5)
+    assert tracker2.primary.metrics[0][0] == "a"
+    assert "took" in stats["fallback_reason"]
+    assert set(_local_metrics(tracker2)) == {"b"}
+
+
+def test_disabled_tracker_is_a_no_op(tmp_path):
+    tracker = RunTracker("run", backend=LocalBackend(tmp_path, "run"), fallback_dir=tmp_path, enabled=False)
+    tracker.log_metric("a", 1.0)
+    assert tracker.close()["batches"] == 0
+    assert not any(tmp_path.iterdir())
@@ -0,0 +1,58 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("sklearn")
+
+from src.modeling.tune import cross_validate_candidates, parameter_candidates
+
+
+def _synthetic(n=600, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 4))
+    y = ((X[:, 0] + 0.5 * X[:, 1] + rng.normal(scale=0.7, size=n)) > 1.0).astype(int)
+    return X, y
+
+
+def test_parameter_candidates_grid_and_random_search():
+    grid = {"max_depth": [3, 5], "learning_rate": [0.05, 0.1], "n_estimators": [20]}
+    assert len(parameter_candidates(grid)) == 4
+    sampled = parameter_candidates(grid, n_iter=2, random_state=0)
+    assert len(sampled) == 2
+    assert sampled == parameter_candidates(grid, n_iter=2, random_state=0)
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_cross_validation_ranks_candidates(n_jobs):
+    X, y = _synthetic()
+    candidates = [{"n_estimators": 5, "max_depth": 1}, {"n_estimators": 40, "max_depth": 3}]
+    results = cross_validate_candidates(X, y, candidates, n_folds=3, n_jobs=n_jobs, random_state=0)
+    assert len(results) == 2
+    assert results[0].pr_auc_mean >= results[1].pr_auc_mean
+    assert all(0.0 <= r.pr_auc_mean <= 1.0 and r.expected_cost_mean >= 0 for r in results)
+
+
+def test_tune_writes_best_config_into_artifact(tmp_path):
+    joblib = pytest.importorskip("joblib")
+    pd = pytest.importorskip("pandas")
+
+    from src.modeling.tune import tune
+
+    X, y = _synthetic(n=400, seed=1)
+    df = pd.DataFrame(
+        {
+            "air_temperature": 300 + X[:, 2],
+            "process_temperature": 310 + X[:, 3],
+            "rotational_speed": 1500 + 20 * X[:, 1],
+            "torque": 40 + 5 * X[:, 0],
+            "tool_wear": 120 + 10 * X[:, 1],
+            "failure": y,
+        }
+    )
+    data_path = tmp_path / "fleet.csv"
+    df.to_csv(data_path, index=False)
+
+    grid = {"n_estimators": [10, 30], "max_depth": [2]}
+    summary = tune(str(data_path), str(tmp_path / "model.pkl"), grid=grid, n_folds=3, n_jobs=1)
+    artifact = joblib.load(tmp_path / "model.pkl")
+    assert artifact["params"]["n_estimators"] == summary["best_params"]["n_estimators"]
+    assert len(artifact["tuning"]["results"]) == 2
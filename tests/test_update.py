@@ -0,0 +1,108 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+pytest.importorskip("xgboost")
+
+from src.modeling.artifact import load_artifact
+from src.modeling.evaluate import Metrics
+from src.modeling.train_xgboost import train_xgboost
+from src.modeling.update import promotion_check, update_xgboost
+
+
+def _fleet(n, seed):
+    rng = np.random.default_rng(seed)
+    torque = rng.normal(40, 6, n)
+    wear = rng.uniform(0, 250, n)
+    return pd.DataFrame(
+        {
+            "air_temperature": rng.normal(300, 2, n),
+            "process_temperature": rng.normal(310, 1.5, n),
+            "rotational_speed": rng.normal(1500, 40, n),
+            "torque": torque,
+            "tool_wear": wear,
+            "failure": ((torque > 46) & (wear > 150) | (rng.random(n) < 0.02)).astype(int),
+        }
+    )
+
+
+@pytest.fixture()
+def trained(tmp_path):
+    history = tmp_path / "history.csv"
+    _fleet(3000, seed=0).to_csv(history, index=False)
+    model_path = tmp_path / "model.pkl"
+    train_xgboost(str(history), str(model_path), random_state=0, params={"n_estimators": 60})
+    return history, model_path
+
+
+def test_promotion_check_blocks_regressions():
+    parent = Metrics(roc_auc=0.9, pr_auc=0.6, f1=0.5, expected_cost=100.0)
+    assert promotion_check(parent, Metrics(0.9, 0.65, 0.5, 90.0)) == []
+    reasons = promotion_check(parent, Metrics(0.9, 0.5, 0.5, 120.0))
+    assert len(reasons) == 2
+    assert promotion_check(parent, Metrics(0.9, 0.59, 0.5, 105.0), tolerance=0.1) == []
+    # a single-class holdout has no PR-AUC, so expected cost alone decides
+    assert promotion_check(parent, Metrics(0.9, float("nan"), 0.5, 0.0)) == []
+    assert promotion_check(parent, Metrics(0.9, float("nan"), 0.5, 150.0))
+
+
+def test_update_continues_boosting_and_records_lineage(trained, tmp_path):
+    history, model_path = trained
+    parent = load_artifact(model_path)
+    new = tmp_path / "day1.csv"
+    _fleet(1000, seed=1).to_csv(new, index=False)
+
+    cache_dir = tmp_path / "cache"
+    summary = update_xgboost(
+        str(new),
+        str(model_path),
+        rounds=20,
+        replay_path=str(history),
+        replay_rows=500,
+        tolerance=1.0,
+        cache_dir=str(cache_dir),
+    )
+    assert summary["promoted"] and summary["parent_version"] == parent.version
+    assert summary["train_rows"] == 800 + 512  # two replay blocks of 256 rows
+
+    updated = load_artifact(model_path)
+    lineage = updated["lineage"]
+    assert updated.version != parent.version
+    assert lineage["parents"] == [parent.version] and lineage["total_rounds"] == 80
+    assert lineage["data"]["holdout_rows"] == [800, 1000] and lineage["replay"]["rows"] == 512
+    assert updated["transformer"] == parent["transformer"]
+    assert (cache_dir / "index.json").exists()
+
+    # drift reference and baseline cover the parent's 3000 rows plus all 1000 new ones
+    assert lineage["reference"] == {"mode": "merged", "parent_rows": 3000, "new_rows": 1000}
+    both = pd.concat([pd.read_csv(history), pd.read_csv(new)])
+    assert updated["monitoring_baseline"]["torque"]["mean"] == pytest.approx(both["torque"].mean())
+    assert updated["monitoring_baseline"]["torque"]["std"] == pytest.approx(both["torque"].std(ddof=0))
+    assert updated["monitoring_baseline"]["torque"]["p95"] == pytest.approx(both["torque"].quantile(0.95), rel=0.01)
+
+
+def test_update_is_rejected_when_holdout_gets_worse(trained, tmp_path):
+    _, model_path = trained
+    before = load_artifact(model_path).version
+    noisy = _fleet(1000, seed=2)
+    noisy.loc[:799, "failure"] = np.random.default_rng(3).permutation(noisy["failure"].iloc[:800].to_numpy())
+    new = tmp_path / "noisy.csv"
+    noisy.to_csv(new, index=False)
+
+    summary = update_xgboost(str(new), str(model_path), rounds=40)
+    assert not summary["promoted"] and summary["reasons"]
+    assert load_artifact(model_path).version == before
+
+
+def test_update_promotes_on_cost_when_holdout_has_no_failures(trained, tmp_path):
+    _, model_path = trained
+    quiet = _fleet(1000, seed=4)
+    quiet.loc[800:, "failure"] = 0
+    new = tmp_path / "quiet.csv"
+    quiet.to_csv(new, index=False)
+
+    summary = update_xgboost(str(new), str(model_path), rounds=10, cache_dir=str(tmp_path / "cache"))
+    lineage = load_artifact(model_path)["lineage"]
+    assert np.isnan(summary["parent_pr_auc"])
+    assert np.isnan(summary["pr_auc"]) and summary["expected_cost"] <= summary["parent_expected_cost"]
+    assert summary["promoted"] and lineage["mode"] == "update"
@@ -0,0 +1,42 @@
+import time
+from pathlib import Path
+
+from src.utils import SamplingProfiler, record_spans, span
+
+
+def test_spans_are_recorded_only_inside_a_recorder():
+    @span("work")
+    def work():
+        time.sleep(0.002)
+        return 1
+
+    with span("ignored"):
+        assert work() == 1
+
+    with record_spans() as spans:
+        work()
+        with span("block"):
+            work()
+    totals = spans.totals()
+    assert list(totals) == ["work", "block"]
+    assert totals["work"] >= 0.004 and totals["block"] >= 0.002
+    assert spans.server_timing().startswith("work;dur=")
+
+
+def _busy_loop(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(200))
+
+
+def test_sampling_profiler_writes_collapsed_stacks(tmp_path):
+    import threading
+
+    worker = threading.Thread(target=_busy_loop, args=(0.2,))
+    with SamplingProfiler(interval=0.002, roots=[Path(__file__).parent]) as profiler:
+        worker.start()
+        worker.join()
+    out = profiler.write(tmp_path / "busy.collapsed")
+    lines = out.read_text().splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert any("_busy_loop (test_utils.py:" in line for line in lines)